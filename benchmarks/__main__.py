@@ -0,0 +1,151 @@
+"""Microbenchmarks for the functions the client runs for every message
+
+Run `python -m benchmarks` to compare against the stored baseline and `python -m benchmarks --save-baseline` to
+update it. Timings are stored relative to a fixed pure Python workload timed in the same run, so a baseline saved on
+one machine is still meaningful on another.
+
+Each benchmark is timed in short rounds alternated with the calibration workload and the median ratio is used. A
+benchmark only counts as regressed if it's slower than the baseline by more than the threshold plus the spread of its
+own rounds, and it's still slower when it's timed again.
+"""
+import argparse
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+import statistics
+import sys
+import timeit
+from typing import Callable, Collection, Optional
+
+from benchmarks.corpora import build_corpora, to_decimals
+from phx_events import json_handler
+from phx_events.phx_messages import Event, PHXEvent, Topic
+from phx_events.utils import make_message, parse_event
+
+
+BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+
+def calibration_workload() -> None:
+    total = 0
+    for number in range(1000):
+        total += number * number % 7
+
+
+def build_benchmarks() -> dict[str, Callable[[], object]]:
+    benchmarks: dict[str, Callable[[], object]] = {
+        'decimal_serialiser': partial(json_handler.decimal_serialiser, Decimal('123.4567')),
+        'make_message/event': partial(make_message, Event('new_order'), Topic('orders:1'), '1', {'id': 1}),
+        'make_message/phx_event': partial(make_message, PHXEvent.reply, Topic('orders:1'), '1', {'status': 'ok'}),
+        'parse_event/event': partial(parse_event, Event('new_order')),
+        'parse_event/phx_event': partial(parse_event, Event('phx_reply')),
+    }
+
+    for corpus_name, payload in build_corpora().items():
+        frame = json_handler.dumps({'event': 'new_order', 'topic': 'orders:1', 'ref': None, 'payload': payload})
+        decimal_payload = to_decimals(payload)
+
+        benchmarks[f'loads/{corpus_name}'] = partial(json_handler.loads, frame)
+        benchmarks[f'loads_floats/{corpus_name}'] = partial(json_handler.loads, frame, floats_to_decimal=False)
+        benchmarks[f'dumps/{corpus_name}'] = partial(json_handler.dumps, decimal_payload)
+        message = make_message(Event('new_order'), Topic('orders:1'), None, decimal_payload)
+        benchmarks[f'dumps_message/{corpus_name}'] = partial(json_handler.dumps, message)
+        benchmarks[f'deep_float_replace/{corpus_name}'] = partial(json_handler.deep_float_replace, payload)
+
+    return benchmarks
+
+
+def relative_timings(function: Callable[[], object], repeat: int) -> list[float]:
+    timer = timeit.Timer(function)
+    calibration_timer = timeit.Timer(calibration_workload)
+    # autorange aims for 0.2s a timing, a quarter of that keeps the rounds short enough to alternate often
+    number = max(timer.autorange()[0] // 4, 1)
+    calibration_number = max(calibration_timer.autorange()[0] // 4, 1)
+
+    # Alternate with the calibration so a change in machine load affects both timings in a round the same way
+    return [
+        (timer.timeit(number) / number) / (calibration_timer.timeit(calibration_number) / calibration_number)
+        for _ in range(repeat)
+    ]
+
+
+def run_benchmarks(
+    name_filter: str,
+    repeat: int,
+    names: Optional[Collection[str]] = None,
+) -> tuple[dict[str, float], dict[str, float]]:
+    """
+    Returns:
+        tuple[dict[str, float], dict[str, float]]: The median relative time of each benchmark, and the interquartile
+                                                   range of its rounds as a fraction of the median
+    """
+    results = {}
+    noise = {}
+    for name, function in build_benchmarks().items():
+        if name_filter not in name or (names is not None and name not in names):
+            continue
+
+        timings = relative_timings(function, repeat)
+        results[name] = statistics.median(timings)
+        if len(timings) > 1:
+            lower_quartile, _, upper_quartile = statistics.quantiles(timings, n=4)
+            noise[name] = (upper_quartile - lower_quartile) / results[name]
+
+    return results, noise
+
+
+def find_regressions(
+    results: dict[str, float],
+    baseline: dict[str, float],
+    threshold: float,
+    noise: Optional[dict[str, float]] = None,
+) -> list[str]:
+    """Names of the benchmarks slower than the baseline by more than `threshold` plus their `noise`"""
+    noise = noise or {}
+    return [
+        name
+        for name, relative_time in results.items()
+        if name in baseline and relative_time > baseline[name] * (1 + threshold + noise.get(name, 0))
+    ]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.splitlines()[0])
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='baseline file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slow down, 0.25 is 25%% slower')
+    parser.add_argument('--filter', default='', help='only run benchmarks with this in their name')
+    parser.add_argument('--repeat', type=int, default=15, help='timing rounds per benchmark, the median is used')
+    args = parser.parse_args()
+
+    results, noise = run_benchmarks(args.filter, args.repeat)
+    baseline = json_handler.loads(args.baseline.read_bytes(), floats_to_decimal=False) if args.baseline.exists() else {}
+
+    for name, relative_time in results.items():
+        change = f'{relative_time / baseline[name] - 1:+.1%}' if name in baseline else 'new'
+        spread = f'±{noise.get(name, 0):.1%}'
+        sys.stdout.write(f'{name:<36} {relative_time:>10.4f} {change:>8} {spread:>8}\n')
+
+    if args.save_baseline:
+        args.baseline.write_bytes(json_handler.dumps({**baseline, **results}) + b'\n')
+        return 0
+
+    if regressions := find_regressions(results, baseline, args.threshold, noise):
+        # Time the regressed benchmarks again and keep the faster run so a burst of machine load isn't reported
+        rerun_results, rerun_noise = run_benchmarks(args.filter, args.repeat, names=regressions)
+        for name, relative_time in rerun_results.items():
+            if relative_time < results[name]:
+                results[name] = relative_time
+                noise[name] = rerun_noise[name]
+
+        regressions = find_regressions(results, baseline, args.threshold, noise)
+
+    if regressions:
+        sys.stdout.write(f'Regressed by more than {args.threshold:.0%}: {", ".join(regressions)}\n')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
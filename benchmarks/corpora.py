@@ -0,0 +1,64 @@
+"""Deterministic payloads shaped like the messages the client handles"""
+from decimal import Decimal
+import random
+from typing import Any
+
+
+def flat_payload(rng: random.Random) -> dict[str, Any]:
+    return {
+        'id': rng.randrange(1_000_000),
+        'status': rng.choice(['open', 'closed', 'pending']),
+        'active': rng.random() > 0.5,
+        'name': ''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=12)),
+        **{f'field_{index}': rng.randrange(1000) for index in range(16)},
+    }
+
+
+def nested_payload(rng: random.Random, depth: int = 6) -> dict[str, Any]:
+    if depth == 0:
+        return flat_payload(rng)
+
+    child_count = 2 if depth > 3 else 1
+    return {
+        'level': depth,
+        'children': [nested_payload(rng, depth - 1) for _ in range(child_count)],
+        'tags': [f'tag_{index}' for index in range(4)],
+    }
+
+
+def float_heavy_payload(rng: random.Random, levels: int = 200) -> dict[str, Any]:
+    return {
+        'bids': [[round(100 - index * 0.01, 2), round(rng.uniform(0, 10), 4)] for index in range(levels)],
+        'asks': [[round(100 + index * 0.01, 2), round(rng.uniform(0, 10), 4)] for index in range(levels)],
+        'spread': 0.02,
+    }
+
+
+def large_payload(rng: random.Random, entries: int = 5000) -> dict[str, Any]:
+    return {
+        'snapshot': [
+            {'id': index, 'price': round(rng.uniform(1, 1000), 2), 'symbol': f'SYM{index % 50}', 'live': index % 2 == 0}
+            for index in range(entries)
+        ],
+    }
+
+
+def to_decimals(value: Any) -> Any:
+    """The payload as the client's handlers see it, with floats as Decimals"""
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, dict):
+        return {key: to_decimals(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [to_decimals(item) for item in value]
+    return value
+
+
+def build_corpora(seed: int = 1) -> dict[str, dict[str, Any]]:
+    rng = random.Random(seed)
+    return {
+        'flat': flat_payload(rng),
+        'nested': nested_payload(rng),
+        'float_heavy': float_heavy_payload(rng),
+        'large': large_payload(rng),
+    }
@@ -0,0 +1,61 @@
+"""Compare handler throughput of the executors sync handlers can be run in
+
+Run `python -m benchmarks.executors`. Each executor runs a CPU heavy handler over the same messages through
+`parallel_handler`, so the results include handing the message bytes across to the worker.
+"""
+import argparse
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import os
+import sys
+import time
+from typing import Callable
+
+from benchmarks.corpora import build_corpora
+from phx_events.client import PHXChannelsClient
+from phx_events.parallel import parallel_executor, parallel_handler
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+def cpu_heavy_handler(message_bytes: bytes) -> None:
+    payload = json.loads(message_bytes)['payload']
+    for _ in range(20):
+        json.dumps(payload, sort_keys=True)
+
+
+async def handle_messages(executor: Executor, message_count: int) -> float:
+    handler = parallel_handler(cpu_heavy_handler, executor)
+    message = make_message(Event('order_book'), Topic('orders:1'), None, build_corpora()['float_heavy'])
+    # Parallel handlers aren't given the client, it's only passed to match the handler signature
+    client = PHXChannelsClient('ws://localhost/')
+
+    # Start every worker before timing
+    await asyncio.gather(*(handler(message, client) for _ in range(os.cpu_count() or 1)))
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(handler(message, client) for _ in range(message_count)))
+    return message_count / (time.perf_counter() - started_at)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.executors', description=__doc__)
+    parser.add_argument('--messages', type=int, default=2000, help='messages handled by each executor')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='workers in each executor')
+    args = parser.parse_args()
+
+    executors: dict[str, Callable[[], Executor]] = {
+        'thread': lambda: ThreadPoolExecutor(max_workers=args.workers),
+        'process': lambda: ProcessPoolExecutor(max_workers=args.workers),
+        'parallel': lambda: parallel_executor(max_workers=args.workers),
+    }
+    for name, create_executor in executors.items():
+        with create_executor() as executor:
+            messages_per_second = asyncio.run(handle_messages(executor, args.messages))
+
+        sys.stdout.write(f'{name:<10} {type(executor).__name__:<25} {messages_per_second:>10.0f} messages/s\n')
+
+
+if __name__ == '__main__':
+    main()
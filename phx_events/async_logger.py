@@ -1,12 +1,91 @@
 import asyncio
+from dataclasses import dataclass
+from enum import Enum, unique
 import logging
 from logging.handlers import QueueHandler, QueueListener
-from queue import SimpleQueue
+from queue import Empty, Full, Queue
+from threading import Lock
+from typing import Any
+
+
+@unique
+class DropPolicy(Enum):
+    """What to do with a log record when the logging queue is full"""
+    drop_newest = 'drop_newest'
+    drop_oldest = 'drop_oldest'
+
+
+@dataclass()
+class LogQueueStats:
+    """
+    Args:
+        enqueued (int): Number of records put on the logging queue
+        dropped (int): Number of records discarded because the logging queue was full
+    """
+    enqueued: int = 0
+    dropped: int = 0
 
 
 class LocalQueueHandler(QueueHandler):
+    """Queue handler that never blocks the caller
+
+    Records are dropped according to `drop_policy` when the (bounded) queue is full and counted in `stats`.
+    If `preformat` is set the record's message is formatted in the emitting thread and its `args` and `exc_info` are
+    discarded, so the queue only holds small, self-contained records instead of references to the logged objects.
+    """
+    queue: Queue
+
+    def __init__(self, queue: Queue, drop_policy: DropPolicy = DropPolicy.drop_newest, preformat: bool = False):
+        super().__init__(queue)
+        self.drop_policy = drop_policy
+        self.preformat = preformat
+        self.stats = LogQueueStats()
+        # Records are emitted from every thread that logs, so the counters are updated under a lock
+        self._stats_lock = Lock()
+
+    def _count_dropped(self) -> None:
+        with self._stats_lock:
+            self.stats.dropped += 1
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            if self.drop_policy == DropPolicy.drop_newest:
+                self._count_dropped()
+                return
+
+            # Make room by discarding the oldest record - the listener may have emptied the queue in the meantime
+            try:
+                oldest_record = self.queue.get_nowait()
+            except Empty:
+                pass
+            else:
+                # The discarded record is never handled so it's marked done here, otherwise queue.join() never returns
+                self.queue.task_done()
+                if oldest_record is None:
+                    # Never discard the listener's stop sentinel - it's still running until it gets it so the put
+                    # can't block forever - drop this record instead
+                    self.queue.put(oldest_record)
+                    self._count_dropped()
+                    return
+
+                self._count_dropped()
+
+            try:
+                self.queue.put_nowait(record)
+            except Full:
+                self._count_dropped()
+                return
+
+        with self._stats_lock:
+            self.stats.enqueued += 1
+
     def emit(self, record: logging.LogRecord) -> None:
         try:
+            if self.preformat:
+                record = self.prepare(record)
+
             self.enqueue(record)
         except asyncio.CancelledError:
             raise
@@ -14,22 +93,85 @@ class LocalQueueHandler(QueueHandler):
             self.handleError(record)
 
 
-def setup_queue_logging() -> tuple[logging.Logger, QueueListener]:
+class BatchingQueueListener(QueueListener):
+    """QueueListener that drains up to `batch_size` records from the queue for each wake up of its thread
+
+    Handling records in batches means the listener thread wakes up (and contends for the GIL) less often when a lot
+    of records are being logged.
+    """
+    queue: Queue
+    _sentinel = None
+
+    def __init__(
+        self,
+        queue: Queue,
+        *handlers: logging.Handler,
+        respect_handler_level: bool = False,
+        batch_size: int = 100,
+    ):
+        super().__init__(queue, *handlers, respect_handler_level=respect_handler_level)
+        self.batch_size = batch_size
+
+    def enqueue_sentinel(self) -> None:
+        # Block rather than drop the sentinel if the queue is full so stop() always ends the thread
+        self.queue.put(self._sentinel)
+
+    def dequeue_batch(self) -> list[Any]:
+        # Wait for the first record then take whatever else is already waiting
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except Empty:
+                break
+
+        return batch
+
+    def _monitor(self) -> None:
+        # Replaces CPython's QueueListener._monitor, which runs in the listener thread and takes one record per
+        # dequeue() call until it gets the sentinel. The batches are handled the same way, including task_done()
+        # for every record so queue.join() still works.
+        while True:
+            batch = self.dequeue_batch()
+            got_sentinel = False
+
+            for record in batch:
+                if record is self._sentinel:
+                    got_sentinel = True
+                else:
+                    self.handle(record)
+
+                self.queue.task_done()
+
+            if got_sentinel:
+                break
+
+
+def setup_queue_logging(
+    maxsize: int = 10_000,
+    drop_policy: DropPolicy = DropPolicy.drop_newest,
+    batch_size: int = 100,
+    preformat: bool = False,
+    logger_name: str = __name__,
+) -> tuple[logging.Logger, QueueListener]:
     """Move log handlers to a separate thread.
 
     Replace handlers on the root logger with a LocalQueueHandler,
-    and start a logging.QueueListener holding the original
+    and start a BatchingQueueListener holding the original
     handlers.
+
+    The queue holds at most `maxsize` records (`0` for unbounded),
+    records over that limit are dropped according to `drop_policy`.
     """
-    queue: SimpleQueue = SimpleQueue()
-    queue_logger = logging.getLogger(__name__)
+    queue: Queue = Queue(maxsize=maxsize)
+    queue_logger = logging.getLogger(logger_name)
 
     handlers: list[logging.Handler] = []
     # Last resort handler if no logging is configured
     if logging.lastResort is not None:
         handlers.append(logging.lastResort)
 
-    local_queue_handler = LocalQueueHandler(queue)
+    local_queue_handler = LocalQueueHandler(queue, drop_policy=drop_policy, preformat=preformat)
     queue_logger.addHandler(local_queue_handler)
 
     for handler in queue_logger.handlers:
@@ -37,10 +179,18 @@ def setup_queue_logging() -> tuple[logging.Logger, QueueListener]:
             queue_logger.removeHandler(handler)
             handlers.append(handler)
 
-    listener = QueueListener(queue, *handlers, respect_handler_level=True)
+    listener = BatchingQueueListener(queue, *handlers, respect_handler_level=True, batch_size=batch_size)
     listener.start()
 
     return queue_logger, listener
 
 
+def get_queue_logging_stats(queue_logger: logging.Logger) -> LogQueueStats:
+    for handler in queue_logger.handlers:
+        if isinstance(handler, LocalQueueHandler):
+            return handler.stats
+
+    raise ValueError(f'{queue_logger=} is not set up for queue logging')
+
+
 async_logger, queue_listener = setup_queue_logging()
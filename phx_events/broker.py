@@ -0,0 +1,205 @@
+import asyncio
+from asyncio import AbstractServer, IncompleteReadError, StreamReader, StreamWriter
+from dataclasses import dataclass, field
+from itertools import count
+import os
+import struct
+from typing import AsyncIterator, Iterator, Optional, TYPE_CHECKING, Union
+
+from phx_events import json_handler
+from phx_events.phx_messages import ChannelMessage, PHXEvent, PHXEventMessage, Topic
+from phx_events.utils import make_message
+
+
+if TYPE_CHECKING:
+    from phx_events.client import PHXChannelsClient
+
+
+# Every frame on the Unix socket is prefixed with its length
+_FRAME_HEADER = struct.Struct('>I')
+# Admin events that are still passed on, other upstream replies belong to the broker's own joins and pushes
+_FORWARDED_ADMIN_EVENTS = frozenset((PHXEvent.close, PHXEvent.error))
+
+
+async def _read_frame(reader: StreamReader) -> bytes:
+    (frame_length,) = _FRAME_HEADER.unpack(await reader.readexactly(_FRAME_HEADER.size))
+    return await reader.readexactly(frame_length)
+
+
+def _encode_frame(frame: Union[str, bytes]) -> bytes:
+    frame_bytes = frame.encode() if isinstance(frame, str) else frame
+    return _FRAME_HEADER.pack(len(frame_bytes)) + frame_bytes
+
+
+@dataclass()
+class BrokerSubscriber:
+    """
+    Args:
+        topics (set[Topic]): Topics the subscriber joined, only frames for these topics are sent to it
+        dropped (int): Number of frames dropped because the subscriber wasn't reading fast enough
+    """
+    writer: StreamWriter
+    topics: set[Topic] = field(default_factory=set)
+    dropped: int = 0
+
+
+class LocalBroker:
+    """Shares a client's upstream connection with subscriber clients in other processes on the same host
+
+    The client holding the upstream connection re-publishes the raw frames it receives to the subscribers over a Unix
+    domain socket, without parsing them again. Subscribers are `PHXChannelsClient`s created with
+    `local_broker_path`, so they register handlers and topics as usual - their topic joins are answered by the broker
+    for any topic the upstream client is subscribed to, and their pushes are sent upstream. Pushes are sent with a ref
+    unique to the broker so the upstream reply is only passed back, with the original ref, to the subscriber that sent
+    the push.
+
+    A subscriber that falls `max_buffer_bytes` behind has frames dropped (counted in `BrokerSubscriber.dropped`)
+    rather than slowing down the upstream client.
+    """
+    path: str
+    max_buffer_bytes: int
+    subscribers: list[BrokerSubscriber]
+
+    _client: Optional['PHXChannelsClient']
+    _server: Optional[AbstractServer]
+    _push_refs: Iterator[int]
+    _pending_replies: dict[str, tuple[BrokerSubscriber, Optional[str]]]
+
+    def __init__(self, path: str, max_buffer_bytes: int = 2**22):
+        self.path = path
+        self.max_buffer_bytes = max_buffer_bytes
+        self.subscribers = []
+
+        self._client = None
+        self._server = None
+        self._push_refs = count()
+        # The subscriber and its original ref for each push sent upstream, keyed by the broker's ref for the push
+        self._pending_replies = {}
+
+    def _reply(self, subscriber: BrokerSubscriber, message: ChannelMessage, status: str, reason: str = '') -> None:
+        response = {'reason': reason} if reason else {}
+        reply = make_message(PHXEvent.reply, message.topic, message.ref, {'status': status, 'response': response})
+        subscriber.writer.write(_encode_frame(json_handler.dumps(reply)))
+
+    async def _handle_subscriber_message(self, subscriber: BrokerSubscriber, message: ChannelMessage) -> None:
+        if message.event == PHXEvent.join:
+            if self._client is None or message.topic not in self._client.registered_topics():
+                self._reply(subscriber, message, 'error', reason='topic not subscribed upstream')
+                return
+
+            subscriber.topics.add(message.topic)
+            self._reply(subscriber, message, 'ok')
+        elif message.event == PHXEvent.leave:
+            subscriber.topics.discard(message.topic)
+            self._reply(subscriber, message, 'ok')
+        elif self._client is not None:
+            if message.ref is not None:
+                # Subscribers pick refs independently so they're replaced by one that can't clash upstream
+                push_ref = f'broker:{next(self._push_refs)}'
+                self._pending_replies[push_ref] = (subscriber, message.ref)
+                message = make_message(message.event, message.topic, push_ref, message.payload)
+
+            await self._client.outbound_queue.put(message)
+
+    def _forward_reply(self, message: ChannelMessage) -> None:
+        if message.ref is None or (pending_reply := self._pending_replies.pop(message.ref, None)) is None:
+            return
+
+        subscriber, subscriber_ref = pending_reply
+        reply = make_message(message.event, message.topic, subscriber_ref, message.payload)
+        subscriber.writer.write(_encode_frame(json_handler.dumps(reply)))
+
+    async def _serve_subscriber(self, reader: StreamReader, writer: StreamWriter) -> None:
+        subscriber = BrokerSubscriber(writer)
+        self.subscribers.append(subscriber)
+
+        try:
+            while True:
+                subscriber_message = make_message(**json_handler.loads(await _read_frame(reader)))
+                await self._handle_subscriber_message(subscriber, subscriber_message)
+        except IncompleteReadError:
+            pass
+        finally:
+            self.subscribers.remove(subscriber)
+            self._pending_replies = {
+                push_ref: pending_reply
+                for push_ref, pending_reply in self._pending_replies.items()
+                if pending_reply[0] is not subscriber
+            }
+            writer.close()
+
+    def publish(self, message: ChannelMessage, frame: Union[str, bytes]) -> None:
+        if isinstance(message, PHXEventMessage) and message.event not in _FORWARDED_ADMIN_EVENTS:
+            if message.event == PHXEvent.reply:
+                self._forward_reply(message)
+            return
+
+        encoded_frame = None
+        for subscriber in self.subscribers:
+            if message.topic not in subscriber.topics:
+                continue
+
+            if subscriber.writer.transport.get_write_buffer_size() > self.max_buffer_bytes:
+                subscriber.dropped += 1
+                continue
+
+            encoded_frame = encoded_frame or _encode_frame(frame)
+            subscriber.writer.write(encoded_frame)
+
+    async def start(self, phx_client: 'PHXChannelsClient') -> None:
+        self._client = phx_client
+
+        # Remove the socket left behind by a previous run
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self._server = await asyncio.start_unix_server(self._serve_subscriber, self.path)
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+        for subscriber in self.subscribers:
+            subscriber.writer.close()
+
+
+class LocalBrokerConnection:
+    """A subscriber's connection to a `LocalBroker`, used by the client in place of a websocket connection"""
+    path: str
+
+    _reader: Optional[StreamReader]
+    _writer: Optional[StreamWriter]
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self._reader = None
+        self._writer = None
+
+    async def __aenter__(self) -> 'LocalBrokerConnection':
+        self._reader, self._writer = await asyncio.open_unix_connection(self.path)
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.close()
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        if self._reader is None:
+            return
+
+        try:
+            while True:
+                yield await _read_frame(self._reader)
+        except IncompleteReadError:
+            return
+
+    async def send(self, frame: Union[str, bytes]) -> None:
+        if self._writer is not None:
+            self._writer.write(_encode_frame(frame))
+            await self._writer.drain()
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
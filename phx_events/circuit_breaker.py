@@ -0,0 +1,98 @@
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+import time
+from typing import Optional
+
+
+class CircuitState(str, Enum):
+    closed = 'closed'
+    open = 'open'
+    half_open = 'half_open'
+
+
+@dataclass(frozen=True)
+class CircuitBreakerConfig:
+    """
+    Args:
+        failure_threshold (int): Number of failures within `failure_window` that opens the circuit
+        failure_window (float): Seconds a failure counts towards opening the circuit
+        reset_timeout (float): Seconds the circuit stays open before trial messages are let through
+        half_open_trials (int): Number of trial messages run at the same time while the circuit is half open
+    """
+    failure_threshold: int = 5
+    failure_window: float = 60.0
+    reset_timeout: float = 30.0
+    half_open_trials: int = 1
+
+
+class CircuitBreaker:
+    """Stops running a handler that keeps failing, e.g. because the service it depends on is down
+
+    While the circuit is open messages skip the handler. After `reset_timeout` the circuit is half open and a few
+    trial messages are run - the circuit closes if a trial succeeds and opens again if one fails.
+    """
+    config: CircuitBreakerConfig
+    state: CircuitState
+
+    _failure_times: deque[float]
+    _opened_at: float
+    _trials_running: int
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+        self.config = config or CircuitBreakerConfig()
+        self.state = CircuitState.closed
+
+        self._failure_times = deque()
+        self._opened_at = 0.0
+        self._trials_running = 0
+
+    def _open(self) -> None:
+        self.state = CircuitState.open
+        self._opened_at = time.monotonic()
+        self._trials_running = 0
+        self._failure_times.clear()
+
+    def allow(self) -> bool:
+        """Whether the handler should run, trial runs must be followed by a call to a `record_` method"""
+        if self.state is CircuitState.closed:
+            return True
+
+        if self.state is CircuitState.open:
+            if time.monotonic() - self._opened_at < self.config.reset_timeout:
+                return False
+            self.state = CircuitState.half_open
+
+        if self._trials_running >= self.config.half_open_trials:
+            return False
+
+        self._trials_running += 1
+        return True
+
+    def record_success(self) -> None:
+        if self.state is CircuitState.half_open:
+            self.state = CircuitState.closed
+            self._trials_running = 0
+            self._failure_times.clear()
+
+    def record_failure(self) -> bool:
+        """Records a failed run of the handler and returns True if that opened the circuit"""
+        if self.state is CircuitState.half_open:
+            self._open()
+            return True
+
+        now = time.monotonic()
+        self._failure_times.append(now)
+        while self._failure_times[0] <= now - self.config.failure_window:
+            self._failure_times.popleft()
+
+        if self.state is CircuitState.closed and len(self._failure_times) >= self.config.failure_threshold:
+            self._open()
+            return True
+
+        return False
+
+    def record_cancelled(self) -> None:
+        """Frees the trial slot of a run that was cancelled before it finished"""
+        if self.state is CircuitState.half_open and self._trials_running:
+            self._trials_running -= 1
@@ -0,0 +1,203 @@
+"""Run a `PHXChannelsClient` from the command line with `python -m phx_events`"""
+import argparse
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+import importlib
+import multiprocessing
+import os
+from pathlib import Path
+import signal
+from typing import Any, Callable, Optional, Sequence
+import zlib
+
+from phx_events import json_handler
+from phx_events.async_logger import async_logger
+from phx_events.client import PHXChannelsClient
+from phx_events.handler_loops import HandlerLoopPool
+from phx_events.hot_reload import reload_handlers
+from phx_events.metrics import start_metrics_server
+from phx_events.phx_messages import Topic
+from phx_events.topic_executor import TopicAffinityExecutor
+
+
+# Registers the event handlers and topic subscriptions on the client
+RegistrationFunction = Callable[[PHXChannelsClient], None]
+
+EXECUTOR_TYPES: dict[str, Callable[[Optional[int]], Executor]] = {
+    'thread': lambda workers: ThreadPoolExecutor(max_workers=workers),
+    'topic': lambda workers: TopicAffinityExecutor(max_workers=workers),
+}
+
+logger = async_logger.getChild(__name__)
+
+
+@dataclass(frozen=True)
+class RunnerConfig:
+    """
+    Args:
+        url (str): The Phoenix Channels websocket URL
+        handlers (str): `module:function` path of the function that registers the handlers and topics on the client,
+                        the function defaults to `register` if only the module is given
+        token (Optional[str]): Auth token added to the URL
+        executor (str): Type of executor used for sync handlers, one of `EXECUTOR_TYPES`
+        workers (Optional[int]): Number of executor workers, the executor's default if not set
+        handler_loops (int): Number of event loop threads coroutine handlers run on, 0 runs them on the client's loop
+        connections (int): Number of websocket connections, each in its own process with a share of the topics
+        event_queue_size (int): Maximum number of messages waiting per event, 0 for unbounded
+        event_concurrency (int): Number of messages of each event handled at once, above 1 they may finish out of
+                                 order
+        drain_timeout (Optional[float]): Seconds to finish queued messages for on SIGTERM before shutting down
+        metrics_port (Optional[int]): Port the Prometheus metrics are served on, each connection uses the next port
+    """
+    url: str
+    handlers: str
+    token: Optional[str] = None
+    executor: str = 'thread'
+    workers: Optional[int] = None
+    handler_loops: int = 0
+    connections: int = 1
+    event_queue_size: int = 0
+    event_concurrency: int = 1
+    drain_timeout: Optional[float] = None
+    metrics_port: Optional[int] = None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m phx_events', description='Run Phoenix Channels event handlers')
+    # Options default to None so only options that are passed override the config file
+    parser.add_argument('--config', type=Path, help='JSON file with any of the options below, using _ in the names')
+    parser.add_argument('--url', help='Phoenix Channels websocket URL')
+    parser.add_argument('--handlers', help='module:function that registers the handlers and topics on the client')
+    parser.add_argument('--token', help='auth token, defaults to the PHX_EVENTS_TOKEN environment variable')
+    parser.add_argument('--executor', choices=sorted(EXECUTOR_TYPES), help='executor for sync handlers')
+    parser.add_argument('--workers', type=int, help='number of executor workers')
+    parser.add_argument('--handler-loops', type=int, help='number of event loop threads for coroutine handlers')
+    parser.add_argument('--connections', type=int, help='number of connections, each run in its own process')
+    parser.add_argument('--event-queue-size', type=int, help='maximum messages waiting per event, 0 for unbounded')
+    parser.add_argument('--event-concurrency', type=int, help='number of messages of each event handled at once')
+    parser.add_argument('--drain-timeout', type=float, help='seconds to finish queued messages for on SIGTERM')
+    parser.add_argument('--metrics-port', type=int, help='port to serve Prometheus metrics on')
+    return parser
+
+
+def load_config(argv: Optional[Sequence[str]] = None) -> RunnerConfig:
+    parser = build_parser()
+    args = vars(parser.parse_args(argv))
+
+    options: dict[str, Any] = {'token': os.environ.get('PHX_EVENTS_TOKEN')}
+    if (config_path := args.pop('config')) is not None:
+        # Floats rather than Decimals since the options are used as numbers, e.g. the drain timeout
+        options.update(json_handler.loads(config_path.read_bytes(), floats_to_decimal=False))
+
+    options.update({name: value for name, value in args.items() if value is not None})
+
+    config_fields = {config_field.name for config_field in fields(RunnerConfig)}
+    if unknown_options := options.keys() - config_fields:
+        parser.error(f'Unknown options in config file - {sorted(unknown_options)}')
+    if missing_options := {'url', 'handlers'} - options.keys():
+        parser.error(f'Missing required options - {sorted(missing_options)}')
+    if options.get('executor', 'thread') not in EXECUTOR_TYPES:
+        parser.error(f'Unknown executor {options["executor"]}')
+
+    return RunnerConfig(**options)
+
+
+def load_registration_function(handlers_path: str) -> RegistrationFunction:
+    module_name, _, function_name = handlers_path.partition(':')
+    handlers_module = importlib.import_module(module_name)
+    registration_function: RegistrationFunction = getattr(handlers_module, function_name or 'register')
+    return registration_function
+
+
+def topic_shard(topic: Topic, shard_count: int) -> int:
+    # crc32 rather than hash() so every process puts a topic in the same shard
+    return zlib.crc32(topic.encode()) % shard_count
+
+
+def reload_client_handlers(client: PHXChannelsClient, handlers_path: str) -> None:
+    try:
+        reload_handlers(client, handlers_path)
+    except Exception as exception:
+        # Keep running on the old handlers if the new code is broken
+        logger.exception(f'Failed to reload handlers from {handlers_path} - {exception=}')
+
+
+async def run_connection(config: RunnerConfig, shard: int = 0) -> None:
+    handler_loops = HandlerLoopPool(config.handler_loops) if config.handler_loops else None
+
+    async with PHXChannelsClient(
+        config.url,
+        channel_auth_token=config.token,
+        handler_loops=handler_loops,
+        event_queue_size=config.event_queue_size,
+        event_concurrency=config.event_concurrency,
+    ) as phx_client:
+        load_registration_function(config.handlers)(phx_client)
+
+        # Each connection only subscribes to its share of the registered topics
+        for topic in phx_client.registered_topics():
+            if topic_shard(topic, config.connections) != shard:
+                phx_client.unregister_topic_subscription(topic)
+
+        # SIGHUP swaps in the handlers from the reloaded module without reconnecting
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGHUP,
+            reload_client_handlers,
+            phx_client,
+            config.handlers,
+        )
+
+        metrics_server = None
+        if config.metrics_port is not None:
+            metrics_server = await start_metrics_server(phx_client, config.metrics_port + shard)
+
+        try:
+            await phx_client.start_processing(
+                EXECUTOR_TYPES[config.executor](config.workers),
+                drain_timeout=config.drain_timeout,
+            )
+        finally:
+            if metrics_server is not None:
+                metrics_server.close()
+
+
+def run_worker(config: RunnerConfig, shard: int = 0) -> None:
+    asyncio.run(run_connection(config, shard))
+
+
+def run_workers(config: RunnerConfig) -> int:
+    # Spawn rather than fork so each worker starts without the parent's event loop and logging threads
+    context = multiprocessing.get_context('spawn')
+    workers = [
+        context.Process(target=run_worker, args=(config, shard), name=f'phx_events_worker_{shard}')
+        for shard in range(config.connections)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def signal_workers(signal_number: int, frame: Any) -> None:
+        logger.info(f'Sending {signal.Signals(signal_number).name} to the workers')
+        for worker in workers:
+            if worker.pid is not None:
+                os.kill(worker.pid, signal_number)
+
+    signal.signal(signal.SIGTERM, signal_workers)
+    signal.signal(signal.SIGINT, signal_workers)
+    signal.signal(signal.SIGHUP, signal_workers)
+
+    for worker in workers:
+        worker.join()
+
+    # The first failure, including workers killed by a signal which have a negative exit code
+    return next((worker.exitcode for worker in workers if worker.exitcode), 0)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    config = load_config(argv)
+
+    if config.connections > 1:
+        return run_workers(config)
+
+    run_worker(config)
+    return 0
@@ -5,15 +5,31 @@ from functools import partial
 import inspect
 from logging import Logger
 import signal
+import time
 from types import TracebackType
-from typing import Awaitable, cast, Optional, Type, Union
+from typing import Any, AsyncContextManager, Awaitable, Callable, cast, Optional, Type, Union
 from urllib.parse import urlencode
 
 from websockets import client
 
 from phx_events import json_handler
 from phx_events.async_logger import async_logger
-from phx_events.exceptions import PHXTopicTooManyRegistrationsError, TopicClosedError
+from phx_events.broker import LocalBroker, LocalBrokerConnection
+from phx_events.circuit_breaker import CircuitBreaker, CircuitBreakerConfig
+from phx_events.conflation import ConflatingQueue
+from phx_events.exceptions import (
+    PayloadValidationError,
+    PHXClientError,
+    PHXTopicTooManyRegistrationsError,
+    TopicClosedError,
+)
+from phx_events.expiry import ExpiredMessageHandler, MessageExpiry
+from phx_events.handler_isolation import handler_name, HandlerLane, HandlerStats
+from phx_events.handler_loops import HandlerLoopPool
+from phx_events.inbox import DurableInbox
+from phx_events.loop_monitor import LoopLagMonitor
+from phx_events.message_stream import MessageStream, OverflowPolicy
+from phx_events.outbound import OutboundQueue
 from phx_events.phx_messages import (
     ChannelEvent,
     ChannelHandlerFunction,
@@ -23,9 +39,18 @@ from phx_events.phx_messages import (
     ExecutorHandler,
     PHXEvent,
     Topic,
+    UndeliveredMessageHandler,
 )
+from phx_events.presence import Presence
+from phx_events.schema import compile_decoder
+from phx_events.shared_ring import SharedRingPublisher
+from phx_events.state_store import KeyFunction
+from phx_events.streaming import defer_payload_items, PayloadPath
+from phx_events.topic_executor import TopicAffinityExecutor
 from phx_events.topic_subscription import SubscriptionStatus, TopicRegistration, TopicSubscribeResult
-from phx_events.utils import make_message
+from phx_events.tracing import MessageTrace, Tracer
+from phx_events.transport import TransportConfig
+from phx_events.utils import generate_reference, make_message
 
 
 class PHXChannelsClient:
@@ -38,11 +63,32 @@ class PHXChannelsClient:
 
     Event handler functions can be `async` or normal functions.
     * Async functions are run in the event loop `PHXChannelsClient._loop`
-    * Normal functions are run using the provided executor pool (`ThreadPoolExecutor` by default)
+    * Normal functions are run using the provided executor pool (`ThreadPoolExecutor` by default). With a
+      `TopicAffinityExecutor` each topic's handlers run in order on the same thread
+
+    Handlers registered with a `timeout` that time out `slow_handler_threshold` times in a row are isolated into their
+    own `HandlerLane` so they stop holding up the other handlers for the event.
 
     """
     channel_socket_url: str
     logger: Logger
+    transport_config: TransportConfig
+    handler_stats: dict[ChannelHandlerFunction, HandlerStats]
+    slow_handler_threshold: Optional[int]
+    isolated_handler_queue_size: int
+    event_queue_size: int
+    event_concurrency: int
+    parse_offload_size: Optional[int]
+    inbox: Optional[DurableInbox]
+    presence: Optional[Presence]
+    outbound_queue: OutboundQueue
+    tracer: Optional[Tracer]
+    loop_monitor: Optional[LoopLagMonitor]
+    handler_loops: Optional[HandlerLoopPool]
+    circuit_breaker_config: Optional[CircuitBreakerConfig]
+    local_broker: Optional[LocalBroker]
+    local_broker_path: Optional[str]
+    shared_rings: Optional[SharedRingPublisher]
 
     _client_start_event: Event
     _event_handler_config: dict[ChannelEvent, EventHandlerConfig]
@@ -51,25 +97,86 @@ class PHXChannelsClient:
     _executor_pool: Optional[Executor]
     _registration_queue: Queue
     _topic_registration_task: Optional[Task]
+    _handler_lanes: dict[ChannelHandlerFunction, HandlerLane]
+    _circuit_breakers: dict[ChannelHandlerFunction, CircuitBreaker]
+    _drain_task: Optional[Task]
+    _inbox_sync_task: Optional[Task]
+    _streams: dict[ChannelEvent, list[MessageStream]]
 
     def __init__(
         self,
         channel_socket_url: str,
         channel_auth_token: Optional[str] = None,
         event_loop: Optional[AbstractEventLoop] = None,
+        transport_config: Optional[TransportConfig] = None,
+        slow_handler_threshold: Optional[int] = 3,
+        isolated_handler_queue_size: int = 1000,
+        inbox: Optional[DurableInbox] = None,
+        presence: Optional[Presence] = None,
+        outbound_queue: Optional[OutboundQueue] = None,
+        tracer: Optional[Tracer] = None,
+        loop_monitor: Optional[LoopLagMonitor] = None,
+        handler_loops: Optional[HandlerLoopPool] = None,
+        circuit_breaker_config: Optional[CircuitBreakerConfig] = None,
+        event_queue_size: int = 0,
+        event_concurrency: int = 1,
+        parse_offload_size: Optional[int] = None,
+        local_broker: Optional[LocalBroker] = None,
+        local_broker_path: Optional[str] = None,
+        shared_rings: Optional[SharedRingPublisher] = None,
     ):
         self.logger = async_logger.getChild(__name__)
         self.channel_socket_url = channel_socket_url
         # Set up auth if it's required
         if channel_auth_token is not None:
             self.channel_socket_url += f'?{urlencode({"token": channel_auth_token})}'
+        # Use the websockets library defaults unless the user wants to tune the connection
+        self.transport_config = transport_config or TransportConfig()
+        # Re-publish received frames to subscriber clients on this host
+        self.local_broker = local_broker
+        # Receive frames from another client's LocalBroker instead of connecting to channel_socket_url
+        self.local_broker_path = local_broker_path
+        # Copy received frames into shared memory for consumer processes
+        self.shared_rings = shared_rings
 
         self._event_handler_config = {}
+        # Reading from the websocket waits while an event queue is full - 0 leaves the queues unbounded
+        self.event_queue_size = event_queue_size
+        # Number of messages of each event handled at once
+        self.event_concurrency = event_concurrency
+        # Frames of at least this many bytes are parsed in the loop's default executor so they don't block the loop
+        self.parse_offload_size = parse_offload_size
         self._topic_registration_status = {}
         # Create the Event that will prevent handlers from being run before the client is started
         self._client_start_event = Event()
         self._registration_queue = Queue()
         self._topic_registration_task = None
+        self._drain_task = None
+
+        # Optional write-ahead log so queued messages survive restarts
+        self.inbox = inbox
+        self._inbox_sync_task = None
+
+        self._streams = {}
+        # Presence state is updated in the read loop so diffs are applied in the order they're received
+        self.presence = presence
+        # Messages pushed with PHXChannelsClient.push are sent by the outbound queue once connected
+        self.outbound_queue = outbound_queue or OutboundQueue()
+        # Opt-in per-message tracing of the time spent in each processing stage
+        self.tracer = tracer
+        # Skips optional handlers while the event loop is lagging
+        self.loop_monitor = loop_monitor
+        # Run coroutine handlers on separate event loop threads instead of the loop reading the websocket
+        self.handler_loops = handler_loops
+
+        # Handlers that keep timing out get moved to their own lane - None disables isolation
+        self.slow_handler_threshold = slow_handler_threshold
+        self.isolated_handler_queue_size = isolated_handler_queue_size
+        self.handler_stats = {}
+        self._handler_lanes = {}
+        # Handlers that keep failing are skipped for a while - None disables the circuit breakers
+        self.circuit_breaker_config = circuit_breaker_config
+        self._circuit_breakers = {}
 
         self._executor_pool = None
         # Get the default event loop or use the user-provided one if it exists
@@ -97,11 +204,180 @@ class PHXChannelsClient:
 
     def _parse_message(self, socket_message: Union[str, bytes]) -> ChannelMessage:
         self.logger.debug(f'Got message - {socket_message=}')
-        message_dict = json_handler.loads(socket_message)
+        message_dict = json_handler.loads(socket_message, floats_to_decimal=False)
+
+        # Large values of streamed events are only converted as the handlers use them
+        event_handler_config = self._event_handler_config.get(message_dict.get('event'))
+        if event_handler_config is not None and event_handler_config.stream_path is not None:
+            message_dict['payload'] = defer_payload_items(message_dict.get('payload'), event_handler_config.stream_path)
+        else:
+            message_dict = json_handler.deep_float_replace(message_dict)
+
+        # Decode the payload once here instead of in every handler
+        if event_handler_config is not None and event_handler_config.payload_decoder is not None:
+            message_dict['decoded_payload'] = event_handler_config.payload_decoder(message_dict.get('payload') or {})
 
         self.logger.debug(f'Decoding message dict - {message_dict=}')
         return make_message(**message_dict)
 
+    async def _parse_socket_message(self, socket_message: Union[str, bytes]) -> ChannelMessage:
+        if self.parse_offload_size is not None and len(socket_message) >= self.parse_offload_size:
+            return await self._loop.run_in_executor(None, self._parse_message, socket_message)
+
+        return self._parse_message(socket_message)
+
+    def _start_handler(
+        self,
+        event_handler: ChannelHandlerFunction,
+        message: ChannelMessage,
+        executor_pool: Optional[Executor],
+        message_trace: Optional[MessageTrace] = None,
+    ) -> Union[Task[None], Awaitable[None]]:
+        if inspect.iscoroutinefunction(event_handler):
+            event_handler = cast(CoroutineHandler, event_handler)
+            if message_trace is not None:
+                coroutine_factory = partial(message_trace.run_coroutine_handler, event_handler, self)
+            else:
+                coroutine_factory = partial(event_handler, message, self)
+
+            if self.handler_loops is not None:
+                handler_future = self.handler_loops.submit(message.topic, coroutine_factory)
+                return asyncio.wrap_future(handler_future, loop=self._loop)
+
+            return self._loop.create_task(coroutine_factory())
+
+        event_handler = cast(ExecutorHandler, event_handler)
+        handler_task: Callable[[], None]
+        if message_trace is not None:
+            handler_task = message_trace.executor_handler(event_handler, self)
+        else:
+            handler_task = partial(event_handler, message, self)
+
+        if isinstance(executor_pool, TopicAffinityExecutor):
+            return asyncio.wrap_future(executor_pool.submit_for_topic(message.topic, handler_task), loop=self._loop)
+
+        return self._loop.run_in_executor(executor_pool, handler_task)
+
+    async def _run_handler_with_timeout(
+        self,
+        event_handler: ChannelHandlerFunction,
+        message: ChannelMessage,
+        timeout: float,
+        executor_pool: Optional[Executor],
+        message_trace: Optional[MessageTrace] = None,
+    ) -> bool:
+        """Returns whether the handler finished within the timeout"""
+        handler_stats = self.handler_stats.setdefault(event_handler, HandlerStats())
+        handler_future = self._start_handler(event_handler, message, executor_pool, message_trace)
+
+        try:
+            # Coroutine handlers are cancelled on timeout.
+            # Executor handlers can't be interrupted so the call is abandoned & keeps its thread until it finishes.
+            await asyncio.wait_for(handler_future, timeout)
+        except asyncio.TimeoutError:
+            handler_stats.timeouts += 1
+            handler_stats.consecutive_timeouts += 1
+            self.logger.warning(f'Handler {handler_name(event_handler)} timed out after {timeout}s - {message=}')
+
+            if self._should_isolate_handler(event_handler, handler_stats):
+                self._isolate_handler(event_handler, timeout)
+
+            return False
+
+        handler_stats.consecutive_timeouts = 0
+        return True
+
+    def _should_isolate_handler(self, event_handler: ChannelHandlerFunction, handler_stats: HandlerStats) -> bool:
+        if self.slow_handler_threshold is None or event_handler in self._handler_lanes:
+            return False
+
+        return handler_stats.consecutive_timeouts >= self.slow_handler_threshold
+
+    def _isolate_handler(self, event_handler: ChannelHandlerFunction, timeout: float) -> HandlerLane:
+        name = handler_name(event_handler)
+        self.logger.warning(f'Isolating handler {name} after repeated timeouts')
+
+        lane_executor: Optional[Executor] = None
+        if not inspect.iscoroutinefunction(event_handler):
+            lane_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'phx_events_lane_{name}')
+
+        handler_stats = self.handler_stats.setdefault(event_handler, HandlerStats())
+        handler_stats.isolated = True
+
+        handler_lane = HandlerLane(
+            handler=event_handler,
+            run_handler=partial(
+                self._run_handler_with_timeout,
+                event_handler,
+                timeout=timeout,
+                executor_pool=lane_executor,
+            ),
+            stats=handler_stats,
+            logger=self.logger,
+            loop=self._loop,
+            maxsize=self.isolated_handler_queue_size,
+            executor_pool=lane_executor,
+            on_handled=self._lane_handled,
+        )
+        self._handler_lanes[event_handler] = handler_lane
+
+        return handler_lane
+
+    def _lane_handled(self, message: ChannelMessage, succeeded: bool) -> None:
+        if self.inbox is not None:
+            self.inbox.done(message, succeeded)
+
+    def _message_conflated(self, message: ChannelMessage) -> None:
+        # A newer message replaced this one, so it's dealt with even though no handler will see it
+        if self.inbox is not None:
+            self.inbox.ack(message)
+
+        event_handler_config = self._event_handler_config.get(message.event)
+        if event_handler_config is not None and event_handler_config.expiry is not None:
+            event_handler_config.expiry.discard(message)
+
+        if self.tracer is not None:
+            self.tracer.discard_trace(message)
+
+    def _circuit_breaker_for(self, event_handler: ChannelHandlerFunction) -> Optional[CircuitBreaker]:
+        if self.circuit_breaker_config is None:
+            return None
+
+        if (circuit_breaker := self._circuit_breakers.get(event_handler)) is None:
+            circuit_breaker = self._circuit_breakers[event_handler] = CircuitBreaker(self.circuit_breaker_config)
+
+        return circuit_breaker
+
+    def _record_handler_failure(self, event_handler: ChannelHandlerFunction, circuit_breaker: CircuitBreaker) -> None:
+        if circuit_breaker.record_failure():
+            self.logger.warning(f'Opening circuit for handler {handler_name(event_handler)} after repeated errors')
+
+    async def _record_handler_outcome(
+        self,
+        event_handler: ChannelHandlerFunction,
+        circuit_breaker: CircuitBreaker,
+        handler_task: Awaitable[Optional[bool]],
+    ) -> Optional[bool]:
+        handler_stats = self.handler_stats.setdefault(event_handler, HandlerStats())
+
+        try:
+            handler_result = await handler_task
+        except asyncio.CancelledError:
+            circuit_breaker.record_cancelled()
+            raise
+        except Exception:
+            self._record_handler_failure(event_handler, circuit_breaker)
+            raise
+        else:
+            # Handlers run with a timeout return False if they timed out, which counts as a failure
+            if handler_result is False:
+                self._record_handler_failure(event_handler, circuit_breaker)
+            else:
+                circuit_breaker.record_success()
+            return handler_result
+        finally:
+            handler_stats.circuit_state = circuit_breaker.state
+
     async def _event_processor(self, event: ChannelEvent) -> None:
         """Coroutine used to create tasks that process the given event
 
@@ -115,39 +391,107 @@ class PHXChannelsClient:
         self.logger.debug(f'{event} Worker - Started!')
         event_handler_config = self._event_handler_config[event]
 
+        # Each worker takes the next message as soon as it's done with one, so with more than one worker the
+        # messages of an event may finish out of order. The extra workers stop when this task is cancelled.
+        worker_tasks = [
+            self._loop.create_task(self._process_event_messages(event, event_handler_config))
+            for _ in range(self.event_concurrency - 1)
+        ]
+        try:
+            await self._process_event_messages(event, event_handler_config)
+        finally:
+            for worker_task in worker_tasks:
+                worker_task.cancel()
+
+    async def _process_event_messages(self, event: ChannelEvent, event_handler_config: EventHandlerConfig) -> None:
         # Keep running until we ask all the tasks to stop
         while True:
             # wait until there's a message on the queue to process
             message = await event_handler_config.queue.get()
+            event_handler_config.current_messages[id(message)] = message
             self.logger.debug(f'{event} Worker - Got {message=}')
+            message_trace = self.tracer.take_trace(message) if self.tracer is not None else None
+
+            # Don't waste handler time on messages that are already too old to be useful
+            if event_handler_config.expiry is not None and event_handler_config.expiry.check(message):
+                self.logger.debug(f'{event} Worker - Dropping expired {message=}')
+                if self.inbox is not None:
+                    self.inbox.ack(message)
+
+                del event_handler_config.current_messages[id(message)]
+                event_handler_config.queue.task_done()
+                continue
 
             # We run all the default handlers as well as the specific topic handlers
             event_handlers: list[ChannelHandlerFunction] = event_handler_config.default_handlers.copy()
             if topic_handlers := event_handler_config.topic_handlers.get(message.topic):
                 event_handlers.extend(topic_handlers)
 
+            shedding_load = self.loop_monitor is not None and self.loop_monitor.shedding
+            # Hold the inbox entry until this loop and every isolated handler are done with the message
+            if self.inbox is not None:
+                self.inbox.hold(message)
+            handlers_succeeded = True
+
             event_tasks = []
-            task: Union[Task[None], Awaitable[None]]
+            task: Awaitable[Optional[bool]]
             # Run all the event handlers in self.thread_pool managed by AsyncIO or as tasks
             for event_handler in event_handlers:
-                if inspect.iscoroutinefunction(event_handler):
-                    event_handler = cast(CoroutineHandler, event_handler)
-                    task = self._loop.create_task(event_handler(message, self))
+                if shedding_load and event_handler in event_handler_config.optional_handlers:
+                    self.handler_stats.setdefault(event_handler, HandlerStats()).shed += 1
+                    continue
+
+                # Isolated handlers run in their own lane so we don't wait on them here
+                if handler_lane := self._handler_lanes.get(event_handler):
+                    if self.inbox is not None:
+                        self.inbox.hold(message)
+
+                    if not handler_lane.submit(message):
+                        self._lane_handled(message, succeeded=False)
+                    continue
+
+                circuit_breaker = self._circuit_breaker_for(event_handler)
+                if circuit_breaker is not None and not circuit_breaker.allow():
+                    handler_stats = self.handler_stats.setdefault(event_handler, HandlerStats())
+                    handler_stats.circuit_state = circuit_breaker.state
+                    handler_stats.short_circuited += 1
+                    handlers_succeeded = False
+                    continue
+
+                if (timeout := event_handler_config.handler_timeouts.get(event_handler)) is not None:
+                    task = self._run_handler_with_timeout(
+                        event_handler,
+                        message,
+                        timeout,
+                        self._executor_pool,
+                        message_trace,
+                    )
                 else:
-                    event_handler = cast(ExecutorHandler, event_handler)
-                    handler_task = partial(event_handler, message, self)
-                    task = self._loop.run_in_executor(self._executor_pool, handler_task)
+                    task = self._start_handler(event_handler, message, self._executor_pool, message_trace)
+
+                if circuit_breaker is not None:
+                    task = self._record_handler_outcome(event_handler, circuit_breaker, task)
 
                 event_tasks.append(task)
 
             # Wait until the handlers finish running & await the results to handle errors
             for handler_future in asyncio.as_completed(event_tasks):
                 try:
-                    await handler_future
+                    # Handlers run with a timeout return False if they timed out
+                    if await handler_future is False:
+                        handlers_succeeded = False
                 except Exception as exception:
+                    handlers_succeeded = False
                     self.logger.exception(f'Error executing handler - {exception=}')
 
+            if message_trace is not None and self.tracer is not None:
+                self.tracer.finish_trace(message_trace)
+
+            if self.inbox is not None:
+                self.inbox.done(message, handlers_succeeded)
+
             # Let the queue know the task is done being processed
+            del event_handler_config.current_messages[id(message)]
             event_handler_config.queue.task_done()
 
     def shutdown(
@@ -168,28 +512,173 @@ class PHXChannelsClient:
         for handler_config in self._event_handler_config.values():
             handler_config.task.cancel()
 
+        for handler_lane in self._handler_lanes.values():
+            handler_lane.close()
+
+        if self._inbox_sync_task is not None:
+            self._inbox_sync_task.cancel()
+
+        if self.inbox is not None:
+            self.inbox.close()
+
+        self.outbound_queue.close()
+
+        if self.loop_monitor is not None:
+            self.loop_monitor.stop()
+
+        if self.handler_loops is not None:
+            self.handler_loops.stop()
+
+        if self.tracer is not None:
+            self.tracer.flush()
+
+        if self.local_broker is not None:
+            self.local_broker.close()
+
+        if self.shared_rings is not None:
+            self.shared_rings.close()
+
+        for event_streams in self._streams.values():
+            for message_stream in event_streams:
+                message_stream.close()
+
         if executor_pool is not None:
             executor_pool.shutdown(wait=wait_for_completion, cancel_futures=not wait_for_completion)
 
+    def _take_undelivered_messages(self) -> list[ChannelMessage]:
+        undelivered_messages: list[ChannelMessage] = []
+        for handler_config in self._event_handler_config.values():
+            undelivered_messages.extend(handler_config.current_messages.values())
+
+            while not handler_config.queue.empty():
+                undelivered_messages.append(handler_config.queue.get_nowait())
+                handler_config.queue.task_done()
+
+        for handler_lane in self._handler_lanes.values():
+            undelivered_messages.extend(handler_lane.take_undelivered())
+
+        # A message handed to a lane may also still be running on its event's other handlers
+        return list({id(message): message for message in undelivered_messages}.values())
+
+    async def drain(
+        self,
+        reason: str,
+        timeout: float,
+        websocket: Optional[client.WebSocketClientProtocol] = None,
+        executor_pool: Optional[Executor] = None,
+        undelivered_handler: Optional[UndeliveredMessageHandler] = None,
+    ) -> list[ChannelMessage]:
+        """Stop reading from the websocket and give the handlers up to `timeout` seconds to empty the event queues
+
+        Once the event queues and isolated handler queues are empty, or the timeout is reached, the client is shut
+        down.
+
+        Args:
+            reason (str): Why the client is being shut down
+            timeout (float): Maximum number of seconds to wait for the event queues to empty
+            websocket (Optional[WebSocketClientProtocol]): The connection to close so no new messages are read
+            executor_pool (Optional[Executor]): The executor pool to shut down once draining has finished
+            undelivered_handler (Optional[UndeliveredMessageHandler]): Called with any messages that were still queued
+                                                                       or being handled when the timeout was
+                                                                       reached, including isolated handlers' ones.
+                                                                       They are logged if this isn't set.
+
+        Returns:
+            list[ChannelMessage]: The messages that were not processed before the timeout
+        """
+        self.logger.info(f'Draining event queues before shutdown! {reason=} {timeout=}')
+        drain_deadline = self._loop.time() + timeout
+
+        try:
+            if websocket is not None:
+                await asyncio.wait_for(websocket.close(), timeout)
+
+            queues_emptied = asyncio.gather(
+                *(config.queue.join() for config in self._event_handler_config.values()),
+                *(handler_lane.join() for handler_lane in self._handler_lanes.values()),
+            )
+            await asyncio.wait_for(queues_emptied, max(drain_deadline - self._loop.time(), 0))
+        except asyncio.TimeoutError:
+            self.logger.warning(f'Draining event queues timed out after {timeout}s')
+
+        undelivered_messages = self._take_undelivered_messages()
+        self.shutdown(reason, executor_pool=executor_pool, wait_for_completion=False)
+
+        if undelivered_messages:
+            if undelivered_handler is not None:
+                undelivered_handler(undelivered_messages)
+            else:
+                self.logger.error(f'Shut down with {len(undelivered_messages)} unprocessed messages')
+
+        return undelivered_messages
+
+    def _start_drain(
+        self,
+        reason: str,
+        timeout: float,
+        websocket: Optional[client.WebSocketClientProtocol] = None,
+        executor_pool: Optional[Executor] = None,
+        undelivered_handler: Optional[UndeliveredMessageHandler] = None,
+    ) -> None:
+        # Ignore repeated signals while a drain is already in progress
+        if self._drain_task is not None:
+            return
+
+        drain_coroutine = self.drain(reason, timeout, websocket, executor_pool, undelivered_handler)
+        self._drain_task = self._loop.create_task(drain_coroutine)
+
     def register_event_handler(
         self,
         event: ChannelEvent,
         handlers: list[ChannelHandlerFunction],
         topic: Optional[Topic] = None,
+        timeout: Optional[float] = None,
+        optional: bool = False,
+        conflation_key: Optional[KeyFunction] = None,
+        max_age: Optional[float] = None,
+        timestamp_field: Optional[str] = None,
+        on_expired: Optional[ExpiredMessageHandler] = None,
+        stream_path: Optional[PayloadPath] = None,
+        payload_schema: Optional[type] = None,
     ) -> None:
+        # Checked before anything is registered so a rejected call leaves the event as it was
+        existing_config = self._event_handler_config.get(event)
+        streamed = stream_path is not None or (existing_config is not None and existing_config.stream_path is not None)
+        decoded = payload_schema is not None or (
+            existing_config is not None and existing_config.payload_decoder is not None
+        )
+        if streamed and decoded:
+            raise PHXClientError(f'{event=} can have a stream_path or a payload_schema, not both')
+
+        payload_decoder = compile_decoder(payload_schema) if payload_schema is not None else None
+
         if event not in self._event_handler_config:
             # Create the coroutine that will become a task
             event_coroutine = self._event_processor(event)
 
+            # Keep only the latest pending message per key if the event is conflated
+            event_queue: Queue
+            if conflation_key is not None:
+                event_queue = ConflatingQueue(
+                    conflation_key,
+                    maxsize=self.event_queue_size,
+                    on_conflated=self._message_conflated,
+                )
+            else:
+                event_queue = Queue(maxsize=self.event_queue_size)
+
             # Create the default EventHandlerConfig
             self._event_handler_config[event] = EventHandlerConfig(
-                queue=Queue(),
+                queue=event_queue,
                 default_handlers=[],
                 topic_handlers={},
                 task=self._loop.create_task(event_coroutine),
             )
 
         handler_config = self._event_handler_config[event]
+        if conflation_key is not None and not isinstance(handler_config.queue, ConflatingQueue):
+            raise PHXClientError(f'{event=} must be conflated when its first handlers are registered')
+
         # If there is a topic to be registered for - add the handlers to the topic handler
         if topic is not None:
             handler_config.topic_handlers.setdefault(topic, []).extend(handlers)
@@ -197,6 +686,166 @@ class PHXChannelsClient:
             # otherwise, add them to the default handlers
             handler_config.default_handlers.extend(handlers)
 
+        if timeout is not None:
+            handler_config.handler_timeouts.update(dict.fromkeys(handlers, timeout))
+
+        # Optional handlers are skipped while the loop monitor is shedding load
+        if optional:
+            handler_config.optional_handlers.update(handlers)
+
+        if max_age is not None:
+            self._set_message_expiry(handler_config, max_age, topic, timestamp_field, on_expired)
+
+        if stream_path is not None:
+            handler_config.stream_path = stream_path
+
+        if payload_decoder is not None:
+            handler_config.payload_decoder = payload_decoder
+
+    def replace_event_handlers(
+        self,
+        event: ChannelEvent,
+        handlers: list[ChannelHandlerFunction],
+        topic: Optional[Topic] = None,
+        timeout: Optional[float] = None,
+        optional: bool = False,
+    ) -> None:
+        """Swap the handlers for an event, or for one of its topics, while the client is running
+
+        Messages that are already being handled finish on the old handlers and every message taken off the event's
+        queue after the swap uses the new handlers. Nothing is queued or dispatched in between, so the swap is atomic.
+        """
+        if event not in self._event_handler_config:
+            self.register_event_handler(event, handlers, topic=topic, timeout=timeout, optional=optional)
+            return
+
+        handler_config = self._event_handler_config[event]
+        if topic is not None:
+            old_handlers = handler_config.topic_handlers.get(topic, [])
+            handler_config.topic_handlers[topic] = list(handlers)
+        else:
+            old_handlers = handler_config.default_handlers
+            handler_config.default_handlers = list(handlers)
+
+        for event_handler in handlers:
+            if timeout is not None:
+                handler_config.handler_timeouts[event_handler] = timeout
+            else:
+                handler_config.handler_timeouts.pop(event_handler, None)
+
+            if optional:
+                handler_config.optional_handlers.add(event_handler)
+            else:
+                handler_config.optional_handlers.discard(event_handler)
+
+        event_handlers = set(handler_config.default_handlers).union(*handler_config.topic_handlers.values())
+        for removed_handler in set(old_handlers) - event_handlers:
+            handler_config.handler_timeouts.pop(removed_handler, None)
+            handler_config.optional_handlers.discard(removed_handler)
+            self._retire_handler(removed_handler)
+
+    def _retire_handler(self, event_handler: ChannelHandlerFunction) -> None:
+        # Handlers can be registered for more than one event
+        for handler_config in self._event_handler_config.values():
+            if event_handler in handler_config.default_handlers:
+                return
+            if any(event_handler in topic_handlers for topic_handlers in handler_config.topic_handlers.values()):
+                return
+
+        # Dropped so the metrics don't report a reloaded handler twice under the same name
+        self.handler_stats.pop(event_handler, None)
+        self._circuit_breakers.pop(event_handler, None)
+        if (handler_lane := self._handler_lanes.pop(event_handler, None)) is not None:
+            self._loop.create_task(self._close_handler_lane(handler_lane))
+
+    async def _close_handler_lane(self, handler_lane: HandlerLane) -> None:
+        # Let the messages already in the lane finish on the old handler
+        await handler_lane.join()
+        handler_lane.close()
+
+    def registered_topics(self) -> list[Topic]:
+        return list(self._topic_registration_status)
+
+    def event_queue_sizes(self) -> dict[ChannelEvent, int]:
+        """Number of messages waiting in each event's queue"""
+        return {event: handler_config.queue.qsize() for event, handler_config in self._event_handler_config.items()}
+
+    def _set_message_expiry(
+        self,
+        handler_config: EventHandlerConfig,
+        max_age: float,
+        topic: Optional[Topic],
+        timestamp_field: Optional[str],
+        on_expired: Optional[ExpiredMessageHandler],
+    ) -> None:
+        if handler_config.expiry is None:
+            handler_config.expiry = MessageExpiry()
+
+        expiry = handler_config.expiry
+        if topic is not None:
+            expiry.topic_max_ages[topic] = max_age
+        else:
+            expiry.max_age = max_age
+
+        if timestamp_field is not None:
+            expiry.timestamp_field = timestamp_field
+        if on_expired is not None:
+            expiry.on_expired = on_expired
+
+    async def push(
+        self,
+        topic: Topic,
+        event: ChannelEvent,
+        payload: Optional[dict[str, Any]] = None,
+    ) -> ChannelMessage:
+        """Queue a message to be sent to the server by the outbound queue
+
+        Waits if the outbound queue is full. Messages pushed before `start_processing` connects are sent once the
+        connection is open.
+
+        Returns:
+            ChannelMessage: The queued message
+        """
+        message = make_message(event=event, topic=topic, ref=generate_reference(event), payload=payload)
+        await self.outbound_queue.put(message)
+
+        return message
+
+    def stream(
+        self,
+        event: ChannelEvent,
+        topic: Optional[Topic] = None,
+        maxsize: int = 1000,
+        overflow: OverflowPolicy = OverflowPolicy.block,
+    ) -> MessageStream:
+        """Create a `MessageStream` that receives every message for `event`, or only those for `topic` if it is set
+
+        This is an alternative to `register_event_handler` for long-running consumers that want to pull messages in a
+        loop. The stream is closed when the client shuts down, or it can be closed with `MessageStream.close`.
+
+        Args:
+            event (ChannelEvent): The event to receive messages for
+            topic (Optional[Topic]): Only receive messages for this topic
+            maxsize (int): Maximum number of messages buffered for the consumer
+            overflow (OverflowPolicy): What to do with new messages when the buffer is full
+
+        Returns:
+            MessageStream: An async iterator over the messages
+        """
+        message_stream = MessageStream(event, topic=topic, maxsize=maxsize, overflow=overflow)
+        self._streams.setdefault(event, []).append(message_stream)
+
+        return message_stream
+
+    async def _put_stream_messages(self, event_streams: list[MessageStream], phx_message: ChannelMessage) -> None:
+        for message_stream in event_streams:
+            if message_stream.accepts(phx_message):
+                await message_stream.put(phx_message)
+
+        # Stop sending messages to streams that have been closed
+        if any(message_stream.closed for message_stream in event_streams):
+            event_streams[:] = [message_stream for message_stream in event_streams if not message_stream.closed]
+
     async def process_topic_registration_responses(self) -> None:
         while True:
             phx_message = await self._registration_queue.get()
@@ -229,14 +878,36 @@ class PHXChannelsClient:
 
         return status_updated_event
 
+    def unregister_topic_subscription(self, topic: Topic) -> None:
+        """Remove a topic registered with `register_topic_subscription` before its join message is sent"""
+        if (topic_status := self._topic_registration_status.get(topic)) is None:
+            return
+
+        if topic_status.connection_ref is not None:
+            raise PHXClientError(f'Topic {topic} already subscribed with {topic_status.connection_ref=}')
+
+        del self._topic_registration_status[topic]
+
     async def process_websocket_messages(self, websocket: client.WebSocketClientProtocol) -> None:
         self.logger.debug('Starting websocket message loop')
 
         async for socket_message in websocket:
-            phx_message = self._parse_message(socket_message)
+            received_at_ns = time.time_ns()
+            try:
+                phx_message = await self._parse_socket_message(socket_message)
+            except PayloadValidationError as exception:
+                self.logger.error(f'Dropping message with an invalid payload - {exception} - {socket_message=}')
+                continue
+            parsed_at_ns = time.time_ns()
             self.logger.debug(f'Processing message - {phx_message=}')
             event = phx_message.event
 
+            if self.local_broker is not None:
+                self.local_broker.publish(phx_message, socket_message)
+
+            if self.shared_rings is not None:
+                await self.shared_rings.publish(phx_message, socket_message)
+
             if event == PHXEvent.close:
                 self.logger.info(f'Got Phoenix event {event} shutting down - {phx_message=}')
                 raise TopicClosedError(topic=phx_message.topic, reason='Upstream closed')
@@ -252,14 +923,58 @@ class PHXChannelsClient:
                 if event == PHXEvent.reply and not topic_registration_config.status_updated_event.is_set():
                     await self._registration_queue.put(phx_message)
 
+            if self.presence is not None:
+                self.presence.apply_message(phx_message)
+
+            if event_streams := self._streams.get(event):
+                await self._put_stream_messages(event_streams, phx_message)
+
             event_handler_config = self._event_handler_config.get(event)
             if event_handler_config is None:
-                self.logger.debug(f'Ignoring {phx_message=} - no event handlers registered')
+                if not event_streams:
+                    self.logger.debug(f'Ignoring {phx_message=} - no event handlers registered')
                 continue
 
+            if self.inbox is not None:
+                self.inbox.track(phx_message, self.inbox.append(socket_message))
+
+            if event_handler_config.expiry is not None:
+                event_handler_config.expiry.mark_received(phx_message)
+
+            if self.tracer is not None:  # noqa: SIM102
+                if message_trace := self.tracer.start_trace(phx_message, received_at_ns, parsed_at_ns):
+                    self.tracer.mark_queued(message_trace)
+
             self.logger.debug(f'Submitting message to {event=} queue - {phx_message=}')
             await event_handler_config.queue.put(phx_message)
 
+    async def _replay_inbox(self) -> None:
+        if self.inbox is None:
+            return
+
+        unacknowledged_frames = self.inbox.open()
+        self.logger.info(f'Replaying {len(unacknowledged_frames)} unacknowledged messages from the inbox')
+
+        for entry_id, frame in unacknowledged_frames:
+            try:
+                phx_message = self._parse_message(frame)
+            except PayloadValidationError as exception:
+                self.logger.error(f'Acknowledging message with an invalid payload - {exception} - {frame=}')
+                self.inbox.ack_entry(entry_id)
+                continue
+
+            self.inbox.track(phx_message, entry_id)
+
+            event_handler_config = self._event_handler_config.get(phx_message.event)
+            if event_handler_config is None:
+                self.logger.debug(f'Acknowledging {phx_message=} - no event handlers registered')
+                self.inbox.ack(phx_message)
+                continue
+
+            await event_handler_config.queue.put(phx_message)
+
+        self._inbox_sync_task = self._loop.create_task(self.inbox.sync_periodically())
+
     async def _subscribe_to_registered_topics(self, websocket: client.WebSocketClientProtocol) -> None:
         self._topic_registration_task = self._loop.create_task(self.process_topic_registration_responses())
 
@@ -276,29 +991,78 @@ class PHXChannelsClient:
         self.logger.info('Sending all topic subscribe messages!')
         await asyncio.gather(*map(send_websocket_message, registration_messages))
 
-    async def start_processing(self, executor_pool: Optional[Executor] = None) -> None:
+    def _connect(self) -> AsyncContextManager[client.WebSocketClientProtocol]:
+        if self.local_broker_path is not None:
+            # The broker connection has the parts of the websocket interface that the client uses
+            broker_connection = LocalBrokerConnection(self.local_broker_path)
+            return cast(AsyncContextManager[client.WebSocketClientProtocol], broker_connection)
+
+        return client.connect(self.channel_socket_url, **self.transport_config.connect_kwargs())
+
+    async def start_processing(
+        self,
+        executor_pool: Optional[Executor] = None,
+        drain_timeout: Optional[float] = None,
+        undelivered_handler: Optional[UndeliveredMessageHandler] = None,
+    ) -> None:
+        """Connect to the websocket, subscribe to the registered topics and start processing messages
+
+        Args:
+            executor_pool (Optional[Executor]): The executor pool used to run normal function handlers.
+                                                A `ThreadPoolExecutor` is created if this isn't set.
+            drain_timeout (Optional[float]): If set, SIGTERM and SIGINT drain the event queues for up to this many
+                                             seconds before shutting down, instead of shutting down immediately.
+            undelivered_handler (Optional[UndeliveredMessageHandler]): Called with the messages still queued when a
+                                                                       drain times out.
+        """
         if not self._topic_registration_status:
             self.logger.error('No subscribed topics nothing to do here - ending processing!')
             return
 
+        if self.loop_monitor is not None:
+            self.loop_monitor.start(self._loop, self.logger)
+
+        if self.handler_loops is not None:
+            self.handler_loops.start()
+
         self.logger.debug('Creating the executor pool to use for processing registered handlers')
         self._executor_pool = executor_pool or ThreadPoolExecutor()
 
         with self._executor_pool as pool:
             self.logger.debug('Connecting to websocket')
 
-            async with client.connect(self.channel_socket_url) as websocket:
+            async with self._connect() as websocket:
                 # Close the connection when receiving SIGTERM
-                shutdown_handler = partial(
-                    self.shutdown,
-                    websocket=websocket,
-                    executor_pool=pool,
-                    wait_for_completion=False,
-                )
+                if drain_timeout is not None:
+                    shutdown_handler = partial(
+                        self._start_drain,
+                        timeout=drain_timeout,
+                        websocket=websocket,
+                        executor_pool=pool,
+                        undelivered_handler=undelivered_handler,
+                    )
+                else:
+                    shutdown_handler = partial(
+                        self.shutdown,
+                        websocket=websocket,
+                        executor_pool=pool,
+                        wait_for_completion=False,
+                    )
+
                 self._loop.add_signal_handler(signal.SIGTERM, partial(shutdown_handler, reason='SIGTERM'))
                 self._loop.add_signal_handler(signal.SIGINT, partial(shutdown_handler, reason='Keyboard Interrupt'))
 
                 await self._subscribe_to_registered_topics(websocket)
+                self.outbound_queue.start(websocket, self._loop)
+
+                if self.local_broker is not None:
+                    await self.local_broker.start(self)
 
                 self._client_start_event.set()
+                # Queue unacknowledged messages from a previous run ahead of new messages
+                await self._replay_inbox()
                 await self.process_websocket_messages(websocket)
+
+                # The websocket is closed at the start of a drain - wait for the handlers to finish before exiting
+                if self._drain_task is not None:
+                    await self._drain_task
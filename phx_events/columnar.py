@@ -0,0 +1,165 @@
+from array import array
+import asyncio
+from asyncio import TimerHandle
+from dataclasses import dataclass
+import time
+from typing import Any, Callable, Hashable, Mapping, Optional, TYPE_CHECKING
+
+from phx_events.phx_messages import ChannelMessage
+from phx_events.state_store import KeyFunction, topic_key
+
+
+if TYPE_CHECKING:
+    from phx_events.client import PHXChannelsClient
+
+
+_FLOAT_TYPECODES = frozenset('fd')
+# Columns start with room for this many rows when they aren't sized by batch_size, and double when they fill up
+_INITIAL_ROWS = 1024
+
+
+@dataclass(frozen=True)
+class ColumnBatch:
+    """
+    Args:
+        key (Hashable): The key the rows were collected under, the topic by default
+        columns (dict[str, array]): The values of each field, one per row in the order the messages were received
+        started_at (float): `time.time()` when the first row was added
+        ended_at (float): `time.time()` when the batch was handed over
+    """
+    key: Hashable
+    columns: dict[str, array]
+    started_at: float
+    ended_at: float
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values())))
+
+
+# Called with each full batch or window of rows
+BatchHandler = Callable[[ColumnBatch], None]
+
+
+class _ColumnBuffer:
+    columns: dict[str, array]
+    capacity: int
+    length: int
+    started_at: float
+    flush_handle: Optional[TimerHandle]
+
+    def __init__(self, typecodes: Mapping[str, str], capacity: int):
+        # Zero filled up front so adding a row is an assignment rather than an append
+        self.columns = {
+            field: array(typecode, bytes(array(typecode).itemsize * capacity))
+            for field, typecode in typecodes.items()
+        }
+        self.capacity = capacity
+        self.length = 0
+        self.started_at = time.time()
+        self.flush_handle = None
+
+    def grow(self) -> None:
+        for column in self.columns.values():
+            column.frombytes(bytes(column.itemsize * self.capacity))
+        self.capacity *= 2
+
+
+class ColumnarSink:
+    """Collects payload fields into `array` columns and hands them to `on_batch` a batch at a time
+
+    Register `ColumnarSink.handle_message` as a handler for the events to collect. Each message adds a row to the
+    columns kept under `key_function(message)` (the topic by default), so the batch handler can work on whole columns
+    at once instead of a message at a time. A batch is handed over when it has `batch_size` rows, or `window` seconds
+    after its first row, whichever comes first. Messages missing one of the fields aren't added and are counted in
+    `skipped`.
+
+    The columns support the buffer protocol, so `numpy.frombuffer(column, dtype=column.typecode)` gives a NumPy array
+    of a column without copying it.
+
+    Args:
+        fields (Mapping[str, str]): Payload fields to collect and the `array` typecode of their column, e.g. `'d'`
+        on_batch (BatchHandler): Called with each batch, in the event loop
+        batch_size (Optional[int]): Number of rows in a batch, None to only hand over batches by `window`
+        window (Optional[float]): Seconds after its first row that a batch is handed over, even if it isn't full
+        key_function (KeyFunction): Returns the key a message's row is collected under
+    """
+    fields: Mapping[str, str]
+    on_batch: BatchHandler
+    batch_size: Optional[int]
+    window: Optional[float]
+    key_function: KeyFunction
+    skipped: int
+
+    _buffers: dict[Hashable, _ColumnBuffer]
+    _converters: dict[str, Callable[[Any], Any]]
+
+    def __init__(
+        self,
+        fields: Mapping[str, str],
+        on_batch: BatchHandler,
+        batch_size: Optional[int] = 1000,
+        window: Optional[float] = None,
+        key_function: KeyFunction = topic_key,
+    ):
+        if not fields:
+            raise ValueError('At least one field must be collected')
+        if batch_size is None and window is None:
+            raise ValueError('Either batch_size or window must be set')
+
+        self.fields = fields
+        self.on_batch = on_batch
+        self.batch_size = batch_size
+        self.window = window
+        self.key_function = key_function
+        self.skipped = 0
+
+        self._buffers = {}
+        # Payload floats arrive as Decimals, which integer columns don't accept
+        self._converters = {
+            field: float if typecode in _FLOAT_TYPECODES else int
+            for field, typecode in fields.items()
+        }
+
+    def add(self, message: ChannelMessage) -> None:
+        payload = message.payload
+        try:
+            row = {field: convert(payload[field]) for field, convert in self._converters.items()}
+        except (KeyError, TypeError, ValueError):
+            self.skipped += 1
+            return
+
+        key = self.key_function(message)
+        if (column_buffer := self._buffers.get(key)) is None:
+            column_buffer = self._buffers[key] = _ColumnBuffer(self.fields, self.batch_size or _INITIAL_ROWS)
+            if self.window is not None:
+                column_buffer.flush_handle = asyncio.get_running_loop().call_later(self.window, self.flush, key)
+        elif column_buffer.length == column_buffer.capacity:
+            column_buffer.grow()
+
+        for field, value in row.items():
+            column_buffer.columns[field][column_buffer.length] = value
+        column_buffer.length += 1
+
+        if column_buffer.length == self.batch_size:
+            self.flush(key)
+
+    async def handle_message(self, message: ChannelMessage, client: 'PHXChannelsClient') -> None:
+        self.add(message)
+
+    def flush(self, key: Hashable) -> None:
+        """Hand over the rows collected under `key` now, even if the batch isn't full"""
+        if (column_buffer := self._buffers.pop(key, None)) is None:
+            return
+
+        if column_buffer.flush_handle is not None:
+            column_buffer.flush_handle.cancel()
+
+        columns = column_buffer.columns
+        if column_buffer.length < column_buffer.capacity:
+            columns = {field: column[:column_buffer.length] for field, column in columns.items()}
+
+        self.on_batch(ColumnBatch(key, columns, column_buffer.started_at, time.time()))
+
+    def flush_all(self) -> None:
+        for key in list(self._buffers):
+            self.flush(key)
@@ -0,0 +1,85 @@
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from phx_events.phx_messages import ChannelMessage
+from phx_events.state_store import KeyFunction, topic_key
+
+
+# Called with each pending message replaced by a newer one, which will never be processed
+ConflatedMessageHandler = Callable[[ChannelMessage], None]
+
+
+class ConflatingQueue(asyncio.Queue):
+    """Event queue that keeps only the newest pending message for each key
+
+    Putting a message whose key already has a pending message replaces the pending message in place, so keys are
+    still served in the order their first pending message arrived. Replaced messages are counted in `conflated`.
+    Use this for events where only the latest value matters so handlers skip stale updates after a stall.
+
+    Args:
+        key_function (KeyFunction): Returns the key a message is conflated under, the topic by default
+        maxsize (int): Maximum number of pending keys, 0 for unbounded
+        on_conflated (Optional[ConflatedMessageHandler]): Called with each replaced message, to clean up anything kept
+            for it until it was processed
+    """
+    key_function: KeyFunction
+    on_conflated: Optional[ConflatedMessageHandler]
+    conflated: int
+
+    _pending: OrderedDict[Hashable, ChannelMessage]
+
+    def __init__(
+        self,
+        key_function: KeyFunction = topic_key,
+        maxsize: int = 0,
+        on_conflated: Optional[ConflatedMessageHandler] = None,
+    ):
+        self.key_function = key_function
+        self.on_conflated = on_conflated
+        self.conflated = 0
+        super().__init__(maxsize)
+
+    def _init(self, maxsize: int) -> None:
+        self._pending = OrderedDict()
+
+    def _replace(self, key: Hashable, item: ChannelMessage) -> None:
+        replaced_message = self._pending[key]
+        self._pending[key] = item
+        self.conflated += 1
+        if self.on_conflated is not None:
+            self.on_conflated(replaced_message)
+
+    def _put(self, item: ChannelMessage) -> None:
+        key = self.key_function(item)
+        if key in self._pending:
+            # The replaced message will never be processed so it won't be marked as done
+            self._unfinished_tasks -= 1  # type: ignore[attr-defined]
+            self._replace(key, item)
+        else:
+            self._pending[key] = item
+
+    async def put(self, item: ChannelMessage) -> None:
+        # Replacing a pending message doesn't take up a slot, so it never waits for the queue to have room
+        if self.key_function(item) in self._pending:
+            self.put_nowait(item)
+            return
+
+        await super().put(item)
+
+    def put_nowait(self, item: ChannelMessage) -> None:
+        if (key := self.key_function(item)) in self._pending:
+            self._replace(key, item)
+            return
+
+        super().put_nowait(item)
+
+    def _get(self) -> ChannelMessage:
+        _, item = self._pending.popitem(last=False)
+        return item
+
+    def qsize(self) -> int:
+        return len(self._pending)
+
+    def empty(self) -> bool:
+        return not self._pending
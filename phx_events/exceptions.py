@@ -14,3 +14,10 @@ class TopicClosedError(PHXClientError):
         self.topic = topic
         self.reason = reason
         super().__init__(topic, reason)
+
+
+class PayloadValidationError(PHXClientError):
+    def __init__(self, path: str, reason: str):
+        self.path = path
+        self.reason = reason
+        super().__init__(f'{path}: {reason}')
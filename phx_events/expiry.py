@@ -0,0 +1,103 @@
+from datetime import datetime
+from decimal import Decimal
+import time
+from typing import Callable, Optional
+
+from phx_events.async_logger import async_logger
+from phx_events.phx_messages import ChannelMessage, Topic
+
+
+# Called with each message that expired before it could be dispatched to the handlers
+ExpiredMessageHandler = Callable[[ChannelMessage], None]
+
+# Epoch timestamps above this are in milliseconds - as seconds it would be the year 5138
+_MILLISECOND_EPOCH_THRESHOLD = 100_000_000_000
+
+logger = async_logger.getChild(__name__)
+
+
+class MessageExpiry:
+    """Maximum age of messages for an event, checked before the message is dispatched to the handlers
+
+    A message's age is measured from the time it was received, or from `timestamp_field` in the payload if it is set
+    and the payload has it. The timestamp can be a number of seconds or milliseconds since the epoch or an ISO 8601
+    string, including the `Z` suffix Elixir uses for UTC. Timestamps that can't be read are logged and counted in
+    `invalid_timestamps`, and the message's age is measured from the time it was received instead.
+
+    Args:
+        max_age (Optional[float]): Maximum age in seconds for messages on any topic
+        timestamp_field (Optional[str]): Payload field holding the time the message was sent
+        on_expired (Optional[ExpiredMessageHandler]): Called with every expired message
+    """
+    max_age: Optional[float]
+    topic_max_ages: dict[Topic, float]
+    timestamp_field: Optional[str]
+    on_expired: Optional[ExpiredMessageHandler]
+    expired: int
+    invalid_timestamps: int
+
+    # Maps id(message) to the time the message was received for messages waiting in the event queue
+    _received_at: dict[int, float]
+
+    def __init__(
+        self,
+        max_age: Optional[float] = None,
+        timestamp_field: Optional[str] = None,
+        on_expired: Optional[ExpiredMessageHandler] = None,
+    ):
+        self.max_age = max_age
+        self.topic_max_ages = {}
+        self.timestamp_field = timestamp_field
+        self.on_expired = on_expired
+        self.expired = 0
+        self.invalid_timestamps = 0
+
+        self._received_at = {}
+
+    def mark_received(self, message: ChannelMessage) -> None:
+        self._received_at[id(message)] = time.time()
+
+    def discard(self, message: ChannelMessage) -> None:
+        """Forget a message that won't be checked, e.g. one replaced in a conflated queue"""
+        self._received_at.pop(id(message), None)
+
+    def _sent_at(self, message: ChannelMessage, received_at: float) -> float:
+        if self.timestamp_field is None:
+            return received_at
+
+        timestamp = message.payload.get(self.timestamp_field)
+        if timestamp is None:
+            return received_at
+
+        if isinstance(timestamp, (int, float, Decimal)) and not isinstance(timestamp, bool):
+            sent_at = float(timestamp)
+            return sent_at / 1000 if sent_at > _MILLISECOND_EPOCH_THRESHOLD else sent_at
+        if isinstance(timestamp, str):
+            # datetime.fromisoformat only reads the Z suffix from Python 3.11
+            if timestamp.endswith('Z'):
+                timestamp = f'{timestamp[:-1]}+00:00'
+            try:
+                return datetime.fromisoformat(timestamp).timestamp()
+            except ValueError:
+                pass
+
+        self.invalid_timestamps += 1
+        logger.warning(f'Measuring age from receive time, invalid {self.timestamp_field}={timestamp!r} in {message=}')
+        return received_at
+
+    def check(self, message: ChannelMessage) -> bool:
+        """Returns True and records the message as expired if it is older than its maximum age"""
+        received_at = self._received_at.pop(id(message), time.time())
+
+        max_age = self.topic_max_ages.get(message.topic, self.max_age)
+        if max_age is None:
+            return False
+
+        if time.time() - self._sent_at(message, received_at) <= max_age:
+            return False
+
+        self.expired += 1
+        if self.on_expired is not None:
+            self.on_expired(message)
+
+        return True
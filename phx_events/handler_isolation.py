@@ -0,0 +1,130 @@
+from asyncio import AbstractEventLoop, Queue, QueueFull, Task
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from logging import Logger
+from typing import Awaitable, Callable, Optional
+
+from phx_events.circuit_breaker import CircuitState
+from phx_events.phx_messages import ChannelHandlerFunction, ChannelMessage
+
+
+# Called with a message and whether the isolated handler succeeded once the handler has run
+HandledCallback = Callable[[ChannelMessage, bool], None]
+
+
+@dataclass()
+class HandlerStats:
+    """
+    Args:
+        timeouts (int): Total number of times the handler took longer than its timeout
+        consecutive_timeouts (int): Number of times in a row the handler took longer than its timeout
+        isolated (bool): Whether the handler has been moved into its own `HandlerLane`
+        dropped (int): Number of messages dropped because the handler's lane was full
+        shed (int): Number of messages the handler skipped because the client was shedding load
+        circuit_state (CircuitState): State of the handler's circuit breaker
+        short_circuited (int): Number of messages the handler skipped because its circuit breaker was open
+    """
+    timeouts: int = 0
+    consecutive_timeouts: int = 0
+    isolated: bool = False
+    dropped: int = 0
+    shed: int = 0
+    circuit_state: CircuitState = CircuitState.closed
+    short_circuited: int = 0
+
+
+def handler_name(handler: ChannelHandlerFunction) -> str:
+    return getattr(handler, '__name__', repr(handler))
+
+
+class HandlerLane:
+    """Runs a single slow handler off its own bounded queue
+
+    Once a handler is isolated the event processor hands messages to the lane instead of waiting on the handler, so
+    the handler can only slow itself down. Sync handlers get their own executor so they don't hold threads in the
+    shared executor pool. Messages are dropped (and counted in `stats`) when the lane's queue is full.
+
+    `on_handled` is called with each message and whether the handler succeeded once the lane has run it. `run_handler`
+    can return False to report a failure without raising, e.g. after a timeout.
+    """
+    handler: ChannelHandlerFunction
+    stats: HandlerStats
+    executor_pool: Optional[Executor]
+
+    current_message: Optional[ChannelMessage]
+
+    _queue: Queue[ChannelMessage]
+    _task: Task[None]
+
+    def __init__(
+        self,
+        handler: ChannelHandlerFunction,
+        run_handler: Callable[[ChannelMessage], Awaitable[Optional[bool]]],
+        stats: HandlerStats,
+        logger: Logger,
+        loop: AbstractEventLoop,
+        maxsize: int,
+        executor_pool: Optional[Executor] = None,
+        on_handled: Optional[HandledCallback] = None,
+    ):
+        self.handler = handler
+        self.stats = stats
+        self.executor_pool = executor_pool
+        self.logger = logger
+        # The message the handler is running for, it's still undelivered if the client shuts down now
+        self.current_message = None
+
+        self._run_handler = run_handler
+        self._on_handled = on_handled
+        self._queue = Queue(maxsize=maxsize)
+        self._task = loop.create_task(self._process_messages())
+
+    async def _process_messages(self) -> None:
+        while True:
+            message = await self._queue.get()
+            self.current_message = message
+
+            try:
+                succeeded = await self._run_handler(message) is not False
+            except Exception as exception:
+                succeeded = False
+                self.logger.exception(f'Error executing handler - {exception=}')
+
+            if self._on_handled is not None:
+                self._on_handled(message, succeeded)
+
+            self.current_message = None
+            self._queue.task_done()
+
+    def submit(self, message: ChannelMessage) -> bool:
+        """Queue the message for the handler, returns False if it was dropped because the queue is full"""
+        try:
+            self._queue.put_nowait(message)
+        except QueueFull:
+            self.stats.dropped += 1
+            self.logger.debug(f'Dropping message for isolated handler {handler_name(self.handler)} - {message=}')
+            return False
+
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def take_undelivered(self) -> list[ChannelMessage]:
+        """Empty the lane's queue, returns the message being handled followed by the queued messages"""
+        undelivered_messages = [self.current_message] if self.current_message is not None else []
+        while not self._queue.empty():
+            undelivered_messages.append(self._queue.get_nowait())
+            self._queue.task_done()
+
+        return undelivered_messages
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+    def close(self) -> None:
+        self._task.cancel()
+
+        if self.executor_pool is not None:
+            self.executor_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,131 @@
+import asyncio
+from asyncio import AbstractEventLoop
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from threading import Lock, Thread
+from typing import Any, Callable, Coroutine, Hashable, Optional
+
+
+HandlerCoroutineFactory = Callable[[], Coroutine[Any, Any, None]]
+
+
+def _copy_result_callback(handler_future: Future) -> Callable[[asyncio.Task], None]:
+    def copy_result(task: asyncio.Task) -> None:
+        if task.cancelled():
+            handler_future.cancel()
+            return
+
+        try:
+            if (exception := task.exception()) is not None:
+                handler_future.set_exception(exception)
+            else:
+                handler_future.set_result(task.result())
+        except InvalidStateError:
+            # The reader loop cancelled the future while the handler was finishing
+            pass
+
+    return copy_result
+
+
+def _cancel_task_callback(loop: AbstractEventLoop, task: asyncio.Task) -> Callable[[Future], None]:
+    def cancel_task(handler_future: Future) -> None:
+        # The reader loop gave up waiting (e.g. a handler timeout) so stop the handler too
+        if handler_future.cancelled():
+            loop.call_soon_threadsafe(task.cancel)
+
+    return cancel_task
+
+
+class HandlerLoop:
+    """An event loop running in its own thread that coroutine handlers are run on
+
+    Work is handed over in batches - submitting only wakes the loop if it isn't already due to pick up pending work,
+    so a burst of messages costs one cross-thread wake up instead of one per message.
+    """
+    name: str
+    loop: AbstractEventLoop
+
+    _thread: Optional[Thread]
+    _pending: deque[tuple[HandlerCoroutineFactory, Future]]
+    _pending_lock: Lock
+    _wake_up_scheduled: bool
+
+    def __init__(self, name: str):
+        self.name = name
+        self.loop = asyncio.new_event_loop()
+
+        self._thread = None
+        self._pending = deque()
+        self._pending_lock = Lock()
+        self._wake_up_scheduled = False
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _start_pending(self) -> None:
+        with self._pending_lock:
+            pending = self._pending
+            self._pending = deque()
+            self._wake_up_scheduled = False
+
+        for coroutine_factory, handler_future in pending:
+            # The future is left pending rather than marked as running so the reader loop can still cancel it
+            if handler_future.cancelled():
+                continue
+
+            task = self.loop.create_task(coroutine_factory())
+            task.add_done_callback(_copy_result_callback(handler_future))
+            handler_future.add_done_callback(_cancel_task_callback(self.loop, task))
+
+    def submit(self, coroutine_factory: HandlerCoroutineFactory) -> Future:
+        handler_future: Future = Future()
+
+        with self._pending_lock:
+            self._pending.append((coroutine_factory, handler_future))
+            wake_up = not self._wake_up_scheduled
+            self._wake_up_scheduled = True
+
+        if wake_up:
+            self.loop.call_soon_threadsafe(self._start_pending)
+
+        return handler_future
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread = None
+
+
+class HandlerLoopPool:
+    """Runs coroutine handlers on `size` event loops in their own threads instead of the loop reading the websocket
+
+    This keeps CPU heavy coroutine handlers from delaying websocket reads and pings. Messages for the same topic always
+    go to the same loop.
+
+    Handlers run on a different loop to the client, so they must not await the client's coroutines or use its
+    asyncio objects directly.
+    """
+    handler_loops: list[HandlerLoop]
+
+    def __init__(self, size: int = 1):
+        self.handler_loops = [HandlerLoop(f'phx_events_handler_loop_{index}') for index in range(size)]
+
+    def loop_for(self, key: Hashable) -> HandlerLoop:
+        return self.handler_loops[hash(key) % len(self.handler_loops)]
+
+    def submit(self, key: Hashable, coroutine_factory: HandlerCoroutineFactory) -> Future:
+        return self.loop_for(key).submit(coroutine_factory)
+
+    def start(self) -> None:
+        for handler_loop in self.handler_loops:
+            handler_loop.start()
+
+    def stop(self) -> None:
+        for handler_loop in self.handler_loops:
+            handler_loop.stop()
@@ -0,0 +1,100 @@
+import asyncio
+import importlib
+from typing import Any, Optional, TYPE_CHECKING
+
+from phx_events.phx_messages import ChannelEvent, ChannelHandlerFunction, Topic
+
+
+if TYPE_CHECKING:
+    from phx_events.client import PHXChannelsClient
+
+
+HandlerKey = tuple[ChannelEvent, Optional[Topic]]
+
+
+class HandlerRegistrations:
+    """Stands in for the client while a registration function runs, recording its handlers instead of adding them
+
+    Topic subscriptions are left as they are, and anything else the registration function uses is taken from the
+    client.
+    """
+    handlers: dict[HandlerKey, list[ChannelHandlerFunction]]
+    handler_timeouts: dict[ChannelEvent, dict[ChannelHandlerFunction, float]]
+    optional_handlers: dict[ChannelEvent, set[ChannelHandlerFunction]]
+    # Options like `conflation_key` and `max_age` passed for each event, with the topic they were passed with
+    event_options: dict[ChannelEvent, list[tuple[Optional[Topic], dict[str, Any]]]]
+
+    def __init__(self, client: 'PHXChannelsClient'):
+        self._client = client
+        self.handlers = {}
+        self.handler_timeouts = {}
+        self.optional_handlers = {}
+        self.event_options = {}
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def register_event_handler(
+        self,
+        event: ChannelEvent,
+        handlers: list[ChannelHandlerFunction],
+        topic: Optional[Topic] = None,
+        timeout: Optional[float] = None,
+        optional: bool = False,
+        **event_options: Any,
+    ) -> None:
+        self.handlers.setdefault((event, topic), []).extend(handlers)
+
+        if timeout is not None:
+            self.handler_timeouts.setdefault(event, {}).update(dict.fromkeys(handlers, timeout))
+        if optional:
+            self.optional_handlers.setdefault(event, set()).update(handlers)
+        if event_options:
+            self.event_options.setdefault(event, []).append((topic, event_options))
+
+    def register_topic_subscription(self, topic: Topic) -> asyncio.Event:
+        if topic_registration := self._client._topic_registration_status.get(topic):
+            return topic_registration.status_updated_event
+
+        self._client.logger.warning(f'Not subscribing to new {topic=} during a reload')
+        return asyncio.Event()
+
+
+def reload_handlers(client: 'PHXChannelsClient', handlers_path: str) -> None:
+    """Reload the module of a `module:function` registration function and swap in the handlers it registers
+
+    The whole handler set is swapped at once - events and topics the reloaded function no longer registers handlers
+    for are left without handlers. Only handlers, their timeouts and `optional` are reloaded for existing events, event
+    options like `conflation_key` and `max_age` stay as they were. Events the reloaded function registers for the
+    first time are set up with their options.
+    """
+    module_name, _, function_name = handlers_path.partition(':')
+    handlers_module = importlib.reload(importlib.import_module(module_name))
+
+    registrations = HandlerRegistrations(client)
+    getattr(handlers_module, function_name or 'register')(registrations)
+
+    current_keys: list[HandlerKey] = []
+    for event, handler_config in client._event_handler_config.items():
+        current_keys.append((event, None))
+        current_keys.extend((event, topic) for topic in handler_config.topic_handlers)
+
+    for event, event_options in registrations.event_options.items():
+        if event not in client._event_handler_config:
+            for topic, options in event_options:
+                client.register_event_handler(event, [], topic=topic, **options)
+
+    # Nothing is awaited between the swaps so the event processors only ever see the old or the new handler set
+    for (event, topic), handlers in registrations.handlers.items():
+        client.replace_event_handlers(event, handlers, topic=topic)
+
+    # Old handlers are only retired once the new handlers are in place, in case they were registered again
+    for event, topic in current_keys:
+        if (event, topic) not in registrations.handlers:
+            client.replace_event_handlers(event, [], topic=topic)
+
+    for event, handler_config in client._event_handler_config.items():
+        handler_config.handler_timeouts = registrations.handler_timeouts.get(event, {})
+        handler_config.optional_handlers = registrations.optional_handlers.get(event, set())
+
+    client.logger.info(f'Reloaded handlers from {handlers_path}')
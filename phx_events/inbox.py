@@ -0,0 +1,286 @@
+import asyncio
+import os
+from pathlib import Path
+import struct
+from typing import BinaryIO, Iterator, Optional, Union
+import zlib
+
+from phx_events.phx_messages import ChannelMessage
+
+
+# Record type, entry id, payload length, payload crc32
+_RECORD_HEADER = struct.Struct('<cQII')
+_MESSAGE_RECORD = b'M'
+_ACK_RECORD = b'A'
+_SEGMENT_SUFFIX = '.log'
+
+
+class DurableInbox:
+    """Append-only write-ahead log of received frames used for at-least-once processing across restarts
+
+    Every frame that is queued for handlers is appended to the active segment file before it is queued.
+    Once all the handlers for the message, including isolated handlers, have run successfully the message is
+    acknowledged with an ack record. Messages whose handlers raised, timed out or were skipped are never acknowledged,
+    so they're replayed to the handlers, before any new messages are read, the next time the client starts.
+
+    Writes are fsynced in batches of `fsync_batch_size` records, and at least every `fsync_interval` seconds while
+    `sync_periodically` is running. While it's running the fsyncs happen in the default executor so reading frames
+    isn't blocked on the disk, without it a full batch is fsynced straight away. Frames received since the last fsync
+    can be lost if the host crashes, set `fsync_batch_size` to 1 to fsync every frame at the cost of throughput.
+
+    Segments are rotated once they reach `segment_max_bytes` and deleted once every frame in them, and in all older
+    segments, has been acknowledged.
+    """
+    directory: Path
+    segment_max_bytes: int
+    fsync_batch_size: int
+    fsync_interval: float
+
+    _next_id: int
+    _active_segment_id: Optional[int]
+    _active_segment: Optional[BinaryIO]
+    _active_segment_size: int
+    _unsynced_records: int
+    _batch_full: Optional[asyncio.Event]
+    _segment_entries: dict[int, set[int]]
+    _entry_segments: dict[int, int]
+    _tracked_entries: set[int]
+    _pending_handlers: dict[int, int]
+    _failed_messages: set[int]
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        segment_max_bytes: int = 64 * 2 ** 20,
+        fsync_batch_size: int = 100,
+        fsync_interval: float = 0.05,
+    ):
+        self.directory = Path(directory)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval = fsync_interval
+
+        self._next_id = 0
+        self._active_segment_id = None
+        self._active_segment = None
+        self._active_segment_size = 0
+        self._unsynced_records = 0
+        # Set once a full batch of records is waiting to be synced, only while `sync_periodically` is running
+        self._batch_full = None
+        # Unacknowledged entry ids in each segment keyed by the segment's first entry id
+        self._segment_entries = {}
+        self._entry_segments = {}
+        # Entry ids of the messages that are waiting to be acknowledged
+        self._tracked_entries = set()
+        # Number of handler runs (the event's handlers and each isolated handler) still to finish for each entry id
+        self._pending_handlers = {}
+        # Entry ids of the messages that a handler failed for, they're left unacknowledged to be replayed
+        self._failed_messages = set()
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.directory / f'{segment_id:020d}{_SEGMENT_SUFFIX}'
+
+    @staticmethod
+    def _read_segment(segment_path: Path) -> Iterator[tuple[bytes, int, bytes]]:
+        segment_data = segment_path.read_bytes()
+        offset = 0
+
+        while offset + _RECORD_HEADER.size <= len(segment_data):
+            record_type, entry_id, length, crc = _RECORD_HEADER.unpack_from(segment_data, offset)
+            payload_start = offset + _RECORD_HEADER.size
+            payload = segment_data[payload_start:payload_start + length]
+
+            # Stop at a partially written record - the process died while writing it
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                return
+
+            yield record_type, entry_id, payload
+            offset = payload_start + length
+
+    def _start_segment(self) -> None:
+        self._active_segment_id = self._next_id
+        self._active_segment = self._segment_path(self._active_segment_id).open('ab')
+        self._active_segment_size = 0
+        self._segment_entries[self._active_segment_id] = set()
+
+    def _write_record(self, record_type: bytes, entry_id: int, payload: bytes = b'') -> None:
+        if self._active_segment is None:
+            raise RuntimeError('DurableInbox must be opened before writing to it')
+
+        self._active_segment.write(_RECORD_HEADER.pack(record_type, entry_id, len(payload), zlib.crc32(payload)))
+        self._active_segment.write(payload)
+        self._active_segment_size += _RECORD_HEADER.size + len(payload)
+
+        self._unsynced_records += 1
+        if self._unsynced_records >= self.fsync_batch_size:
+            if self._batch_full is not None:
+                self._batch_full.set()
+            else:
+                self.sync()
+
+    def _rotate_segment(self) -> None:
+        self.sync()
+        if self._active_segment is not None:
+            self._active_segment.close()
+
+        self._start_segment()
+        self._compact()
+
+    def _compact(self) -> None:
+        # Only delete from the oldest segment forward so acks for older segments are never lost
+        for segment_id in sorted(self._segment_entries):
+            if segment_id == self._active_segment_id or self._segment_entries[segment_id]:
+                break
+
+            del self._segment_entries[segment_id]
+            self._segment_path(segment_id).unlink(missing_ok=True)
+
+    def open(self) -> list[tuple[int, bytes]]:
+        """Load the existing segments and start a new active segment
+
+        Returns:
+            list[tuple[int, bytes]]: The (entry id, frame) pairs that were never acknowledged, oldest first
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        unacknowledged_frames: dict[int, bytes] = {}
+
+        for segment_path in sorted(self.directory.glob(f'*{_SEGMENT_SUFFIX}')):
+            segment_id = int(segment_path.stem)
+            segment_entries = self._segment_entries.setdefault(segment_id, set())
+
+            for record_type, entry_id, payload in self._read_segment(segment_path):
+                self._next_id = max(self._next_id, entry_id + 1)
+
+                if record_type == _MESSAGE_RECORD:
+                    unacknowledged_frames[entry_id] = payload
+                    segment_entries.add(entry_id)
+                    self._entry_segments[entry_id] = segment_id
+                elif entry_id in self._entry_segments:
+                    unacknowledged_frames.pop(entry_id, None)
+                    self._segment_entries[self._entry_segments.pop(entry_id)].discard(entry_id)
+
+        self._start_segment()
+        self._compact()
+
+        return sorted(unacknowledged_frames.items())
+
+    def append(self, frame: Union[str, bytes]) -> int:
+        if isinstance(frame, str):
+            frame = frame.encode()
+
+        if self._active_segment_size >= self.segment_max_bytes:
+            self._rotate_segment()
+
+        entry_id = self._next_id
+        self._next_id += 1
+
+        self._write_record(_MESSAGE_RECORD, entry_id, frame)
+        if self._active_segment_id is not None:
+            self._segment_entries[self._active_segment_id].add(entry_id)
+            self._entry_segments[entry_id] = self._active_segment_id
+
+        return entry_id
+
+    def track(self, message: ChannelMessage, entry_id: int) -> None:
+        # Stored on the message rather than keyed by id(message), which can be reused once a message is freed
+        object.__setattr__(message, '_inbox_entry_id', entry_id)
+        self._tracked_entries.add(entry_id)
+
+    def _tracked_entry(self, message: ChannelMessage) -> Optional[int]:
+        entry_id = message._inbox_entry_id
+        return entry_id if entry_id in self._tracked_entries else None
+
+    def ack(self, message: ChannelMessage) -> None:
+        entry_id = self._tracked_entry(message)
+        if entry_id is None:
+            return
+
+        self._tracked_entries.discard(entry_id)
+        self.ack_entry(entry_id)
+
+    def hold(self, message: ChannelMessage) -> None:
+        """Delay acknowledging the message until a matching `done` call"""
+        entry_id = self._tracked_entry(message)
+        if entry_id is not None:
+            self._pending_handlers[entry_id] = self._pending_handlers.get(entry_id, 0) + 1
+
+    def done(self, message: ChannelMessage, succeeded: bool) -> None:
+        """Acknowledge the message once every `hold` is done, unless one of them failed"""
+        entry_id = message._inbox_entry_id
+        if entry_id is None or entry_id not in self._pending_handlers:
+            return
+
+        if not succeeded:
+            self._failed_messages.add(entry_id)
+
+        self._pending_handlers[entry_id] -= 1
+        if self._pending_handlers[entry_id]:
+            return
+
+        del self._pending_handlers[entry_id]
+        if entry_id in self._failed_messages:
+            self._failed_messages.discard(entry_id)
+            self.forget(message)
+        else:
+            self.ack(message)
+
+    def forget(self, message: ChannelMessage) -> None:
+        """Stop tracking the message without acknowledging it, so it's replayed the next time the inbox is opened"""
+        if message._inbox_entry_id is not None:
+            self._tracked_entries.discard(message._inbox_entry_id)
+
+    def ack_entry(self, entry_id: int) -> None:
+        self._write_record(_ACK_RECORD, entry_id)
+
+        segment_id = self._entry_segments.pop(entry_id)
+        self._segment_entries[segment_id].discard(entry_id)
+        if not self._segment_entries[segment_id]:
+            self._compact()
+
+    def sync(self) -> None:
+        if self._active_segment is None or not self._unsynced_records:
+            return
+
+        self._active_segment.flush()
+        os.fsync(self._active_segment.fileno())
+        self._unsynced_records = 0
+
+    async def _sync_in_executor(self) -> None:
+        if self._active_segment is None or not self._unsynced_records:
+            return
+
+        self._active_segment.flush()
+        segment_id = self._active_segment_id
+        synced_records = self._unsynced_records
+        # Sync a duplicate descriptor so rotating the segment can't close it while the fsync is running
+        file_descriptor = os.dup(self._active_segment.fileno())
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, file_descriptor)
+        finally:
+            os.close(file_descriptor)
+
+        # Records written while the fsync ran still need syncing, unless a rotation synced the segment in the meantime
+        if self._active_segment_id == segment_id:
+            self._unsynced_records -= synced_records
+
+    async def sync_periodically(self) -> None:
+        self._batch_full = asyncio.Event()
+        try:
+            while True:
+                # Sync early once a full batch of records is waiting
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.fsync_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+                self._batch_full.clear()
+                await self._sync_in_executor()
+        finally:
+            self._batch_full = None
+
+    def close(self) -> None:
+        self.sync()
+
+        if self._active_segment is not None:
+            self._active_segment.close()
+            self._active_segment = None
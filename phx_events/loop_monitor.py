@@ -0,0 +1,128 @@
+import asyncio
+from asyncio import AbstractEventLoop, Task
+from bisect import bisect_left
+from logging import Logger
+from typing import Callable, Optional, Sequence
+
+
+# Called with True when load shedding starts and False when it stops
+ShedStateCallback = Callable[[bool], None]
+
+DEFAULT_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class LagHistogram:
+    """Counts of event loop lag samples in buckets with the given upper bounds (in seconds)
+
+    The final count in `counts` is for samples over the last bucket bound.
+    """
+    bucket_bounds: tuple[float, ...]
+    counts: list[int]
+    sample_count: int
+    total_lag: float
+    max_lag: float
+
+    def __init__(self, bucket_bounds: Sequence[float] = DEFAULT_LAG_BUCKETS):
+        self.bucket_bounds = tuple(sorted(bucket_bounds))
+        self.counts = [0] * (len(self.bucket_bounds) + 1)
+        self.sample_count = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+
+    def record(self, lag: float) -> None:
+        self.counts[bisect_left(self.bucket_bounds, lag)] += 1
+        self.sample_count += 1
+        self.total_lag += lag
+        self.max_lag = max(self.max_lag, lag)
+
+    @property
+    def mean_lag(self) -> float:
+        return self.total_lag / self.sample_count if self.sample_count else 0.0
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a timer and turns on load shedding while the loop is overloaded
+
+    Every `interval` seconds the monitor records how much later than requested it woke up. Shedding starts once a
+    sample reaches `shed_threshold` and stops after `recovery_samples` samples in a row are at or under
+    `recover_threshold`. While shedding, `PHXChannelsClient` skips handlers registered with `optional=True` so the
+    loop has time to read from the socket and answer pings.
+
+    Args:
+        interval (float): Seconds between samples
+        shed_threshold (float): Lag in seconds that starts load shedding
+        recover_threshold (float): Lag in seconds that counts towards stopping load shedding
+        recovery_samples (int): Number of samples in a row under `recover_threshold` needed to stop load shedding
+        on_shed_change (Optional[ShedStateCallback]): Called when shedding starts or stops, for custom shedding
+    """
+    interval: float
+    shed_threshold: float
+    recover_threshold: float
+    recovery_samples: int
+    on_shed_change: Optional[ShedStateCallback]
+    histogram: LagHistogram
+    shedding: bool
+
+    _recovered_samples: int
+    _task: Optional[Task[None]]
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        shed_threshold: float = 0.1,
+        recover_threshold: float = 0.02,
+        recovery_samples: int = 10,
+        on_shed_change: Optional[ShedStateCallback] = None,
+        histogram: Optional[LagHistogram] = None,
+    ):
+        self.interval = interval
+        self.shed_threshold = shed_threshold
+        self.recover_threshold = recover_threshold
+        self.recovery_samples = recovery_samples
+        self.on_shed_change = on_shed_change
+        self.histogram = histogram or LagHistogram()
+        self.shedding = False
+
+        self._recovered_samples = 0
+        self._task = None
+
+    def _set_shedding(self, shedding: bool) -> None:
+        self.shedding = shedding
+        if self.on_shed_change is not None:
+            self.on_shed_change(shedding)
+
+    def record_lag(self, lag: float) -> None:
+        self.histogram.record(lag)
+
+        if lag >= self.shed_threshold:
+            self._recovered_samples = 0
+            if not self.shedding:
+                self._set_shedding(True)
+            return
+
+        if self.shedding and lag <= self.recover_threshold:
+            self._recovered_samples += 1
+            if self._recovered_samples >= self.recovery_samples:
+                self._recovered_samples = 0
+                self._set_shedding(False)
+
+    async def _monitor(self, loop: AbstractEventLoop, logger: Logger) -> None:
+        while True:
+            expected_time = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected_time, 0.0)
+
+            was_shedding = self.shedding
+            self.record_lag(lag)
+            if self.shedding != was_shedding:
+                status = 'Starting' if self.shedding else 'Stopping'
+                logger.warning(f'{status} load shedding - event loop {lag=:.3f}s')
+
+    def start(self, loop: AbstractEventLoop, logger: Logger) -> None:
+        if self._task is None:
+            self._task = loop.create_task(self._monitor(loop, logger))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
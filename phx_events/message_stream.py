@@ -0,0 +1,116 @@
+import asyncio
+from collections import deque
+from enum import Enum, unique
+from typing import AsyncIterator, Optional
+
+from phx_events.phx_messages import ChannelEvent, ChannelMessage, Topic
+
+
+@unique
+class OverflowPolicy(Enum):
+    """What a `MessageStream` does with a new message when its buffer is full"""
+    # Wait for the consumer to make space - this stops the client reading from the websocket
+    block = 'block'
+    drop_newest = 'drop_newest'
+    drop_oldest = 'drop_oldest'
+
+
+class MessageStream:
+    """Bounded buffer of messages for an event that is consumed with `async for`
+
+    Messages are put into the buffer directly by `PHXChannelsClient.process_websocket_messages` so there is no task or
+    executor submission per message. Iteration ends once the stream is closed and the buffer is empty.
+
+    Use `MessageStream.batches` to receive lists of all the messages that are already buffered instead of one message
+    at a time.
+    """
+    event: ChannelEvent
+    topic: Optional[Topic]
+    maxsize: int
+    overflow: OverflowPolicy
+    dropped: int
+
+    _buffer: deque[ChannelMessage]
+    _message_available: asyncio.Event
+    _space_available: asyncio.Event
+    _closed: bool
+
+    def __init__(
+        self,
+        event: ChannelEvent,
+        topic: Optional[Topic] = None,
+        maxsize: int = 1000,
+        overflow: OverflowPolicy = OverflowPolicy.block,
+    ):
+        self.event = event
+        self.topic = topic
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._buffer = deque()
+        self._message_available = asyncio.Event()
+        self._space_available = asyncio.Event()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def accepts(self, message: ChannelMessage) -> bool:
+        return self.topic is None or self.topic == message.topic
+
+    async def put(self, message: ChannelMessage) -> None:
+        while not self._closed and len(self._buffer) >= self.maxsize:
+            if self.overflow == OverflowPolicy.drop_newest:
+                self.dropped += 1
+                return
+
+            if self.overflow == OverflowPolicy.drop_oldest:
+                self._buffer.popleft()
+                self.dropped += 1
+                break
+
+            self._space_available.clear()
+            await self._space_available.wait()
+
+        if self._closed:
+            return
+
+        self._buffer.append(message)
+        self._message_available.set()
+
+    async def _wait_for_messages(self) -> bool:
+        while not self._buffer:
+            if self._closed:
+                return False
+
+            self._message_available.clear()
+            await self._message_available.wait()
+
+        return True
+
+    def __aiter__(self) -> 'MessageStream':
+        return self
+
+    async def __anext__(self) -> ChannelMessage:
+        if not await self._wait_for_messages():
+            raise StopAsyncIteration
+
+        message = self._buffer.popleft()
+        self._space_available.set()
+        return message
+
+    async def batches(self, max_batch_size: int = 100) -> AsyncIterator[list[ChannelMessage]]:
+        """Yield lists of up to `max_batch_size` messages, waiting only when the buffer is empty"""
+        while await self._wait_for_messages():
+            batch_size = min(len(self._buffer), max_batch_size)
+            batch = [self._buffer.popleft() for _ in range(batch_size)]
+            self._space_available.set()
+            yield batch
+
+    def close(self) -> None:
+        self._closed = True
+        # Wake up the consumer and any blocked producer so they can see the stream is closed
+        self._message_available.set()
+        self._space_available.set()
@@ -0,0 +1,88 @@
+import asyncio
+from asyncio import AbstractServer, StreamReader, StreamWriter
+from typing import TYPE_CHECKING, Union
+
+from phx_events.circuit_breaker import CircuitState
+from phx_events.handler_isolation import handler_name
+from phx_events.phx_messages import ChannelEvent, PHXEvent
+
+
+if TYPE_CHECKING:
+    from phx_events.client import PHXChannelsClient
+
+
+MetricValue = Union[int, float, bool]
+
+
+def _escape_label_value(label_value: str) -> str:
+    # Handler names fall back to repr, which can contain any of the characters the text format escapes
+    return label_value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _metric_lines(name: str, metric_type: str, samples: list[tuple[dict[str, str], MetricValue]]) -> list[str]:
+    lines = [f'# TYPE {name} {metric_type}']
+    for labels, value in samples:
+        label_text = ','.join(f'{label}="{_escape_label_value(label_value)}"' for label, label_value in labels.items())
+        lines.append(f'{name}{{{label_text}}} {float(value):g}' if label_text else f'{name} {float(value):g}')
+
+    return lines
+
+
+def _event_name(event: ChannelEvent) -> str:
+    return event.value if isinstance(event, PHXEvent) else event
+
+
+def render_metrics(client: 'PHXChannelsClient') -> str:
+    """The client's queue depths, handler stats and event loop lag in the Prometheus text format"""
+    lines = _metric_lines(
+        'phx_events_event_queue_size',
+        'gauge',
+        [({'event': _event_name(event)}, size) for event, size in client.event_queue_sizes().items()],
+    )
+    lines += _metric_lines('phx_events_outbound_sent_total', 'counter', [({}, client.outbound_queue.sent)])
+
+    handler_stats = [({'handler': handler_name(handler)}, stats) for handler, stats in client.handler_stats.items()]
+    for stat, metric_type in (
+        ('timeouts', 'counter'),
+        ('dropped', 'counter'),
+        ('shed', 'counter'),
+        ('short_circuited', 'counter'),
+        ('isolated', 'gauge'),
+    ):
+        metric_name = f'phx_events_handler_{stat}_total' if metric_type == 'counter' else f'phx_events_handler_{stat}'
+        samples = [(labels, getattr(stats, stat)) for labels, stats in handler_stats]
+        lines += _metric_lines(metric_name, metric_type, samples)
+
+    lines += _metric_lines(
+        'phx_events_handler_circuit_open',
+        'gauge',
+        [(labels, stats.circuit_state is not CircuitState.closed) for labels, stats in handler_stats],
+    )
+
+    if client.loop_monitor is not None:
+        histogram = client.loop_monitor.histogram
+        lines += _metric_lines('phx_events_loop_lag_mean_seconds', 'gauge', [({}, histogram.mean_lag)])
+        lines += _metric_lines('phx_events_loop_lag_max_seconds', 'gauge', [({}, histogram.max_lag)])
+        lines += _metric_lines('phx_events_load_shedding', 'gauge', [({}, client.loop_monitor.shedding)])
+
+    return '\n'.join(lines) + '\n'
+
+
+async def start_metrics_server(client: 'PHXChannelsClient', port: int, host: str = '127.0.0.1') -> AbstractServer:
+    """Serve `render_metrics` over HTTP on `port` for Prometheus to scrape, every path returns the metrics"""
+    async def handle_request(reader: StreamReader, writer: StreamWriter) -> None:
+        # Read up to the end of the request headers, the request itself doesn't change the response
+        await reader.readuntil(b'\r\n\r\n')
+
+        body = render_metrics(client).encode()
+        headers = (
+            'HTTP/1.1 200 OK\r\n'
+            'Content-Type: text/plain; version=0.0.4\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n'
+        )
+        writer.write(headers.encode() + body)
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle_request, host, port)
@@ -0,0 +1,242 @@
+import asyncio
+from asyncio import Event, Queue, Task
+from collections import deque
+from dataclasses import dataclass
+import time
+from typing import Optional
+
+from websockets import client
+
+from phx_events import json_handler
+from phx_events.async_logger import async_logger
+from phx_events.exceptions import PHXClientError
+from phx_events.phx_messages import ChannelMessage, Topic
+
+
+logger = async_logger.getChild(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Args:
+        rate (float): Number of messages allowed per second on average
+        burst (int): Number of messages that can be sent at once after being idle
+    """
+    rate: float
+    burst: int = 1
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        if self.burst < 1:
+            raise ValueError('burst must be at least 1')
+
+
+class TokenBucket:
+    rate_limit: RateLimit
+
+    _tokens: float
+    _updated_at: float
+
+    def __init__(self, rate_limit: RateLimit):
+        self.rate_limit = rate_limit
+
+        self._tokens = rate_limit.burst
+        self._updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit.burst, self._tokens + (now - self._updated_at) * self.rate_limit.rate)
+        self._updated_at = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available, 0 if one is available now"""
+        self._refill()
+        return max(1 - self._tokens, 0) / self.rate_limit.rate
+
+    def take(self) -> None:
+        self._tokens -= 1
+
+    async def acquire(self) -> None:
+        while (delay := self.delay()) > 0:
+            await asyncio.sleep(delay)
+
+        self.take()
+
+
+class OutboundQueue:
+    """Bounded queue of messages sent to the websocket by a single sender task
+
+    Having one sender means callers never race on the websocket. Messages waiting in the queue are taken and encoded
+    in batches of up to `batch_size`. Each send waits for the websocket's write buffer to drain, and callers wait in
+    `put` when `maxsize` messages are waiting, so a slow connection pushes back on the code producing messages.
+
+    Messages wait in a queue per topic, so a topic held back by `topic_rate_limit` doesn't hold up the other topics.
+    The oldest message of the topics that can send is sent next, so without rate limits messages are sent in the
+    order they were put.
+
+    If sending fails the sender stops, the message is kept to be sent first once the sender is started again on a new
+    connection, and `put` raises `PHXClientError` until then, including in callers already waiting for room.
+
+    Args:
+        maxsize (int): Maximum number of messages waiting to be sent, 0 for unbounded
+        batch_size (int): Maximum number of messages encoded together
+        connection_rate_limit (Optional[RateLimit]): Limit for all messages sent on the connection
+        topic_rate_limit (Optional[RateLimit]): Limit applied to the messages for each topic separately
+    """
+    maxsize: int
+    batch_size: int
+    connection_rate_limit: Optional[RateLimit]
+    topic_rate_limit: Optional[RateLimit]
+    sent: int
+
+    _queue: Queue[ChannelMessage]
+    _unsent: int
+    _space_available: Event
+    _pending: dict[Topic, deque[tuple[int, ChannelMessage, bytes]]]
+    _next_sequence: int
+    _connection_bucket: Optional[TokenBucket]
+    _topic_buckets: dict[Topic, TokenBucket]
+    _sender_task: Optional[Task[None]]
+    _sender_error: Optional[BaseException]
+
+    def __init__(
+        self,
+        maxsize: int = 1000,
+        batch_size: int = 100,
+        connection_rate_limit: Optional[RateLimit] = None,
+        topic_rate_limit: Optional[RateLimit] = None,
+    ):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.connection_rate_limit = connection_rate_limit
+        self.topic_rate_limit = topic_rate_limit
+        self.sent = 0
+
+        self._queue = Queue()
+        # Counts the messages in the per topic queues as well as the ones still to be encoded
+        self._unsent = 0
+        # Set whenever a message is sent or the sender stops, for the callers waiting in put
+        self._space_available = Event()
+        # Encoded messages waiting for each topic, numbered so the oldest ready message is sent first
+        self._pending = {}
+        self._next_sequence = 0
+        self._connection_bucket = TokenBucket(connection_rate_limit) if connection_rate_limit is not None else None
+        self._topic_buckets = {}
+        self._sender_task = None
+        self._sender_error = None
+
+    def _topic_bucket(self, topic: Topic) -> Optional[TokenBucket]:
+        if self.topic_rate_limit is None:
+            return None
+
+        if (topic_bucket := self._topic_buckets.get(topic)) is None:
+            topic_bucket = self._topic_buckets[topic] = TokenBucket(self.topic_rate_limit)
+
+        return topic_bucket
+
+    def _take_batch(self, first_message: ChannelMessage) -> list[ChannelMessage]:
+        batch = [first_message]
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    def _add_pending(self, first_message: ChannelMessage) -> None:
+        for message in self._take_batch(first_message):
+            self._pending.setdefault(message.topic, deque()).append(
+                (self._next_sequence, message, json_handler.dumps(message)),
+            )
+            self._next_sequence += 1
+
+    def _next_ready_topic(self) -> tuple[Optional[Topic], float]:
+        """The topic with the oldest message that can be sent now, or None and how long until one can be sent"""
+        ready_topic: Optional[Topic] = None
+        ready_sequence = 0
+        delay = float('inf')
+
+        for topic, topic_messages in self._pending.items():
+            topic_bucket = self._topic_bucket(topic)
+            if topic_bucket is not None and (topic_delay := topic_bucket.delay()) > 0:
+                delay = min(delay, topic_delay)
+                continue
+
+            if ready_topic is None or topic_messages[0][0] < ready_sequence:
+                ready_topic, ready_sequence = topic, topic_messages[0][0]
+
+        if ready_topic is not None and self._connection_bucket is not None:
+            if (connection_delay := self._connection_bucket.delay()) > 0:
+                return None, connection_delay
+
+        return ready_topic, delay
+
+    async def _send_messages(self, websocket: client.WebSocketClientProtocol) -> None:
+        while True:
+            if not self._pending:
+                self._add_pending(await self._queue.get())
+            elif not self._queue.empty():
+                self._add_pending(self._queue.get_nowait())
+
+            topic, delay = self._next_ready_topic()
+            if topic is None:
+                # Wait for a rate limited topic to be ready, or for a message on another topic that might be ready first
+                try:
+                    self._add_pending(await asyncio.wait_for(self._queue.get(), delay))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            topic_messages = self._pending[topic]
+            _, message, json_message = topic_messages[0]
+            await websocket.send(json_message)
+
+            topic_messages.popleft()
+            if not topic_messages:
+                del self._pending[topic]
+
+            if (topic_bucket := self._topic_bucket(topic)) is not None:
+                topic_bucket.take()
+            if self._connection_bucket is not None:
+                self._connection_bucket.take()
+
+            self.sent += 1
+            self._unsent -= 1
+            self._space_available.set()
+            self._queue.task_done()
+
+    def _sender_finished(self, sender_task: Task[None]) -> None:
+        if sender_task.cancelled() or (sender_error := sender_task.exception()) is None:
+            return
+
+        self._sender_error = sender_error
+        logger.error(f'Stopped sending outbound messages after an error - {sender_error=}')
+        # Wake up the waiting callers so they raise rather than wait for a sender that isn't running
+        self._space_available.set()
+
+    async def put(self, message: ChannelMessage) -> None:
+        while True:
+            if self._sender_error is not None:
+                raise PHXClientError('Outbound messages stopped being sent after an error') from self._sender_error
+
+            if self.maxsize <= 0 or self._unsent < self.maxsize:
+                break
+
+            self._space_available.clear()
+            await self._space_available.wait()
+
+        self._unsent += 1
+        self._queue.put_nowait(message)
+
+    async def join(self) -> None:
+        await self._queue.join()
+
+    def start(self, websocket: client.WebSocketClientProtocol, loop: asyncio.AbstractEventLoop) -> Task[None]:
+        self._sender_error = None
+        self._sender_task = loop.create_task(self._send_messages(websocket))
+        self._sender_task.add_done_callback(self._sender_finished)
+        return self._sender_task
+
+    def close(self) -> None:
+        if self._sender_task is not None:
+            self._sender_task.cancel()
@@ -0,0 +1,63 @@
+import asyncio
+import concurrent.futures
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import wraps
+import sys
+from typing import Callable, Optional
+
+from phx_events import json_handler
+from phx_events.phx_messages import ChannelMessage, CoroutineHandler
+
+
+# Handlers run in parallel are given the message as JSON bytes since they can't share objects with the client
+ParallelHandlerFunction = Callable[[bytes], None]
+
+
+def free_threaded() -> bool:
+    """Whether this is a free-threaded build of Python running without the GIL"""
+    is_gil_enabled: Callable[[], bool] = getattr(sys, '_is_gil_enabled', lambda: True)
+    return not is_gil_enabled()
+
+
+def parallel_executor(max_workers: Optional[int] = None) -> Executor:
+    """The cheapest executor available that runs handlers on multiple cores at once
+
+    * On a free-threaded build a `ThreadPoolExecutor`, its threads already run in parallel
+    * On Python 3.14+ an `InterpreterPoolExecutor`, each subinterpreter has its own GIL
+    * Otherwise a `ProcessPoolExecutor`
+
+    Only the `ThreadPoolExecutor` can be passed to `PHXChannelsClient.start_processing`, handlers submitted to the
+    others must be wrapped with `parallel_handler`.
+    """
+    if free_threaded():
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+    interpreter_pool_executor: Optional[Callable[..., Executor]] = getattr(
+        concurrent.futures,
+        'InterpreterPoolExecutor',
+        None,
+    )
+    if interpreter_pool_executor is not None:
+        return interpreter_pool_executor(max_workers=max_workers)
+
+    return ProcessPoolExecutor(max_workers=max_workers)
+
+
+def parallel_handler(handler: ParallelHandlerFunction, executor: Executor) -> CoroutineHandler:
+    """Wrap a CPU heavy sync handler to run it in a `parallel_executor` without blocking the other handlers
+
+    `handler` is given the message as JSON bytes with `topic`, `event`, `ref` and `payload` keys, bytes are copied
+    between interpreters and processes without pickling the message. It must be a module level function so other
+    interpreters and processes can import it, and it can't use the client.
+    """
+    @wraps(handler)
+    async def run_parallel_handler(message: ChannelMessage, client: object) -> None:
+        message_bytes = json_handler.dumps({
+            'topic': message.topic,
+            'event': message.event,
+            'ref': message.ref,
+            'payload': message.payload,
+        })
+        await asyncio.get_running_loop().run_in_executor(executor, handler, message_bytes)
+
+    return run_parallel_handler
@@ -1,12 +1,15 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, unique
 from functools import cached_property
-from typing import Any, NewType, Optional, Protocol, TYPE_CHECKING, Union
+from typing import Any, Callable, NewType, Optional, Protocol, TYPE_CHECKING, Union
 
 
 if TYPE_CHECKING:
     from phx_events.client import PHXChannelsClient
+    from phx_events.expiry import MessageExpiry
+    from phx_events.schema import PayloadDecoder
+    from phx_events.streaming import PayloadPath
 
 
 Topic = NewType('Topic', str)
@@ -40,6 +43,8 @@ class CoroutineHandler(Protocol):
 
 
 ChannelHandlerFunction = Union[ExecutorHandler, CoroutineHandler]
+# Called with the messages still queued when a drain runs out of time so they can be persisted or reported
+UndeliveredMessageHandler = Callable[[list[ChannelMessage]], None]
 
 
 @dataclass()
@@ -53,11 +58,25 @@ class EventHandlerConfig:
                                                                     topics specified in the mapping.
         task (asyncio.Task): The task that consumes off the `queue` and determines which `default_handlers` and
                              `topic_handlers` to run.
+        handler_timeouts (dict[ChannelHandlerFunction, float]): Maximum number of seconds each handler may take to
+                                                                process a message for this event.
+        optional_handlers (set[ChannelHandlerFunction]): Handlers that are skipped while the client is shedding load.
+        expiry (Optional[MessageExpiry]): Maximum age of messages for the event, expired messages are not dispatched.
+        stream_path (Optional[PayloadPath]): Path to a large list or dict in the payload that is given to the handlers
+                                             as `PayloadItems`, converted as the handlers use it.
+        payload_decoder (Optional[PayloadDecoder]): Decodes the payload into the event's schema when it's parsed.
+        current_messages (dict[int, ChannelMessage]): The messages the handlers are running for, by `id(message)`
     """
     queue: asyncio.Queue[ChannelMessage]
     default_handlers: list[ChannelHandlerFunction]
     topic_handlers: dict[Topic, list[ChannelHandlerFunction]]
     task: asyncio.Task[None]
+    handler_timeouts: dict[ChannelHandlerFunction, float] = field(default_factory=dict)
+    optional_handlers: set[ChannelHandlerFunction] = field(default_factory=set)
+    expiry: Optional['MessageExpiry'] = None
+    stream_path: Optional['PayloadPath'] = None
+    payload_decoder: Optional['PayloadDecoder'] = None
+    current_messages: dict[int, ChannelMessage] = field(default_factory=dict)
 
 
 @unique
@@ -94,8 +113,19 @@ class BasePHXMessage:
 @dataclass(frozen=True)
 class PHXMessage(BasePHXMessage):
     event: Event
+    # Set by make_message, orjson doesn't serialise attributes starting with an underscore so it isn't sent
+    _decoded_payload: Any = field(default=None, init=False, repr=False)
+    # Set by DurableInbox.track to the entry id the frame was written to the inbox under
+    _inbox_entry_id: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def decoded_payload(self) -> Any:
+        """The payload decoded into the schema registered for the event, if there is one"""
+        return self._decoded_payload
 
 
 @dataclass(frozen=True)
 class PHXEventMessage(BasePHXMessage):
     event: PHXEvent
+    # Set by DurableInbox.track to the entry id the frame was written to the inbox under
+    _inbox_entry_id: Optional[int] = field(default=None, init=False, repr=False, compare=False)
@@ -0,0 +1,135 @@
+from typing import Any, Callable, Optional
+
+from phx_events.phx_messages import ChannelMessage, Event, Topic
+
+
+PRESENCE_STATE_EVENT = Event('presence_state')
+PRESENCE_DIFF_EVENT = Event('presence_diff')
+
+PresenceEntry = dict[str, Any]
+PresenceMap = dict[str, PresenceEntry]
+# Called with the topic, presence key, the current entry for the key (None for a new key) and the joined/left entry
+PresenceCallback = Callable[[Topic, str, Optional[PresenceEntry], PresenceEntry], None]
+
+
+def _meta_refs(presence_entry: PresenceEntry) -> set[str]:
+    return {meta['phx_ref'] for meta in presence_entry['metas']}
+
+
+class Presence:
+    """Tracks Phoenix Presence state for each topic from `presence_state` and `presence_diff` messages
+
+    Pass an instance to `PHXChannelsClient` to have presence messages applied in the order they are received.
+    A `presence_diff` is applied in time proportional to the size of the diff rather than the size of the topic.
+    Diffs received before the first `presence_state` for a topic are held until the state arrives, in the same way as
+    the Phoenix JavaScript client.
+
+    Args:
+        on_join (Optional[PresenceCallback]): Called when metas are added for a presence key
+        on_leave (Optional[PresenceCallback]): Called when metas are removed for a presence key
+    """
+    on_join: Optional[PresenceCallback]
+    on_leave: Optional[PresenceCallback]
+
+    _state: dict[Topic, PresenceMap]
+    _pending_diffs: dict[Topic, list[dict[str, PresenceMap]]]
+
+    def __init__(self, on_join: Optional[PresenceCallback] = None, on_leave: Optional[PresenceCallback] = None):
+        self.on_join = on_join
+        self.on_leave = on_leave
+
+        self._state = {}
+        self._pending_diffs = {}
+
+    def _join(self, topic: Topic, key: str, joined_entry: PresenceEntry) -> None:
+        topic_state = self._state[topic]
+        current_entry = topic_state.get(key)
+
+        if current_entry is None:
+            topic_state[key] = {**joined_entry, 'metas': list(joined_entry['metas'])}
+        else:
+            current_refs = _meta_refs(current_entry)
+            new_metas = [meta for meta in joined_entry['metas'] if meta['phx_ref'] not in current_refs]
+            topic_state[key] = {**joined_entry, 'metas': current_entry['metas'] + new_metas}
+
+        if self.on_join is not None:
+            self.on_join(topic, key, current_entry, joined_entry)
+
+    def _leave(self, topic: Topic, key: str, left_entry: PresenceEntry) -> None:
+        topic_state = self._state[topic]
+        current_entry = topic_state.get(key)
+        if current_entry is None:
+            return
+
+        left_refs = _meta_refs(left_entry)
+        current_entry['metas'] = [meta for meta in current_entry['metas'] if meta['phx_ref'] not in left_refs]
+
+        if self.on_leave is not None:
+            self.on_leave(topic, key, current_entry, left_entry)
+
+        if not current_entry['metas']:
+            del topic_state[key]
+
+    def _apply_diff(self, topic: Topic, diff: dict[str, PresenceMap]) -> None:
+        for key, joined_entry in diff.get('joins', {}).items():
+            self._join(topic, key, joined_entry)
+
+        for key, left_entry in diff.get('leaves', {}).items():
+            self._leave(topic, key, left_entry)
+
+    def sync_state(self, topic: Topic, new_state: PresenceMap) -> None:
+        current_state = self._state.get(topic, {})
+        self._state[topic] = current_state
+
+        joins: PresenceMap = {}
+        # Copy the metas because _leave removes them from the current entry
+        leaves: PresenceMap = {
+            key: {**current_entry, 'metas': list(current_entry['metas'])}
+            for key, current_entry in current_state.items()
+            if key not in new_state
+        }
+
+        for key, new_entry in new_state.items():
+            current_entry = current_state.get(key)
+            if current_entry is None:
+                joins[key] = new_entry
+                continue
+
+            new_refs = _meta_refs(new_entry)
+            current_refs = _meta_refs(current_entry)
+            if joined_metas := [meta for meta in new_entry['metas'] if meta['phx_ref'] not in current_refs]:
+                joins[key] = {**new_entry, 'metas': joined_metas}
+            if left_metas := [meta for meta in current_entry['metas'] if meta['phx_ref'] not in new_refs]:
+                leaves[key] = {**current_entry, 'metas': left_metas}
+
+        self._apply_diff(topic, {'joins': joins, 'leaves': leaves})
+
+        # Apply any diffs that arrived before the state
+        for pending_diff in self._pending_diffs.pop(topic, []):
+            self._apply_diff(topic, pending_diff)
+
+    def sync_diff(self, topic: Topic, diff: dict[str, PresenceMap]) -> None:
+        if topic not in self._state:
+            self._pending_diffs.setdefault(topic, []).append(diff)
+            return
+
+        self._apply_diff(topic, diff)
+
+    def apply_message(self, message: ChannelMessage) -> None:
+        if message.event == PRESENCE_STATE_EVENT:
+            self.sync_state(message.topic, message.payload)
+        elif message.event == PRESENCE_DIFF_EVENT:
+            self.sync_diff(message.topic, message.payload)
+
+    def list(self, topic: Topic) -> list[PresenceEntry]:
+        return list(self._state.get(topic, {}).values())
+
+    def get(self, topic: Topic, key: str) -> Optional[PresenceEntry]:
+        return self._state.get(topic, {}).get(key)
+
+    def count(self, topic: Topic) -> int:
+        return len(self._state.get(topic, {}))
+
+    def clear(self, topic: Topic) -> None:
+        self._state.pop(topic, None)
+        self._pending_diffs.pop(topic, None)
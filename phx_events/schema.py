@@ -0,0 +1,212 @@
+from dataclasses import fields, is_dataclass, MISSING
+from decimal import Decimal, InvalidOperation
+from enum import Enum
+from typing import Any, Callable, cast, get_args, get_origin, get_type_hints, Union
+
+from phx_events.exceptions import PayloadValidationError
+
+
+# Turns a payload into an instance of the schema it was compiled from
+PayloadDecoder = Callable[[Any], Any]
+# Converts a value, the path is only used for error messages
+_Converter = Callable[[Any, str], Any]
+
+_NONE_TYPE = type(None)
+
+
+def _type_name(value: Any) -> str:
+    return type(value).__name__
+
+
+def _is_typed_dict(schema: Any) -> bool:
+    return isinstance(schema, type) and issubclass(schema, dict) and hasattr(schema, '__total__')
+
+
+def _exact_type_converter(expected_type: type) -> _Converter:
+    def convert(value: Any, path: str) -> Any:
+        # bool is an int, but True is never a valid count
+        if not isinstance(value, expected_type) or (isinstance(value, bool) and expected_type is not bool):
+            raise PayloadValidationError(path, f'expected {expected_type.__name__}, got {_type_name(value)}')
+        return value
+
+    return convert
+
+
+def _convert_decimal(value: Any, path: str) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+
+    if isinstance(value, (int, float, str)) and not isinstance(value, bool):
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            pass
+
+    raise PayloadValidationError(path, f'expected Decimal, got {_type_name(value)} {value!r}')
+
+
+def _convert_float(value: Any, path: str) -> float:
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return float(value)
+
+    raise PayloadValidationError(path, f'expected float, got {_type_name(value)}')
+
+
+def _optional_converter(converter: _Converter) -> _Converter:
+    def convert(value: Any, path: str) -> Any:
+        return None if value is None else converter(value, path)
+
+    return convert
+
+
+def _union_converter(converters: list[_Converter], type_names: str) -> _Converter:
+    def convert(value: Any, path: str) -> Any:
+        for converter in converters:
+            try:
+                return converter(value, path)
+            except PayloadValidationError:
+                continue
+
+        raise PayloadValidationError(path, f'expected {type_names}, got {_type_name(value)}')
+
+    return convert
+
+
+def _list_converter(item_converter: _Converter, result_type: type) -> _Converter:
+    def convert(value: Any, path: str) -> Any:
+        if not isinstance(value, list):
+            raise PayloadValidationError(path, f'expected list, got {_type_name(value)}')
+        return result_type(item_converter(item, f'{path}[{index}]') for index, item in enumerate(value))
+
+    return convert
+
+
+def _dict_converter(value_converter: _Converter) -> _Converter:
+    def convert(value: Any, path: str) -> Any:
+        if not isinstance(value, dict):
+            raise PayloadValidationError(path, f'expected dict, got {_type_name(value)}')
+        return {key: value_converter(item, f'{path}.{key}') for key, item in value.items()}
+
+    return convert
+
+
+def _enum_converter(enum_type: type[Enum]) -> _Converter:
+    def convert(value: Any, path: str) -> Any:
+        try:
+            return enum_type(value)
+        except ValueError:
+            raise PayloadValidationError(path, f'{value!r} is not a valid {enum_type.__name__}') from None
+
+    return convert
+
+
+def _fields_converter(
+    schema: type,
+    field_converters: dict[str, _Converter],
+    required_fields: frozenset[str],
+    build: Callable[..., Any],
+) -> _Converter:
+    def convert(value: Any, path: str) -> Any:
+        if not isinstance(value, dict):
+            raise PayloadValidationError(path, f'expected {schema.__name__}, got {_type_name(value)}')
+
+        if missing_fields := required_fields - value.keys():
+            raise PayloadValidationError(path, f'missing {schema.__name__} fields {sorted(missing_fields)}')
+
+        # Keys that aren't in the schema are left out
+        field_values = {
+            name: converter(value[name], f'{path}.{name}')
+            for name, converter in field_converters.items()
+            if name in value
+        }
+        try:
+            return build(**field_values)
+        except (TypeError, ValueError) as exception:
+            # e.g. raised by a dataclass __post_init__ rejecting the values
+            raise PayloadValidationError(path, f'invalid {schema.__name__} - {exception}') from exception
+
+    return convert
+
+
+def _compile(schema: Any, compiled: dict[type, _Converter]) -> _Converter:  # noqa: C901
+    if schema is Any:
+        return lambda value, path: value
+
+    if schema in compiled:
+        return compiled[schema]
+
+    origin, type_args = get_origin(schema), get_args(schema)
+    if origin is Union:
+        non_none_types = [type_arg for type_arg in type_args if type_arg is not _NONE_TYPE]
+        if len(non_none_types) == 1:
+            return _optional_converter(_compile(non_none_types[0], compiled))
+
+        type_names = ' or '.join(getattr(type_arg, '__name__', repr(type_arg)) for type_arg in type_args)
+        return _union_converter([_compile(type_arg, compiled) for type_arg in type_args], type_names)
+
+    if origin is list:
+        return _list_converter(_compile(type_args[0] if type_args else Any, compiled), list)
+    if origin is tuple and len(type_args) == 2 and type_args[1] is Ellipsis:
+        return _list_converter(_compile(type_args[0], compiled), tuple)
+    if origin is dict:
+        return _dict_converter(_compile(type_args[1] if type_args else Any, compiled))
+
+    if schema is Decimal:
+        return _convert_decimal
+    if schema is float:
+        return _convert_float
+    if schema in (int, str, bool, _NONE_TYPE, list, dict):
+        return _exact_type_converter(schema)
+    if isinstance(schema, type) and issubclass(schema, Enum):
+        return _enum_converter(schema)
+
+    if not is_dataclass(schema) and not _is_typed_dict(schema):
+        raise TypeError(f'Unsupported payload schema type {schema!r}')
+
+    # Register a forward reference first so self-referencing schemas compile
+    converter_holder: list[_Converter] = []
+    compiled[schema] = lambda value, path: converter_holder[0](value, path)
+
+    type_hints = get_type_hints(schema)
+    if is_dataclass(schema):
+        schema_fields = [schema_field for schema_field in fields(schema) if schema_field.init]
+        required_fields = frozenset(
+            schema_field.name
+            for schema_field in schema_fields
+            if schema_field.default is MISSING and schema_field.default_factory is MISSING
+        )
+        field_names = [schema_field.name for schema_field in schema_fields]
+        build = cast(Callable[..., Any], schema)
+    else:
+        required_fields = frozenset(schema.__required_keys__)
+        field_names = list(type_hints)
+        build = dict
+
+    field_converters = {name: _compile(type_hints[name], compiled) for name in field_names}
+    converter = _fields_converter(schema, field_converters, required_fields, build)
+    converter_holder.append(converter)
+    # Only fields that refer back to the schema go through the forward reference
+    compiled[schema] = converter
+
+    return converter
+
+
+def compile_decoder(schema: type) -> PayloadDecoder:
+    """Compile a dataclass or TypedDict into a decoder that validates and converts payloads into the schema
+
+    The schema's type hints are read once, so decoding each payload only runs the converters for its fields.
+    Supported field types are `int`, `float`, `Decimal`, `str`, `bool`, `Any`, `Enum` subclasses, `Optional` and
+    `Union`, `list`, `tuple[X, ...]`, `dict` and nested dataclasses or TypedDicts. `Decimal` fields are built from
+    the number the payload was parsed into, which only keeps as many digits as a float, so send numbers as strings
+    to keep every digit. Dataclasses declared with `__slots__` keep the decoded objects small. Errors raised while
+    building a schema, e.g. by a `__post_init__`, are raised as `PayloadValidationError`.
+
+    Raises:
+        TypeError: If the schema uses a type that isn't supported
+    """
+    converter = _compile(schema, {})
+
+    def decode(payload: Any) -> Any:
+        return converter(payload, 'payload')
+
+    return decode
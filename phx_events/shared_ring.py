@@ -0,0 +1,195 @@
+import asyncio
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import os
+import struct
+import sys
+import time
+from typing import cast, Iterator, Optional, Sequence, Union
+import zlib
+
+from phx_events.phx_messages import ChannelMessage, PHXEventMessage, Topic
+
+
+_POSITION = struct.Struct('=Q')
+_FRAME_HEADER = struct.Struct('=I')
+# Marks the rest of the buffer as unused, the next frame starts back at the beginning
+_WRAP_MARKER = 0xFFFFFFFF
+
+# The producer's and consumer's positions are on separate cache lines so updating one doesn't slow down the other
+_WRITE_POSITION_OFFSET = 0
+_CAPACITY_OFFSET = 8
+_CLOSED_OFFSET = 16
+_READ_POSITION_OFFSET = 64
+_DATA_OFFSET = 128
+
+
+class SharedRingBuffer:
+    """Carries raw frame bytes from one producer process to one consumer process through shared memory
+
+    The producer creates the ring and a consumer attaches to it by `name` with `create=False`. There are no locks: the
+    write position is only updated by the producer and the read position only by the consumer, each after the frames
+    they cover are written or read, so each side only waits when the ring is full or empty.
+
+    Frames are copied straight into the shared memory, so nothing is pickled. Reading a batch copies the frames out
+    and then frees their space with a single update of the read position.
+    """
+    name: str
+    capacity: int
+
+    _shared_memory: SharedMemory
+    _buffer: memoryview
+    _created: bool
+    _detached: bool
+
+    def __init__(self, name: Optional[str] = None, capacity: int = 2**24, create: bool = True):
+        if create:
+            self._shared_memory = SharedMemory(name=name, create=True, size=_DATA_OFFSET + capacity)
+        elif sys.version_info >= (3, 13):
+            self._shared_memory = SharedMemory(name=name, track=False)
+        else:
+            self._shared_memory = SharedMemory(name=name)
+            # Attaching registers the memory with this process's resource tracker, which would free it when this
+            # process exits even though the producer and other consumers are still using it
+            if os.name == 'posix':
+                resource_tracker.unregister(self._shared_memory._name, 'shared_memory')  # type: ignore[attr-defined]
+
+        self._buffer = cast(memoryview, self._shared_memory.buf)
+        if create:
+            _POSITION.pack_into(self._buffer, _CAPACITY_OFFSET, capacity)
+
+        self.name = self._shared_memory.name
+        # Attached rings use the producer's capacity, the shared memory may have been rounded up to a page size
+        self.capacity = self._read_position(_CAPACITY_OFFSET)
+        self._created = create
+        self._detached = False
+
+    def _read_position(self, offset: int) -> int:
+        (position,) = _POSITION.unpack_from(self._buffer, offset)
+        return position
+
+    def _space_needed(self, write_position: int, frame_length: int) -> int:
+        # Frames aren't split over the end of the buffer, the space left there is skipped instead
+        space_to_end = self.capacity - write_position % self.capacity
+        frame_size = _FRAME_HEADER.size + frame_length
+        return frame_size if frame_size <= space_to_end else space_to_end + frame_size
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._read_position(_CLOSED_OFFSET))
+
+    def __len__(self) -> int:
+        """Number of bytes waiting to be read"""
+        return self._read_position(_WRITE_POSITION_OFFSET) - self._read_position(_READ_POSITION_OFFSET)
+
+    def try_write(self, frame: bytes) -> bool:
+        """Write the frame if there's space for it, returns whether it was written"""
+        if _FRAME_HEADER.size + len(frame) > self.capacity:
+            raise ValueError(f'Frame of {len(frame)} bytes is larger than the ring buffer')
+
+        write_position = self._read_position(_WRITE_POSITION_OFFSET)
+        free_space = self.capacity - (write_position - self._read_position(_READ_POSITION_OFFSET))
+        if self._space_needed(write_position, len(frame)) > free_space:
+            return False
+
+        offset = write_position % self.capacity
+        space_to_end = self.capacity - offset
+        if _FRAME_HEADER.size + len(frame) > space_to_end:
+            if space_to_end >= _FRAME_HEADER.size:
+                _FRAME_HEADER.pack_into(self._buffer, _DATA_OFFSET + offset, _WRAP_MARKER)
+            write_position += space_to_end
+            offset = 0
+
+        frame_offset = _DATA_OFFSET + offset
+        _FRAME_HEADER.pack_into(self._buffer, frame_offset, len(frame))
+        frame_start = frame_offset + _FRAME_HEADER.size
+        self._buffer[frame_start:frame_start + len(frame)] = frame
+
+        # Published last so the consumer never sees a partly written frame
+        _POSITION.pack_into(self._buffer, _WRITE_POSITION_OFFSET, write_position + _FRAME_HEADER.size + len(frame))
+        return True
+
+    async def write(self, frame: bytes, poll_interval: float = 0.0005) -> None:
+        """Write the frame, waiting for the consumer to free up space while the ring is full"""
+        while not self.try_write(frame):
+            await asyncio.sleep(poll_interval)
+
+    def read_batch(self, max_frames: int = 1000) -> list[bytes]:
+        """Up to `max_frames` frames in the order they were written, empty if none are waiting"""
+        write_position = self._read_position(_WRITE_POSITION_OFFSET)
+        read_position = self._read_position(_READ_POSITION_OFFSET)
+
+        frames: list[bytes] = []
+        while read_position < write_position and len(frames) < max_frames:
+            offset = read_position % self.capacity
+            space_to_end = self.capacity - offset
+            if space_to_end < _FRAME_HEADER.size:
+                read_position += space_to_end
+                continue
+
+            (frame_length,) = _FRAME_HEADER.unpack_from(self._buffer, _DATA_OFFSET + offset)
+            if frame_length == _WRAP_MARKER:
+                read_position += space_to_end
+                continue
+
+            frame_start = _DATA_OFFSET + offset + _FRAME_HEADER.size
+            frames.append(bytes(self._buffer[frame_start:frame_start + frame_length]))
+            read_position += _FRAME_HEADER.size + frame_length
+
+        _POSITION.pack_into(self._buffer, _READ_POSITION_OFFSET, read_position)
+        return frames
+
+    def batches(self, max_frames: int = 1000, poll_interval: float = 0.0005) -> Iterator[list[bytes]]:
+        """Batches of frames as they're written, until the producer closes the ring and it has been read"""
+        while True:
+            # Checked before reading so frames written just before closing are still returned
+            closed = self.closed
+            if frames := self.read_batch(max_frames):
+                yield frames
+            elif closed:
+                return
+            else:
+                time.sleep(poll_interval)
+
+    def close_writer(self) -> None:
+        """Let the consumer know no more frames will be written"""
+        _POSITION.pack_into(self._buffer, _CLOSED_OFFSET, 1)
+
+    def close(self) -> None:
+        """Detach from the shared memory, the producer also frees it"""
+        if self._detached:
+            return
+
+        self._detached = True
+        self._shared_memory.close()
+        if self._created:
+            self._shared_memory.unlink()
+
+
+class SharedRingPublisher:
+    """Publishes the frames a client receives to consumer processes, each reading its own `SharedRingBuffer`
+
+    Each topic's frames always go to the same ring so a consumer sees them in order, and each ring has a single
+    producer and consumer so no locks are needed. Reading from the websocket waits while a topic's ring is full.
+    Phoenix admin events aren't published. Closing the publisher frees the rings the client created, consumers that
+    are already attached can still read the frames left in them.
+    """
+    rings: Sequence[SharedRingBuffer]
+
+    def __init__(self, rings: Sequence[SharedRingBuffer]):
+        self.rings = rings
+
+    def ring_for(self, topic: Topic) -> SharedRingBuffer:
+        # crc32 rather than hash() so consumers can work out which topics they'll be sent
+        return self.rings[zlib.crc32(topic.encode()) % len(self.rings)]
+
+    async def publish(self, message: ChannelMessage, frame: Union[str, bytes]) -> None:
+        if isinstance(message, PHXEventMessage):
+            return
+
+        await self.ring_for(message.topic).write(frame.encode() if isinstance(frame, str) else frame)
+
+    def close(self) -> None:
+        for ring in self.rings:
+            ring.close_writer()
+            ring.close()
@@ -0,0 +1,187 @@
+from bisect import bisect_left, bisect_right, insort
+from decimal import Decimal
+from numbers import Real
+from typing import Any, Callable, Hashable, Iterable, Optional, TYPE_CHECKING
+
+from phx_events.phx_messages import ChannelMessage
+
+
+if TYPE_CHECKING:
+    from phx_events.client import PHXChannelsClient
+
+
+# Returns the key a message is stored under
+KeyFunction = Callable[[ChannelMessage], Hashable]
+# Called with the currently stored value (None if there isn't one) and the message, returns the new value to store
+Reducer = Callable[[Optional[Any], ChannelMessage], Any]
+# Called with the key, the old value and the new value after the store changes
+ChangeCallback = Callable[[Hashable, Optional[Any], Any], None]
+
+
+def _ordering_kind(field_value: Any) -> type:
+    # Numbers of any type can be ordered against each other, other values only against values of their own type
+    return Real if isinstance(field_value, (Real, Decimal)) else type(field_value)
+
+
+def topic_key(message: ChannelMessage) -> Hashable:
+    return message.topic
+
+
+def latest_payload(_current_value: Optional[Any], message: ChannelMessage) -> Any:
+    return message.payload
+
+
+class SecondaryIndex:
+    """Index of stored keys by a field of the stored values
+
+    Keeps a hash map for point lookups and sorted lists of the distinct field values for range queries, one list for
+    numbers and one for each other type of value, so a range query only returns values of the same kind as its bounds.
+    Values that don't have the field, or whose field value is `None`, can't be hashed (e.g. a list) or can't be
+    ordered against the other values of its kind (e.g. complex numbers), are not indexed.
+    """
+    field: str
+
+    _keys_by_value: dict[Any, set[Hashable]]
+    _sorted_values: dict[type, list[Any]]
+
+    def __init__(self, field: str):
+        self.field = field
+
+        self._keys_by_value = {}
+        self._sorted_values = {}
+
+    def field_value(self, value: Any) -> Optional[Any]:
+        if not isinstance(value, dict):
+            return None
+
+        return value.get(self.field)
+
+    def add(self, key: Hashable, value: Any) -> None:
+        if (field_value := self.field_value(value)) is None:
+            return
+
+        try:
+            keys = self._keys_by_value.get(field_value)
+        except TypeError:
+            return
+
+        if keys is None:
+            try:
+                insort(self._sorted_values.setdefault(_ordering_kind(field_value), []), field_value)
+            except TypeError:
+                return
+
+            keys = self._keys_by_value[field_value] = set()
+
+        keys.add(key)
+
+    def remove(self, key: Hashable, value: Any) -> None:
+        self.remove_field_value(key, self.field_value(value))
+
+    def remove_field_value(self, key: Hashable, field_value: Optional[Any]) -> None:
+        if field_value is None:
+            return
+
+        keys = self.lookup(field_value)
+        if not keys:
+            return
+
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_value[field_value]
+            sorted_values = self._sorted_values[_ordering_kind(field_value)]
+            del sorted_values[bisect_left(sorted_values, field_value)]
+
+    def lookup(self, field_value: Any) -> set[Hashable]:
+        try:
+            return self._keys_by_value.get(field_value, set())
+        except TypeError:
+            return set()
+
+    def range(self, low: Any, high: Any) -> Iterable[Hashable]:
+        """Keys whose field value is between `low` and `high` inclusive, in field value order"""
+        if _ordering_kind(low) is not _ordering_kind(high):
+            return
+
+        sorted_values = self._sorted_values.get(_ordering_kind(low), [])
+        start = bisect_left(sorted_values, low)
+        end = bisect_right(sorted_values, high)
+
+        for field_value in sorted_values[start:end]:
+            yield from self._keys_by_value[field_value]
+
+
+class MaterializedView:
+    """In-memory keyed store built from messages, to share between handlers instead of keeping separate dicts
+
+    Register `MaterializedView.handle_message` as a handler for the events to store.
+    Each message is stored under `key_function(message)` (the topic by default) as the result of
+    `reducer(current_value, message)` (the latest payload by default). A reducer can return `None` to delete the key.
+
+    Updates happen in the event loop and reads are plain dictionary lookups, so reading never waits on the socket.
+
+    Args:
+        key_function (KeyFunction): Returns the key to store a message under
+        reducer (Reducer): Combines the stored value and a message into the new stored value
+        indexes (Iterable[str]): Fields of the stored values to build a `SecondaryIndex` for
+    """
+    key_function: KeyFunction
+    reducer: Reducer
+    indexes: dict[str, SecondaryIndex]
+
+    _values: dict[Hashable, Any]
+    _change_callbacks: list[ChangeCallback]
+
+    def __init__(
+        self,
+        key_function: KeyFunction = topic_key,
+        reducer: Reducer = latest_payload,
+        indexes: Iterable[str] = (),
+    ):
+        self.key_function = key_function
+        self.reducer = reducer
+        self.indexes = {field: SecondaryIndex(field) for field in indexes}
+
+        self._values = {}
+        self._change_callbacks = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def subscribe(self, callback: ChangeCallback) -> None:
+        self._change_callbacks.append(callback)
+
+    def apply(self, message: ChannelMessage) -> None:
+        key = self.key_function(message)
+        old_value = self._values.get(key)
+        # Read before the reducer runs since a reducer can update the stored value in place
+        old_field_values = {field: index.field_value(old_value) for field, index in self.indexes.items()}
+        new_value = self.reducer(old_value, message)
+
+        for field, index in self.indexes.items():
+            index.remove_field_value(key, old_field_values[field])
+
+        if new_value is None:
+            self._values.pop(key, None)
+        else:
+            self._values[key] = new_value
+            for index in self.indexes.values():
+                index.add(key, new_value)
+
+        for callback in self._change_callbacks:
+            callback(key, old_value, new_value)
+
+    async def handle_message(self, message: ChannelMessage, client: 'PHXChannelsClient') -> None:
+        self.apply(message)
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Optional[Any]:
+        return self._values.get(key, default)
+
+    def lookup(self, field: str, field_value: Any) -> list[Any]:
+        return [self._values[key] for key in self.indexes[field].lookup(field_value)]
+
+    def range(self, field: str, low: Any, high: Any) -> list[Any]:
+        return [self._values[key] for key in self.indexes[field].range(low, high)]
@@ -0,0 +1,71 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence, Union
+
+from phx_events.json_handler import deep_float_replace
+
+
+# Keys and list indexes leading from the payload to a large value
+PayloadPath = Sequence[Union[str, int]]
+
+
+class PayloadItems:
+    """A large list or dict in a payload whose elements are converted to `json_handler` types as they're used
+
+    Converting a whole snapshot's floats to `Decimal` at once blocks the event loop and briefly doubles the memory
+    used by the payload. Iterating converts one element at a time instead, and `chunks` converts the elements in an
+    executor so a coroutine handler doesn't block the loop while working through a snapshot.
+
+    Iterating a list gives its elements and iterating a dict gives its `(key, value)` pairs.
+    """
+    _items: Union[list[Any], dict[str, Any]]
+
+    def __init__(self, items: Union[list[Any], dict[str, Any]]):
+        self._items = items
+
+    def _raw_items(self) -> Iterator[Any]:
+        return iter(self._items.items()) if isinstance(self._items, dict) else iter(self._items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(deep_float_replace, self._raw_items())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({len(self)} items)'
+
+    async def chunks(self, chunk_size: int = 1000, executor: Optional[Executor] = None) -> AsyncIterator[list[Any]]:
+        """Lists of up to `chunk_size` converted elements, each converted in `executor` (the loop's default if unset)"""
+        loop = asyncio.get_running_loop()
+        raw_items = self._raw_items()
+
+        def convert_chunk() -> list[Any]:
+            return [deep_float_replace(item) for _, item in zip(range(chunk_size), raw_items)]
+
+        while chunk := await loop.run_in_executor(executor, convert_chunk):
+            yield chunk
+
+
+def defer_payload_items(value: Any, path: PayloadPath) -> Any:
+    """`json_handler.deep_float_replace` for all of `value` except the list or dict at `path`, which is wrapped in
+    `PayloadItems` to be converted as it's used
+    """
+    if not path:
+        return PayloadItems(value) if isinstance(value, (list, dict)) else deep_float_replace(value)
+
+    key, *remaining_path = path
+    if isinstance(value, dict):
+        return {
+            item_key: defer_payload_items(item, remaining_path) if item_key == key else deep_float_replace(item)
+            for item_key, item in value.items()
+        }
+
+    if isinstance(value, list) and isinstance(key, int):
+        deferred_index = key % len(value) if -len(value) <= key < len(value) else None
+        return [
+            defer_payload_items(item, remaining_path) if index == deferred_index else deep_float_replace(item)
+            for index, item in enumerate(value)
+        ]
+
+    return deep_float_replace(value)
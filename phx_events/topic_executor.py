@@ -0,0 +1,170 @@
+from collections import deque
+from concurrent.futures import Executor, Future
+import os
+from threading import Condition, Lock, Thread
+from typing import Any, Callable, Hashable, Iterable, Optional
+
+
+_WorkItem = tuple[Future, Callable[..., Any], tuple[Any, ...], dict[str, Any]]
+
+
+class _Worker:
+    """
+    Args:
+        pinned (deque[_WorkItem]): Work for ordered topics, only run by this worker in submission order
+        stealable (deque[_WorkItem]): Work for unordered topics, idle workers take it from the front
+    """
+    index: int
+    pinned: deque[_WorkItem]
+    stealable: deque[_WorkItem]
+    wake_up: Condition
+    idle: bool
+
+    def __init__(self, index: int, lock: Lock):
+        self.index = index
+        self.pinned = deque()
+        self.stealable = deque()
+        self.wake_up = Condition(lock)
+        self.idle = False
+
+
+class TopicAffinityExecutor(Executor):
+    """Runs each topic's sync handlers on the same worker thread
+
+    A topic's handlers run one at a time in the order they were submitted, so handlers that keep per-topic state don't
+    need locks and the state stays warm in one thread's cache. Topics in `unordered_topics` aren't pinned - their work
+    is queued on the topic's worker but an idle worker takes it when the topic's worker is busy. Work submitted without
+    a topic (e.g. through `loop.run_in_executor`) is treated as unordered.
+
+    Pass it to `PHXChannelsClient.start_processing` as the executor pool.
+    """
+    max_workers: int
+    unordered_topics: frozenset[Hashable]
+    stolen: int
+
+    _workers: list[_Worker]
+    _threads: list[Thread]
+    _lock: Lock
+    _next_worker: int
+    _shutdown: bool
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        unordered_topics: Iterable[Hashable] = (),
+        thread_name_prefix: str = 'phx_events_topic_worker',
+    ):
+        # The same default as ThreadPoolExecutor
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        if self.max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+
+        self.unordered_topics = frozenset(unordered_topics)
+        self.stolen = 0
+
+        self._lock = Lock()
+        self._workers = [_Worker(index, self._lock) for index in range(self.max_workers)]
+        self._next_worker = 0
+        self._shutdown = False
+        self._threads = [
+            Thread(target=self._run_worker, args=(worker,), name=f'{thread_name_prefix}_{worker.index}', daemon=True)
+            for worker in self._workers
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def worker_for(self, topic: Hashable) -> int:
+        return hash(topic) % self.max_workers
+
+    def _take_work(self, worker: _Worker) -> Optional[_WorkItem]:
+        if worker.pinned:
+            return worker.pinned.popleft()
+        if worker.stealable:
+            return worker.stealable.popleft()
+
+        # Steal the oldest unordered work from the worker with the most waiting
+        busiest_worker = max(self._workers, key=lambda other_worker: len(other_worker.stealable))
+        if busiest_worker.stealable:
+            self.stolen += 1
+            return busiest_worker.stealable.popleft()
+
+        return None
+
+    @staticmethod
+    def _wake_up(worker: _Worker) -> None:
+        # Cleared here rather than by the worker so work submitted before it wakes up goes to another worker
+        worker.idle = False
+        worker.wake_up.notify()
+
+    def _run_worker(self, worker: _Worker) -> None:
+        while True:
+            with self._lock:
+                while (work_item := self._take_work(worker)) is None and not self._shutdown:
+                    worker.idle = True
+                    worker.wake_up.wait()
+
+            if work_item is None:
+                return
+
+            work_future, function, args, kwargs = work_item
+            if not work_future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                result = function(*args, **kwargs)
+            except BaseException as exception:
+                work_future.set_exception(exception)
+            else:
+                work_future.set_result(result)
+
+    def _queue(
+        self,
+        worker_index: int,
+        pinned: bool,
+        function: Callable[..., Any],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Future:
+        work_future: Future = Future()
+
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new work after shutdown')
+
+            worker = self._workers[worker_index]
+            (worker.pinned if pinned else worker.stealable).append((work_future, function, args, kwargs))
+
+            # Hand unordered work to an idle worker straight away rather than waiting on a busy one
+            if not pinned and not worker.idle:
+                worker = next((other_worker for other_worker in self._workers if other_worker.idle), worker)
+
+            self._wake_up(worker)
+
+        return work_future
+
+    def submit_for_topic(self, topic: Hashable, function: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        pinned = topic not in self.unordered_topics
+        return self._queue(self.worker_for(topic), pinned, function, *args, **kwargs)
+
+    def submit(self, function: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        with self._lock:
+            worker_index = self._next_worker
+            self._next_worker = (self._next_worker + 1) % self.max_workers
+
+        return self._queue(worker_index, False, function, *args, **kwargs)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            self._shutdown = True
+
+            for worker in self._workers:
+                if cancel_futures:
+                    for work_queue in (worker.pinned, worker.stealable):
+                        while work_queue:
+                            work_queue.popleft()[0].cancel()
+
+                self._wake_up(worker)
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
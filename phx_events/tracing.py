@@ -0,0 +1,223 @@
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+import random
+import time
+from typing import Any, Callable, Optional, Protocol, TYPE_CHECKING, Union
+
+from phx_events import json_handler
+from phx_events.handler_isolation import handler_name
+from phx_events.phx_messages import ChannelMessage, CoroutineHandler, ExecutorHandler
+
+
+if TYPE_CHECKING:
+    from phx_events.client import PHXChannelsClient
+
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+@dataclass()
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_ns: int
+    end_time_ns: int
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    def to_otel_dict(self) -> dict[str, Any]:
+        """The span in the OpenTelemetry (OTLP) JSON span format"""
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id or '',
+            'name': self.name,
+            'kind': 'SPAN_KIND_INTERNAL',
+            'startTimeUnixNano': str(self.start_time_ns),
+            'endTimeUnixNano': str(self.end_time_ns),
+            'attributes': [
+                {'key': key, 'value': {'stringValue': str(value)}}
+                for key, value in self.attributes.items()
+            ],
+        }
+
+
+class MessageTrace:
+    """Timeline of a single message from the time it was received until all its handlers have finished
+
+    Every stage is recorded as a child span of the root `phx_message` span:
+    * `parse` - decoding the websocket frame into a message
+    * `queue_wait` - time spent in the event queue
+    * `executor_wait` - time a sync handler waited for an executor thread
+    * `handler` - running a handler
+
+    The trace is available to handlers through `get_current_trace`.
+    """
+    trace_id: str
+    root_span_id: str
+    message: ChannelMessage
+    received_at_ns: int
+    queued_at_ns: Optional[int]
+    spans: list[Span]
+
+    def __init__(self, message: ChannelMessage, received_at_ns: int):
+        self.trace_id = os.urandom(16).hex()
+        self.root_span_id = _new_span_id()
+        self.message = message
+        self.received_at_ns = received_at_ns
+        self.queued_at_ns = None
+        self.spans = []
+
+    def add_span(self, name: str, start_time_ns: int, end_time_ns: int, **attributes: Any) -> Span:
+        span = Span(name, self.trace_id, _new_span_id(), self.root_span_id, start_time_ns, end_time_ns, attributes)
+        self.spans.append(span)
+        return span
+
+    def root_span(self, end_time_ns: int) -> Span:
+        return Span(
+            name='phx_message',
+            trace_id=self.trace_id,
+            span_id=self.root_span_id,
+            parent_span_id=None,
+            start_time_ns=self.received_at_ns,
+            end_time_ns=end_time_ns,
+            attributes={'phx.event': self.message.event, 'phx.topic': self.message.topic},
+        )
+
+    async def run_coroutine_handler(self, handler: CoroutineHandler, client: 'PHXChannelsClient') -> None:
+        context_token = _current_trace.set(self)
+        start_time_ns = time.time_ns()
+
+        try:
+            await handler(self.message, client)
+        finally:
+            self.add_span('handler', start_time_ns, time.time_ns(), handler=handler_name(handler))
+            _current_trace.reset(context_token)
+
+    def executor_handler(self, handler: ExecutorHandler, client: 'PHXChannelsClient') -> Callable[[], None]:
+        submitted_at_ns = time.time_ns()
+
+        def run_handler() -> None:
+            start_time_ns = time.time_ns()
+            self.add_span('executor_wait', submitted_at_ns, start_time_ns, handler=handler_name(handler))
+            context_token = _current_trace.set(self)
+
+            try:
+                handler(self.message, client)
+            finally:
+                self.add_span('handler', start_time_ns, time.time_ns(), handler=handler_name(handler))
+                _current_trace.reset(context_token)
+
+        return run_handler
+
+
+_current_trace: ContextVar[Optional[MessageTrace]] = ContextVar('phx_events_current_trace', default=None)
+
+
+def get_current_trace() -> Optional[MessageTrace]:
+    """The trace of the message being handled, if it was sampled"""
+    return _current_trace.get()
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None:
+        ...  # pragma: no cover
+
+    def flush(self) -> None:
+        ...  # pragma: no cover
+
+
+class InMemorySpanExporter:
+    """Collects finished spans in `spans` for inspection in the same process"""
+    spans: list[Span]
+
+    def __init__(self) -> None:
+        self.spans = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.spans.extend(spans)
+
+    def flush(self) -> None:
+        return None
+
+
+class FileSpanExporter:
+    """Writes spans to a file as OpenTelemetry JSON, one span per line, in batches of `batch_size` spans"""
+    path: Path
+    batch_size: int
+
+    _pending_lines: list[bytes]
+
+    def __init__(self, path: Union[str, Path], batch_size: int = 512):
+        self.path = Path(path)
+        self.batch_size = batch_size
+
+        self._pending_lines = []
+
+    def export(self, spans: list[Span]) -> None:
+        self._pending_lines.extend(json_handler.dumps(span.to_otel_dict()) + b'\n' for span in spans)
+
+        if len(self._pending_lines) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending_lines:
+            return
+
+        with self.path.open('ab') as span_file:
+            span_file.writelines(self._pending_lines)
+
+        self._pending_lines = []
+
+
+class Tracer:
+    """Samples messages for tracing and exports their spans once all their handlers have finished
+
+    Args:
+        exporter (SpanExporter): Where finished spans are sent
+        sample_rate (float): Fraction of messages to trace, between 0 and 1
+    """
+    exporter: SpanExporter
+    sample_rate: float
+
+    # Maps id(message) to the trace for messages waiting in an event queue
+    _traces: dict[int, MessageTrace]
+
+    def __init__(self, exporter: SpanExporter, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+        self._traces = {}
+
+    def start_trace(self, message: ChannelMessage, received_at_ns: int, parsed_at_ns: int) -> Optional[MessageTrace]:
+        if random.random() >= self.sample_rate:
+            return None
+
+        message_trace = MessageTrace(message, received_at_ns)
+        message_trace.add_span('parse', received_at_ns, parsed_at_ns)
+        return message_trace
+
+    def mark_queued(self, message_trace: MessageTrace) -> None:
+        message_trace.queued_at_ns = time.time_ns()
+        self._traces[id(message_trace.message)] = message_trace
+
+    def take_trace(self, message: ChannelMessage) -> Optional[MessageTrace]:
+        message_trace = self._traces.pop(id(message), None)
+        if message_trace is not None and message_trace.queued_at_ns is not None:
+            message_trace.add_span('queue_wait', message_trace.queued_at_ns, time.time_ns())
+
+        return message_trace
+
+    def discard_trace(self, message: ChannelMessage) -> None:
+        """Drop the trace of a message that won't be handled, e.g. one replaced in a conflated queue"""
+        self._traces.pop(id(message), None)
+
+    def finish_trace(self, message_trace: MessageTrace) -> None:
+        self.exporter.export([message_trace.root_span(time.time_ns()), *message_trace.spans])
+
+    def flush(self) -> None:
+        self.exporter.flush()
@@ -0,0 +1,43 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """Settings passed through to `websockets.client.connect` when `PHXChannelsClient` opens its connection
+
+    The defaults match the `websockets` library defaults so leaving this untouched keeps the previous behaviour.
+
+    Args:
+        compression (Optional[str]): `'deflate'` enables the permessage-deflate extension, `None` disables it.
+                                     Compression saves bandwidth on slow or metered links but costs CPU for every
+                                     frame sent and received, and keeps a compression context (~64KiB) per direction.
+                                     On a LAN or loopback link disabling it usually raises throughput.
+        max_size (Optional[int]): Maximum size in bytes of an incoming message, `None` disables the limit.
+                                  Larger values allow bigger payloads at the cost of more memory per message.
+                                  Messages over this size close the connection with code 1009.
+        max_queue (Optional[int]): Maximum number of incoming messages buffered before the client stops reading from
+                                   the socket, `None` disables the limit. Raising it smooths over bursts when handlers
+                                   briefly fall behind, worst-case memory use is roughly `max_queue * max_size`.
+        read_limit (int): High-water mark in bytes of the buffer for incoming data. Larger values mean fewer, bigger
+                          reads and better throughput at the cost of memory.
+        write_limit (int): High-water mark in bytes of the buffer for outgoing data. Larger values let more outbound
+                           messages be written without waiting for the buffer to drain, at the cost of memory and
+                           slower backpressure.
+        ping_interval (Optional[float]): Seconds between keepalive pings, `None` disables keepalive pings.
+                                         Shorter intervals detect dead connections sooner but add traffic.
+        ping_timeout (Optional[float]): Seconds to wait for a pong before closing the connection, `None` waits forever.
+                                        Raise this if a busy event loop causes spurious disconnects.
+        close_timeout (Optional[float]): Seconds to wait for the closing handshake when shutting down.
+    """
+    compression: Optional[str] = 'deflate'
+    max_size: Optional[int] = 2 ** 20
+    max_queue: Optional[int] = 2 ** 5
+    read_limit: int = 2 ** 16
+    write_limit: int = 2 ** 16
+    ping_interval: Optional[float] = 20
+    ping_timeout: Optional[float] = 20
+    close_timeout: Optional[float] = 10
+
+    def connect_kwargs(self) -> dict[str, Any]:
+        return asdict(self)
@@ -16,6 +16,7 @@ def make_message(
     topic: Topic,
     ref: Optional[str] = None,
     payload: Optional[dict[str, Any]] = None,
+    decoded_payload: Any = None,
 ) -> ChannelMessage:
     if payload is None:
         payload = {}
@@ -24,7 +25,11 @@ def make_message(
     if isinstance(processed_event, PHXEvent):
         return PHXEventMessage(event=processed_event, topic=topic, ref=ref, payload=payload)
     else:
-        return PHXMessage(event=processed_event, topic=topic, ref=ref, payload=payload)
+        message = PHXMessage(event=processed_event, topic=topic, ref=ref, payload=payload)
+        if decoded_payload is not None:
+            object.__setattr__(message, '_decoded_payload', decoded_payload)
+
+        return message
 
 
 def generate_reference(event: ChannelEvent) -> str:
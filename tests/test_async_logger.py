@@ -0,0 +1,148 @@
+import logging
+from queue import Queue
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from phx_events.async_logger import (
+    BatchingQueueListener,
+    DropPolicy,
+    get_queue_logging_stats,
+    LocalQueueHandler,
+    setup_queue_logging,
+)
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message, None, None)
+
+
+class TestLocalQueueHandler:
+    def test_records_enqueued_and_counted(self):
+        handler = LocalQueueHandler(Queue(maxsize=2))
+
+        handler.emit(make_record('one'))
+
+        assert handler.queue.qsize() == 1
+        assert handler.stats.enqueued == 1
+        assert handler.stats.dropped == 0
+
+    def test_drop_newest_discards_record_when_full(self):
+        handler = LocalQueueHandler(Queue(maxsize=1), drop_policy=DropPolicy.drop_newest)
+        first_record = make_record('first')
+
+        handler.emit(first_record)
+        handler.emit(make_record('second'))
+
+        assert handler.queue.get_nowait() is first_record
+        assert handler.stats.enqueued == 1
+        assert handler.stats.dropped == 1
+
+    def test_drop_oldest_replaces_oldest_record_when_full(self):
+        handler = LocalQueueHandler(Queue(maxsize=1), drop_policy=DropPolicy.drop_oldest)
+        second_record = make_record('second')
+
+        handler.emit(make_record('first'))
+        handler.emit(second_record)
+
+        assert handler.queue.get_nowait() is second_record
+        assert handler.stats.enqueued == 2
+        assert handler.stats.dropped == 1
+
+    def test_queue_joinable_after_dropping_oldest_records(self):
+        handler = LocalQueueHandler(Queue(maxsize=1), drop_policy=DropPolicy.drop_oldest)
+        for index in range(3):
+            handler.emit(make_record(str(index)))
+
+        handler.queue.get_nowait()
+        handler.queue.task_done()
+        join_thread = threading.Thread(target=handler.queue.join, daemon=True)
+        join_thread.start()
+        join_thread.join(timeout=1)
+
+        assert not join_thread.is_alive()
+
+    def test_drop_oldest_never_discards_stop_sentinel(self):
+        handler = LocalQueueHandler(Queue(maxsize=1), drop_policy=DropPolicy.drop_oldest)
+        handler.queue.put_nowait(None)
+
+        handler.emit(make_record('after stop'))
+
+        assert handler.queue.get_nowait() is None
+        assert handler.queue.unfinished_tasks == 1
+        assert handler.stats.enqueued == 0
+        assert handler.stats.dropped == 1
+
+    def test_preformat_merges_args_into_message(self):
+        handler = LocalQueueHandler(Queue(), preformat=True)
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, 'value=%s', ('large_object',), None)
+
+        handler.emit(record)
+        queued_record = handler.queue.get_nowait()
+
+        assert queued_record.msg == 'value=large_object'
+        assert queued_record.args is None
+
+    def test_records_not_formatted_by_default(self):
+        handler = LocalQueueHandler(Queue())
+        record = logging.LogRecord('test', logging.INFO, __file__, 1, 'value=%s', ('large_object',), None)
+
+        handler.emit(record)
+
+        assert handler.queue.get_nowait() is record
+
+    def test_stats_counted_from_many_threads(self):
+        handler = LocalQueueHandler(Queue(maxsize=500))
+
+        def emit_records():
+            for index in range(1000):
+                handler.emit(make_record(f'record {index}'))
+
+        threads = [threading.Thread(target=emit_records) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert handler.stats.enqueued == 500
+        assert handler.stats.dropped == 7500
+
+
+class TestBatchingQueueListener:
+    def test_dequeue_batch_returns_at_most_batch_size_records(self):
+        queue: Queue = Queue()
+        for index in range(5):
+            queue.put_nowait(make_record(str(index)))
+
+        listener = BatchingQueueListener(queue, batch_size=3)
+
+        assert len(listener.dequeue_batch()) == 3
+        assert len(listener.dequeue_batch()) == 2
+
+    def test_all_records_handled_before_stopping(self):
+        queue: Queue = Queue(maxsize=10)
+        mock_handler = Mock(logging.Handler, level=logging.NOTSET)
+        listener = BatchingQueueListener(queue, mock_handler, batch_size=4)
+
+        for index in range(10):
+            queue.put_nowait(make_record(str(index)))
+
+        listener.start()
+        listener.stop()
+
+        assert mock_handler.handle.call_count == 10
+        assert queue.empty()
+
+
+class TestSetupQueueLogging:
+    def test_logger_uses_bounded_queue(self):
+        queue_logger, listener = setup_queue_logging(maxsize=5, logger_name='tests.bounded_queue')
+        listener.stop()
+
+        assert listener.queue.maxsize == 5
+        assert get_queue_logging_stats(queue_logger).dropped == 0
+
+    def test_stats_raises_if_logger_not_set_up(self):
+        with pytest.raises(ValueError):
+            get_queue_logging_stats(logging.getLogger('tests.not_queue_logger'))
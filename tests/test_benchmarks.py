@@ -0,0 +1,34 @@
+from benchmarks.__main__ import find_regressions, run_benchmarks
+
+
+class TestFindRegressions:
+    def setup(self):
+        self.baseline = {'loads/flat': 1.0, 'dumps/flat': 2.0}
+
+    def test_benchmarks_slower_than_threshold_reported(self):
+        results = {'loads/flat': 1.3, 'dumps/flat': 2.4}
+
+        assert find_regressions(results, self.baseline, threshold=0.25) == ['loads/flat']
+
+    def test_benchmarks_missing_from_baseline_ignored(self):
+        assert find_regressions({'dumps_message/flat': 100.0}, self.baseline, threshold=0.25) == []
+
+    def test_noise_added_to_threshold(self):
+        results = {'loads/flat': 1.3, 'dumps/flat': 2.8}
+        noise = {'loads/flat': 0.1, 'dumps/flat': 0.1}
+
+        assert find_regressions(results, self.baseline, threshold=0.25, noise=noise) == ['dumps/flat']
+
+
+class TestRunBenchmarks:
+    def test_median_and_noise_returned_for_matching_benchmarks(self):
+        results, noise = run_benchmarks('decimal_serialiser', repeat=3)
+
+        assert results.keys() == noise.keys() == {'decimal_serialiser'}
+        assert results['decimal_serialiser'] > 0
+        assert noise['decimal_serialiser'] >= 0
+
+    def test_only_named_benchmarks_run(self):
+        results, _ = run_benchmarks('', repeat=1, names=['parse_event/event'])
+
+        assert results.keys() == {'parse_event/event'}
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from phx_events import json_handler
+from phx_events.broker import LocalBroker, LocalBrokerConnection
+from phx_events.client import PHXChannelsClient
+from phx_events.phx_messages import Event, PHXEvent, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestLocalBroker:
+    @pytest.fixture(autouse=True)
+    def broker(self, tmp_path):
+        self.topic = Topic('topic:subtopic')
+        self.upstream_client = PHXChannelsClient('ws://url/')
+        self.upstream_client.register_topic_subscription(self.topic)
+
+        self.broker_path = str(tmp_path / 'broker.sock')
+        self.broker = LocalBroker(self.broker_path)
+        yield
+        self.broker.close()
+
+    async def join(self, connection, topic):
+        await connection.send(json_handler.dumps(make_message(PHXEvent.join, topic, ref='1')))
+        return json_handler.loads(await connection.__aiter__().__anext__())
+
+    async def test_join_answered_for_upstream_topics(self):
+        await self.broker.start(self.upstream_client)
+        async with LocalBrokerConnection(self.broker_path) as connection:
+            reply = await self.join(connection, self.topic)
+            other_reply = await self.join(connection, Topic('other:topic'))
+
+        assert reply['event'] == 'phx_reply'
+        assert reply['ref'] == '1'
+        assert reply['payload']['status'] == 'ok'
+        assert other_reply['payload'] == {'status': 'error', 'response': {'reason': 'topic not subscribed upstream'}}
+
+    async def test_frames_published_to_subscribers_of_the_topic(self):
+        event_frame = json_handler.dumps(make_message(Event('event_name'), self.topic))
+        other_frame = json_handler.dumps(make_message(Event('event_name'), Topic('other:topic')))
+        upstream_reply_frame = json_handler.dumps(make_message(PHXEvent.reply, self.topic))
+
+        await self.broker.start(self.upstream_client)
+        async with LocalBrokerConnection(self.broker_path) as connection:
+            await self.join(connection, self.topic)
+
+            for frame in (other_frame, upstream_reply_frame, event_frame):
+                self.broker.publish(self.upstream_client._parse_message(frame), frame)
+
+            received_frame = await asyncio.wait_for(connection.__aiter__().__anext__(), timeout=1)
+
+        assert received_frame == event_frame
+
+    async def test_frames_dropped_for_slow_subscribers(self):
+        self.broker.max_buffer_bytes = -1
+        event_frame = json_handler.dumps(make_message(Event('event_name'), self.topic))
+
+        await self.broker.start(self.upstream_client)
+        async with LocalBrokerConnection(self.broker_path) as connection:
+            await self.join(connection, self.topic)
+            self.broker.publish(self.upstream_client._parse_message(event_frame), event_frame)
+
+            assert self.broker.subscribers[0].dropped == 1
+
+    async def test_subscriber_pushes_sent_upstream(self):
+        push_message = make_message(Event('new_order'), self.topic, ref='2', payload={'size': 1})
+
+        await self.broker.start(self.upstream_client)
+        async with LocalBrokerConnection(self.broker_path) as connection:
+            await connection.send(json_handler.dumps(push_message))
+            await self.join(connection, self.topic)
+
+        upstream_message = self.upstream_client.outbound_queue._queue.get_nowait()
+        assert (upstream_message.event, upstream_message.topic, upstream_message.payload) == (
+            push_message.event,
+            push_message.topic,
+            push_message.payload,
+        )
+
+    async def test_push_replies_returned_to_the_subscriber_that_pushed(self):
+        push_message = make_message(Event('new_order'), self.topic, ref='2', payload={'size': 1})
+        reply_payload = {'status': 'ok', 'response': {}}
+
+        await self.broker.start(self.upstream_client)
+        async with LocalBrokerConnection(self.broker_path) as connection:
+            async with LocalBrokerConnection(self.broker_path) as other_connection:
+                await self.join(connection, self.topic)
+                await self.join(other_connection, self.topic)
+                # Another subscriber using the same ref mustn't be sent the first subscriber's reply
+                for subscriber_connection in (connection, other_connection):
+                    await subscriber_connection.send(json_handler.dumps(push_message))
+                    upstream_push = self.upstream_client.outbound_queue._queue.get()
+                    upstream_message = await asyncio.wait_for(upstream_push, timeout=1)
+
+                reply = make_message(PHXEvent.reply, self.topic, upstream_message.ref, reply_payload)
+                reply_frame = json_handler.dumps(reply)
+                # Replies are only forwarded once
+                for _ in range(2):
+                    self.broker.publish(self.upstream_client._parse_message(reply_frame), reply_frame)
+
+                received_frame = await asyncio.wait_for(other_connection.__aiter__().__anext__(), timeout=1)
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(connection.__aiter__().__anext__(), timeout=0.1)
+
+                assert len(self.broker._pending_replies) == 1
+
+        assert json_handler.loads(received_frame) == {
+            'topic': self.topic,
+            'ref': '2',
+            'payload': reply_payload,
+            'event': 'phx_reply',
+        }
+
+
+class TestLocalBrokerSubscriberClient:
+    async def test_subscriber_client_connects_to_broker(self, tmp_path):
+        phx_client = PHXChannelsClient('ws://url/', local_broker_path=str(tmp_path / 'broker.sock'))
+
+        assert isinstance(phx_client._connect(), LocalBrokerConnection)
@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+from phx_events.circuit_breaker import CircuitBreaker, CircuitBreakerConfig, CircuitState
+
+
+class TestCircuitBreaker:
+    def setup(self):
+        self.now = 100.0
+        self.time_patcher = patch('phx_events.circuit_breaker.time.monotonic', side_effect=lambda: self.now)
+        self.time_patcher.start()
+        self.circuit_breaker = CircuitBreaker(
+            CircuitBreakerConfig(failure_threshold=3, failure_window=10, reset_timeout=5, half_open_trials=1),
+        )
+
+    def teardown(self):
+        self.time_patcher.stop()
+
+    def fail(self, times):
+        return [self.circuit_breaker.record_failure() for _ in range(times)]
+
+    def test_opens_after_threshold_failures_in_window(self):
+        assert self.fail(3) == [False, False, True]
+        assert self.circuit_breaker.state is CircuitState.open
+        assert self.circuit_breaker.allow() is False
+
+    def test_failures_outside_window_not_counted(self):
+        self.fail(2)
+        self.now += 11
+
+        assert self.fail(2) == [False, False]
+        assert self.circuit_breaker.state is CircuitState.closed
+
+    def test_half_open_trial_closes_circuit_on_success(self):
+        self.fail(3)
+        self.now += 5
+
+        assert self.circuit_breaker.allow() is True
+        assert self.circuit_breaker.state is CircuitState.half_open
+        assert self.circuit_breaker.allow() is False
+
+        self.circuit_breaker.record_success()
+
+        assert self.circuit_breaker.state is CircuitState.closed
+        assert self.circuit_breaker.allow() is True
+
+    def test_half_open_trial_reopens_circuit_on_failure(self):
+        self.fail(3)
+        self.now += 5
+        self.circuit_breaker.allow()
+
+        assert self.circuit_breaker.record_failure() is True
+        assert self.circuit_breaker.state is CircuitState.open
+        assert self.circuit_breaker.allow() is False
+
+    def test_cancelled_trial_frees_trial_slot(self):
+        self.fail(3)
+        self.now += 5
+        self.circuit_breaker.allow()
+
+        self.circuit_breaker.record_cancelled()
+
+        assert self.circuit_breaker.allow() is True
@@ -0,0 +1,120 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from phx_events import cli, json_handler
+from phx_events.cli import (
+    load_config,
+    load_registration_function,
+    run_connection,
+    run_workers,
+    RunnerConfig,
+    topic_shard,
+)
+from phx_events.client import PHXChannelsClient
+from phx_events.phx_messages import Event, Topic
+
+
+TOPICS = [Topic(f'topic:{index}') for index in range(20)]
+
+
+def register(client: PHXChannelsClient) -> None:
+    client.register_event_handler(Event('event_name'), handlers=[lambda message, phx_client: None])
+    for topic in TOPICS:
+        client.register_topic_subscription(topic)
+
+
+class TestLoadConfig:
+    def test_options_from_arguments(self):
+        config = load_config(['--url', 'ws://url/', '--handlers', 'tests.test_cli', '--workers', '4'])
+
+        assert config == RunnerConfig(url='ws://url/', handlers='tests.test_cli', workers=4)
+
+    def test_arguments_override_config_file(self, tmp_path):
+        config_path = tmp_path / 'config.json'
+        config_path.write_bytes(json_handler.dumps({'url': 'ws://url/', 'handlers': 'handlers', 'connections': 2}))
+
+        config = load_config(['--config', str(config_path), '--connections', '4'])
+
+        assert config.url == 'ws://url/'
+        assert config.connections == 4
+
+    def test_config_file_floats_not_decimals(self, tmp_path):
+        config_path = tmp_path / 'config.json'
+        config_path.write_bytes(json_handler.dumps({'url': 'ws://url/', 'handlers': 'handlers', 'drain_timeout': 2.5}))
+
+        config = load_config(['--config', str(config_path)])
+
+        assert config.drain_timeout == 2.5
+        assert isinstance(config.drain_timeout, float)
+
+    def test_token_from_environment(self, monkeypatch):
+        monkeypatch.setenv('PHX_EVENTS_TOKEN', 'auth_token')
+
+        assert load_config(['--url', 'ws://url/', '--handlers', 'handlers']).token == 'auth_token'
+
+    @pytest.mark.parametrize('argv', [['--url', 'ws://url/'], ['--handlers', 'handlers']])
+    def test_missing_required_options_exit(self, argv):
+        with pytest.raises(SystemExit):
+            load_config(argv)
+
+    def test_unknown_config_file_options_exit(self, tmp_path):
+        config_path = tmp_path / 'config.json'
+        config_path.write_bytes(json_handler.dumps({'url': 'ws://url/', 'handlers': 'handlers', 'threads': 2}))
+
+        with pytest.raises(SystemExit):
+            load_config(['--config', str(config_path)])
+
+
+class TestLoadRegistrationFunction:
+    def test_register_used_by_default(self):
+        assert load_registration_function('tests.test_cli') is register
+
+    def test_function_name_used_if_given(self):
+        assert load_registration_function('tests.test_cli:topic_shard') is topic_shard
+
+
+class TestRunConnection:
+    @pytest.mark.asyncio
+    async def test_each_connection_subscribes_to_its_share_of_topics(self):
+        subscribed_topics = []
+
+        async def start_processing(client, executor_pool, drain_timeout):
+            subscribed_topics.extend(client.registered_topics())
+
+        config = RunnerConfig(url='ws://url/', handlers='tests.test_cli', connections=3)
+        with patch.object(PHXChannelsClient, 'start_processing', autospec=True, side_effect=start_processing):
+            for shard in range(3):
+                await run_connection(config, shard)
+
+        assert sorted(subscribed_topics) == sorted(TOPICS)
+
+    @pytest.mark.asyncio
+    async def test_event_concurrency_passed_to_client(self):
+        event_concurrencies = []
+
+        async def start_processing(client, executor_pool, drain_timeout):
+            event_concurrencies.append(client.event_concurrency)
+
+        config = RunnerConfig(url='ws://url/', handlers='tests.test_cli', event_concurrency=4)
+        with patch.object(PHXChannelsClient, 'start_processing', autospec=True, side_effect=start_processing):
+            await run_connection(config)
+
+        assert event_concurrencies == [4]
+
+    def test_single_connection_runs_in_process(self):
+        with patch.object(cli, 'run_connection', new_callable=AsyncMock) as run_connection_mock:
+            assert cli.main(['--url', 'ws://url/', '--handlers', 'tests.test_cli']) == 0
+
+        run_connection_mock.assert_awaited_once_with(RunnerConfig(url='ws://url/', handlers='tests.test_cli'), 0)
+
+
+class TestRunWorkers:
+    @pytest.mark.parametrize(('exit_codes', 'expected_exit_code'), [([0, 0], 0), ([-9, 0], -9), ([0, 1, 2], 1)])
+    def test_first_failed_worker_exit_code_returned(self, exit_codes, expected_exit_code):
+        workers = [Mock(exitcode=exit_code, pid=None) for exit_code in exit_codes]
+        config = RunnerConfig(url='ws://url/', handlers='tests.test_cli', connections=len(workers))
+
+        with patch.object(cli.multiprocessing, 'get_context') as get_context_mock, patch.object(cli.signal, 'signal'):
+            get_context_mock.return_value.Process.side_effect = workers
+            assert run_workers(config) == expected_exit_code
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from phx_events.client import PHXChannelsClient
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestPHXChannelsClientDrain:
+    def setup(self):
+        self.phx_client = PHXChannelsClient('ws://url/')
+        self.event = Event('event_name')
+        self.topic = Topic('topic:subtopic')
+        self.handled_messages = []
+
+        async def event_handler(message, client):
+            self.handled_messages.append(message)
+
+        self.phx_client.register_event_handler(self.event, handlers=[event_handler])
+        self.phx_client._client_start_event.set()
+
+    async def test_queued_messages_processed_before_shutdown(self):
+        messages = [make_message(self.event, self.topic, ref=str(index)) for index in range(3)]
+        for message in messages:
+            await self.phx_client._event_handler_config[self.event].queue.put(message)
+
+        websocket = AsyncMock()
+        executor_pool = Mock()
+        undelivered_messages = await self.phx_client.drain('test', 1, websocket=websocket, executor_pool=executor_pool)
+        # Let the cancellation of the event processor task finish
+        await asyncio.sleep(0)
+
+        websocket.close.assert_awaited()
+        executor_pool.shutdown.assert_called_with(wait=False, cancel_futures=True)
+        assert self.handled_messages == messages
+        assert undelivered_messages == []
+        assert self.phx_client._event_handler_config[self.event].task.cancelled()
+
+    async def test_queued_messages_reported_on_timeout(self, caplog):
+        event_handler_config = self.phx_client._event_handler_config[self.event]
+        # Stop the messages from being processed
+        event_handler_config.task.cancel()
+
+        message = make_message(self.event, self.topic)
+        await event_handler_config.queue.put(message)
+
+        undelivered_handler = Mock()
+        with caplog.at_level(logging.WARNING):
+            undelivered_messages = await self.phx_client.drain('test', 0.01, undelivered_handler=undelivered_handler)
+
+        undelivered_handler.assert_called_with([message])
+        assert undelivered_messages == [message]
+        assert event_handler_config.queue.empty()
+        assert 'Draining event queues timed out after 0.01s' in caplog.messages
+
+    async def test_queued_messages_logged_if_no_undelivered_handler(self, caplog):
+        event_handler_config = self.phx_client._event_handler_config[self.event]
+        event_handler_config.task.cancel()
+        await event_handler_config.queue.put(make_message(self.event, self.topic))
+
+        await self.phx_client.drain('test', 0.01)
+
+        assert caplog.messages[-1] == 'Shut down with 1 unprocessed messages'
+
+    async def test_in_flight_and_isolated_handler_messages_reported_on_timeout(self):
+        handlers_started = asyncio.Semaphore(0)
+
+        async def slow_handler(message, client):
+            handlers_started.release()
+            await asyncio.sleep(10)
+
+        async def isolated_handler(message, client):
+            await slow_handler(message, client)
+
+        event = Event('slow_event')
+        self.phx_client.register_event_handler(event, handlers=[slow_handler])
+        handler_lane = self.phx_client._isolate_handler(isolated_handler, timeout=10)
+        in_flight_message, queued_message, lane_message, lane_queued_message = [
+            make_message(event, self.topic, ref=str(index)) for index in range(4)
+        ]
+
+        event_handler_config = self.phx_client._event_handler_config[event]
+        await event_handler_config.queue.put(in_flight_message)
+        await event_handler_config.queue.put(queued_message)
+        handler_lane.submit(lane_message)
+        handler_lane.submit(lane_queued_message)
+        for _ in range(2):
+            await asyncio.wait_for(handlers_started.acquire(), timeout=1)
+
+        undelivered_messages = await self.phx_client.drain('test', 0.01)
+
+        assert undelivered_messages == [in_flight_message, queued_message, lane_message, lane_queued_message]
+
+    async def test_start_drain_only_drains_once(self):
+        with patch.object(self.phx_client, 'drain', new=AsyncMock()) as mock_drain:
+            self.phx_client._start_drain('SIGTERM', 1)
+            self.phx_client._start_drain('SIGTERM', 1)
+            await asyncio.wait_for(self.phx_client._drain_task, timeout=1)
+
+        mock_drain.assert_awaited_once_with('SIGTERM', 1, None, None, None)
@@ -1,12 +1,20 @@
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
 from unittest.mock import Mock
 
 import pytest
 
+from phx_events import json_handler
+from phx_events.circuit_breaker import CircuitBreakerConfig, CircuitState
 from phx_events.client import PHXChannelsClient
+from phx_events.handler_loops import HandlerLoopPool
+from phx_events.inbox import DurableInbox
+from phx_events.loop_monitor import LoopLagMonitor
 from phx_events.phx_messages import ChannelMessage, Event, Topic
+from phx_events.topic_executor import TopicAffinityExecutor
+from phx_events.tracing import InMemorySpanExporter, Tracer
 from phx_events.utils import make_message
 
 
@@ -155,3 +163,328 @@ class TestPHXChannelsClientEventProcessor:
         mock_loop.create_task.assert_called()
         # We don't expect the event_topic_handler to have been called
         mock_loop.run_in_executor.assert_called()
+
+    async def test_handler_cancelled_and_logged_on_timeout(self, event_loop, caplog):
+        handler_cancelled = asyncio.Event()
+
+        async def hanging_event_handler(message, client):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                handler_cancelled.set()
+                raise
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[hanging_event_handler], timeout=0.01)
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        event_message = make_message(event, self.topic)
+        await event_handler_config.queue.put(event_message)
+
+        caplog.set_level(logging.WARNING)
+        event_loop.create_task(self.phx_client._event_processor(event))
+
+        await asyncio.wait_for(event_handler_config.queue.join(), timeout=1)
+
+        assert handler_cancelled.is_set()
+        assert self.phx_client.handler_stats[hanging_event_handler].timeouts == 1
+        assert caplog.messages == [
+            f'Handler {hanging_event_handler.__name__} timed out after 0.01s - message={event_message}',
+        ]
+
+    async def test_handler_isolated_after_repeated_timeouts(self, event_loop):
+        self.phx_client.slow_handler_threshold = 2
+        fast_handler_calls = []
+
+        async def hanging_event_handler(message, client):
+            await asyncio.sleep(10)
+
+        async def fast_event_handler(message, client):
+            fast_handler_calls.append(message)
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[hanging_event_handler], timeout=0.01)
+        self.phx_client.register_event_handler(event, handlers=[fast_event_handler])
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        for _ in range(3):
+            await event_handler_config.queue.put(make_message(event, self.topic))
+
+        processor_task = event_loop.create_task(self.phx_client._event_processor(event))
+        await asyncio.wait_for(event_handler_config.queue.join(), timeout=1)
+        processor_task.cancel()
+
+        handler_stats = self.phx_client.handler_stats[hanging_event_handler]
+
+        assert handler_stats.isolated
+        assert handler_stats.timeouts == 2
+        assert hanging_event_handler in self.phx_client._handler_lanes
+        assert len(fast_handler_calls) == 3
+
+        self.phx_client.shutdown('test')
+
+    async def test_sampled_messages_traced(self, event_loop):
+        exporter = InMemorySpanExporter()
+        self.phx_client.tracer = Tracer(exporter)
+        self.phx_client._executor_pool = ThreadPoolExecutor()
+
+        event_handler_config = self.phx_client._event_handler_config[self.event]
+        event_message = make_message(self.event, self.topic)
+        message_trace = self.phx_client.tracer.start_trace(event_message, 1, 2)
+        self.phx_client.tracer.mark_queued(message_trace)
+        await event_handler_config.queue.put(event_message)
+
+        event_loop.create_task(self.phx_client._event_processor(self.event))
+        await event_handler_config.queue.join()
+
+        span_names = [span.name for span in exporter.spans]
+        assert span_names[:3] == ['phx_message', 'parse', 'queue_wait']
+        assert sorted(span_names[3:]) == ['executor_wait', 'handler', 'handler']
+
+    async def test_optional_handlers_skipped_while_shedding_load(self, event_loop):
+        self.phx_client.loop_monitor = LoopLagMonitor()
+        self.phx_client.loop_monitor.shedding = True
+        required_handler_calls = []
+
+        async def optional_event_handler(message, client):
+            raise AssertionError('Optional handler should be skipped')
+
+        async def required_event_handler(message, client):
+            required_handler_calls.append(message)
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[optional_event_handler], optional=True)
+        self.phx_client.register_event_handler(event, handlers=[required_event_handler])
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        event_message = make_message(event, self.topic)
+        await event_handler_config.queue.put(event_message)
+
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await event_handler_config.queue.join()
+
+        assert required_handler_calls == [event_message]
+        assert self.phx_client.handler_stats[optional_event_handler].shed == 1
+
+    async def test_coroutine_handlers_run_on_handler_loops(self, event_loop):
+        self.phx_client.handler_loops = HandlerLoopPool()
+        self.phx_client.handler_loops.start()
+        handler_threads = []
+
+        async def threaded_event_handler(message, client):
+            handler_threads.append(threading.current_thread().name)
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[threaded_event_handler])
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        await event_handler_config.queue.put(make_message(event, self.topic))
+
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await asyncio.wait_for(event_handler_config.queue.join(), timeout=1)
+        self.phx_client.handler_loops.stop()
+
+        assert handler_threads == ['phx_events_handler_loop_0']
+
+    async def test_expired_messages_not_dispatched(self, event_loop):
+        handled_messages = []
+        expired_messages = []
+
+        async def event_handler(message, client):
+            handled_messages.append(message)
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(
+            event,
+            handlers=[event_handler],
+            max_age=60,
+            timestamp_field='sent_at',
+            on_expired=expired_messages.append,
+        )
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        expired_message = make_message(event, self.topic, payload={'sent_at': 0})
+        fresh_message = make_message(event, self.topic)
+        await event_handler_config.queue.put(expired_message)
+        await event_handler_config.queue.put(fresh_message)
+
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await event_handler_config.queue.join()
+
+        assert handled_messages == [fresh_message]
+        assert expired_messages == [expired_message]
+        assert event_handler_config.expiry.expired == 1
+
+    async def test_failing_handler_skipped_while_circuit_open(self, event_loop):
+        self.phx_client.circuit_breaker_config = CircuitBreakerConfig(failure_threshold=2, reset_timeout=60)
+        handler_calls = []
+
+        def failing_event_handler(message, client):
+            handler_calls.append(message)
+            raise ValueError('Database is down')
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[failing_event_handler])
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        for _ in range(4):
+            await event_handler_config.queue.put(make_message(event, self.topic))
+
+        with ThreadPoolExecutor() as executor_pool:
+            self.phx_client._executor_pool = executor_pool
+            event_loop.create_task(self.phx_client._event_processor(event))
+            await event_handler_config.queue.join()
+
+        handler_stats = self.phx_client.handler_stats[failing_event_handler]
+        assert len(handler_calls) == 2
+        assert handler_stats.circuit_state is CircuitState.open
+        assert handler_stats.short_circuited == 2
+
+    async def test_circuit_opened_by_handler_timeouts(self, event_loop):
+        self.phx_client.circuit_breaker_config = CircuitBreakerConfig(failure_threshold=2, reset_timeout=60)
+        self.phx_client.slow_handler_threshold = None
+        handler_calls = []
+
+        async def hanging_event_handler(message, client):
+            handler_calls.append(message)
+            await asyncio.sleep(10)
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[hanging_event_handler], timeout=0.01)
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        for _ in range(4):
+            await event_handler_config.queue.put(make_message(event, self.topic))
+
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await asyncio.wait_for(event_handler_config.queue.join(), timeout=1)
+
+        handler_stats = self.phx_client.handler_stats[hanging_event_handler]
+        assert len(handler_calls) == 2
+        assert handler_stats.circuit_state is CircuitState.open
+        assert handler_stats.short_circuited == 2
+
+    async def test_sync_handlers_run_on_topic_worker_with_topic_affinity_executor(self, event_loop):
+        handler_threads = []
+
+        def thread_recording_handler(message, client):
+            handler_threads.append((message.topic, threading.current_thread().name))
+
+        event = Event('new_event')
+        other_topic = Topic('topic:other')
+        self.phx_client.register_event_handler(event, handlers=[thread_recording_handler])
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        for topic in (self.topic, other_topic, self.topic, other_topic):
+            await event_handler_config.queue.put(make_message(event, topic))
+
+        executor_pool = TopicAffinityExecutor(max_workers=4)
+        self.phx_client._executor_pool = executor_pool
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await event_handler_config.queue.join()
+        executor_pool.shutdown()
+
+        assert handler_threads == [
+            (topic, f'phx_events_topic_worker_{executor_pool.worker_for(topic)}')
+            for topic in (self.topic, other_topic, self.topic, other_topic)
+        ]
+
+    async def test_messages_handled_concurrently_up_to_event_concurrency(self, event_loop):
+        self.phx_client.event_concurrency = 2
+        running_messages = []
+        release_handlers = asyncio.Event()
+
+        async def blocking_event_handler(message, client):
+            running_messages.append(message)
+            await release_handlers.wait()
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[blocking_event_handler])
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        messages = [make_message(event, self.topic, ref=str(index)) for index in range(3)]
+        for message in messages:
+            await event_handler_config.queue.put(message)
+
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await asyncio.sleep(0.01)
+
+        assert running_messages == messages[:2]
+        assert list(event_handler_config.current_messages.values()) == messages[:2]
+
+        release_handlers.set()
+        await asyncio.wait_for(event_handler_config.queue.join(), timeout=1)
+
+        assert running_messages == messages
+        assert not event_handler_config.current_messages
+
+    async def test_inbox_only_acknowledges_messages_whose_handlers_succeeded(self, event_loop, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        self.phx_client.inbox = inbox
+
+        async def failing_event_handler(message, client):
+            if message.payload['fail']:
+                raise ValueError('handler_error')
+
+        async def slow_event_handler(message, client):
+            await asyncio.sleep(10)
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[failing_event_handler])
+        self.phx_client.register_event_handler(event, handlers=[slow_event_handler], timeout=0.01, topic=self.topic)
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        messages = [
+            make_message(event, self.topic, payload={'fail': True}),
+            make_message(event, self.topic, payload={'fail': False}),
+            make_message(event, Topic('topic:other'), payload={'fail': False}),
+        ]
+        for message in messages:
+            inbox.track(message, inbox.append(json_handler.dumps(message)))
+            await event_handler_config.queue.put(message)
+
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await event_handler_config.queue.join()
+        inbox.close()
+
+        assert [entry_id for entry_id, _ in DurableInbox(tmp_path).open()] == [0, 1]
+
+    async def test_inbox_acknowledges_after_isolated_handlers_finish(self, event_loop, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        self.phx_client.inbox = inbox
+        release_handler = asyncio.Event()
+
+        async def isolated_event_handler(message, client):
+            await release_handler.wait()
+
+        event = Event('new_event')
+        self.phx_client.register_event_handler(event, handlers=[isolated_event_handler])
+        self.phx_client._isolate_handler(isolated_event_handler, timeout=1)
+        event_handler_config = self.phx_client._event_handler_config[event]
+        event_handler_config.task.cancel()
+
+        message = make_message(event, self.topic)
+        inbox.track(message, inbox.append(json_handler.dumps(message)))
+        await event_handler_config.queue.put(message)
+
+        event_loop.create_task(self.phx_client._event_processor(event))
+        await event_handler_config.queue.join()
+        assert inbox._tracked_entries
+
+        release_handler.set()
+        await self.phx_client._handler_lanes[isolated_event_handler].join()
+        inbox.close()
+
+        assert DurableInbox(tmp_path).open() == []
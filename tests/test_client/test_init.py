@@ -4,6 +4,7 @@ from urllib.parse import urlencode
 import pytest
 
 from phx_events.client import PHXChannelsClient
+from phx_events.transport import TransportConfig
 
 
 pytestmark = pytest.mark.asyncio
@@ -44,3 +45,12 @@ class TestPHXChannelsClientInit:
         specified_loop_client = PHXChannelsClient(self.socket_url, event_loop=event_loop)
 
         assert specified_loop_client._loop == event_loop
+
+    def test_transport_config_defaults_if_not_specified(self):
+        assert self.phx_channels_client.transport_config == TransportConfig()
+
+    def test_transport_config_set_to_argument_if_specified(self):
+        transport_config = TransportConfig(compression=None)
+        configured_client = PHXChannelsClient(self.socket_url, transport_config=transport_config)
+
+        assert configured_client.transport_config is transport_config
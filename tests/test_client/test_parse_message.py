@@ -1,8 +1,14 @@
+from dataclasses import dataclass
+from decimal import Decimal
+from unittest.mock import patch
+
 from hypothesis import given
 
 from phx_events import json_handler
 from phx_events.client import PHXChannelsClient
-from phx_events.phx_messages import PHXEvent, PHXEventMessage, PHXMessage
+from phx_events.phx_messages import Event, PHXEvent, PHXEventMessage, PHXMessage, Topic
+from phx_events.streaming import PayloadItems
+from phx_events.utils import make_message
 from tests.strategy_utils import event_strategy, phx_event_strategy
 
 
@@ -37,3 +43,32 @@ class TestPHXChannelsClientParseMessage:
         assert parsed_message.event == PHXEvent(reserialised_event_dict['event']) == PHXEvent(event_dict['event'])
         assert parsed_message.ref == reserialised_event_dict['ref'] == event_dict['ref']
         assert parsed_message.payload == (reserialised_event_dict['payload'] or {})
+
+    def test_stream_path_payload_converted_as_used(self):
+        event = Event('order_book')
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(event, handlers=[lambda x, y: None], stream_path=['bids'])
+        socket_message = json_handler.dumps(
+            make_message(event, Topic('book:1'), payload={'bids': [[1.5, 2]], 'spread': 0.5}),
+        )
+
+        parsed_message = self.phx_client._parse_message(socket_message)
+
+        assert isinstance(parsed_message.payload['bids'], PayloadItems)
+        assert list(parsed_message.payload['bids']) == [[Decimal('1.5'), 2]]
+        assert parsed_message.payload['spread'] == Decimal('0.5')
+
+    def test_payload_decoded_with_event_schema(self):
+        @dataclass()
+        class Quote:
+            price: Decimal
+
+        event = Event('quote')
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(event, handlers=[lambda x, y: None], payload_schema=Quote)
+        socket_message = json_handler.dumps(make_message(event, Topic('quote:1'), payload={'price': 1.25}))
+
+        parsed_message = self.phx_client._parse_message(socket_message)
+
+        assert parsed_message.decoded_payload == Quote(Decimal('1.25'))
+        assert parsed_message.payload == {'price': Decimal('1.25')}
@@ -1,11 +1,17 @@
 import logging
+from unittest.mock import patch
 
 import pytest
 
 from phx_events import json_handler
 from phx_events.client import PHXChannelsClient
 from phx_events.exceptions import TopicClosedError
+from phx_events.inbox import DurableInbox
 from phx_events.phx_messages import Event, PHXEvent, Topic
+from phx_events.presence import Presence, PRESENCE_STATE_EVENT
+from phx_events.shared_ring import SharedRingBuffer, SharedRingPublisher
+from phx_events.state_store import topic_key
+from phx_events.tracing import InMemorySpanExporter, Tracer
 from phx_events.utils import make_message
 from tests.utils import async_iter
 
@@ -102,3 +108,113 @@ class TestPHXChannelsClientProcessWebsocketMessages:
         event_handler_config = self.phx_client._event_handler_config[event]
 
         assert event_handler_config.queue.get_nowait() == event_message
+
+    async def test_conflated_messages_acknowledged_and_forgotten(self, mock_websocket_connection, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        phx_client = PHXChannelsClient('ws://url/', inbox=inbox, tracer=Tracer(InMemorySpanExporter()))
+        event = Event('specific_event')
+        phx_client.register_event_handler(event, handlers=[lambda x, y: None], conflation_key=topic_key, max_age=10)
+
+        frames = [json_handler.dumps(make_message(event, self.topic, payload={'price': price})) for price in (1, 2)]
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(*frames)
+
+        await phx_client.process_websocket_messages(mock_websocket_connection)
+
+        event_handler_config = phx_client._event_handler_config[event]
+        latest_message = event_handler_config.queue.get_nowait()
+        assert latest_message.payload == {'price': 2}
+        assert inbox._tracked_entries == {latest_message._inbox_entry_id}
+        assert event_handler_config.expiry._received_at.keys() == {id(latest_message)}
+        assert phx_client.tracer._traces.keys() == {id(latest_message)}
+
+        inbox.close()
+        assert [frame for _, frame in DurableInbox(tmp_path).open()] == [frames[1]]
+
+    async def test_put_message_in_matching_streams(self, mock_websocket_connection):
+        event = Event('specific_event')
+        event_stream = self.phx_client.stream(event)
+        topic_stream = self.phx_client.stream(event, topic=self.topic)
+        other_topic_stream = self.phx_client.stream(event, topic=Topic('other_topic'))
+
+        event_message = make_message(event, self.topic)
+        event_socket_message = json_handler.dumps(event_message)
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(event_socket_message)
+
+        await self.phx_client.process_websocket_messages(mock_websocket_connection)
+        self.phx_client.shutdown('test')
+
+        assert [message async for message in event_stream] == [event_message]
+        assert [message async for message in topic_stream] == [event_message]
+        assert [message async for message in other_topic_stream] == []
+
+    async def test_closed_streams_removed(self, mock_websocket_connection):
+        event = Event('specific_event')
+        event_stream = self.phx_client.stream(event)
+        event_stream.close()
+
+        event_socket_message = json_handler.dumps(make_message(event, self.topic))
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(event_socket_message)
+
+        await self.phx_client.process_websocket_messages(mock_websocket_connection)
+
+        assert self.phx_client._streams[event] == []
+
+    async def test_presence_messages_applied_to_presence(self, mock_websocket_connection):
+        presence = Presence()
+        phx_client = PHXChannelsClient('ws://url/', presence=presence)
+
+        presence_state_message = make_message(PRESENCE_STATE_EVENT, self.topic, payload={'user': {'metas': []}})
+        presence_socket_message = json_handler.dumps(presence_state_message)
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(presence_socket_message)
+
+        await phx_client.process_websocket_messages(mock_websocket_connection)
+
+        assert presence.count(self.topic) == 1
+
+    async def test_large_messages_parsed_in_executor(self, mock_websocket_connection):
+        phx_client = PHXChannelsClient('ws://url/', parse_offload_size=100)
+        event = Event('specific_event')
+        phx_client.register_event_handler(event, handlers=[lambda x, y: None])
+
+        small_message = make_message(event, self.topic)
+        large_message = make_message(event, self.topic, payload={'levels': list(range(100))})
+        socket_messages = [json_handler.dumps(small_message), json_handler.dumps(large_message)]
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(*socket_messages)
+
+        with patch.object(phx_client._loop, 'run_in_executor', wraps=phx_client._loop.run_in_executor) as run_mock:
+            await phx_client.process_websocket_messages(mock_websocket_connection)
+
+        event_queue = phx_client._event_handler_config[event].queue
+        assert [event_queue.get_nowait(), event_queue.get_nowait()] == [small_message, large_message]
+        run_mock.assert_called_once_with(None, phx_client._parse_message, socket_messages[1])
+
+    async def test_messages_with_invalid_payloads_dropped(self, mock_websocket_connection, caplog):
+        event = Event('specific_event')
+        self.phx_client.register_event_handler(event, handlers=[lambda x, y: None], payload_schema=dict[str, int])
+
+        invalid_message = make_message(event, self.topic, payload={'count': 'one'})
+        valid_message = make_message(event, self.topic, payload={'count': 1})
+        socket_messages = [json_handler.dumps(invalid_message), json_handler.dumps(valid_message)]
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(*socket_messages)
+
+        await self.phx_client.process_websocket_messages(mock_websocket_connection)
+
+        event_queue = self.phx_client._event_handler_config[event].queue
+        assert event_queue.get_nowait().decoded_payload == {'count': 1}
+        assert event_queue.empty()
+        assert 'payload.count: expected int, got str' in caplog.text
+
+    async def test_frames_published_to_shared_rings(self, mock_websocket_connection):
+        ring = SharedRingBuffer(capacity=4096)
+        phx_client = PHXChannelsClient('ws://url/', shared_rings=SharedRingPublisher([ring]))
+
+        reply_frame = json_handler.dumps(make_message(PHXEvent.reply, self.topic, payload={'status': 'ok'}))
+        event_frame = json_handler.dumps(make_message(Event('specific_event'), self.topic))
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(reply_frame, event_frame)
+
+        try:
+            await phx_client.process_websocket_messages(mock_websocket_connection)
+            assert ring.read_batch() == [event_frame]
+        finally:
+            ring.close()
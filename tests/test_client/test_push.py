@@ -0,0 +1,20 @@
+import pytest
+
+from phx_events.client import PHXChannelsClient
+from phx_events.phx_messages import Event, PHXMessage, Topic
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestPHXChannelsClientPush:
+    def setup(self):
+        self.phx_client = PHXChannelsClient('ws://url/')
+
+    async def test_message_put_on_outbound_queue(self):
+        message = await self.phx_client.push(Topic('topic:subtopic'), Event('new_msg'), payload={'body': 'hi'})
+
+        assert isinstance(message, PHXMessage)
+        assert message.payload == {'body': 'hi'}
+        assert message.ref is not None
+        assert self.phx_client.outbound_queue._queue.get_nowait() == message
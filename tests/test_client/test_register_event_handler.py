@@ -1,8 +1,13 @@
 import asyncio
 from unittest.mock import Mock, patch
 
+import pytest
+
 from phx_events.client import PHXChannelsClient
+from phx_events.conflation import ConflatingQueue
+from phx_events.exceptions import PHXClientError
 from phx_events.phx_messages import Event, Topic
+from phx_events.state_store import topic_key
 
 
 async def handler_function(message, client):
@@ -67,3 +72,83 @@ class TestPHXChannelsClientRegisterEventHandler:
         assert second_handler_function in handler_config.default_handlers
         assert len(handler_config.topic_handlers) == 1
         assert handler_config.topic_handlers == {topic: [second_handler_function]}
+
+    def test_handler_timeouts_set_if_timeout_passed_in(self):
+        def second_handler_function(message, client):
+            return None
+
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(event=self.event, handlers=[handler_function], timeout=1.5)
+            self.phx_client.register_event_handler(event=self.event, handlers=[second_handler_function])
+
+        handler_config = self.phx_client._event_handler_config[self.event]
+
+        assert handler_config.handler_timeouts == {handler_function: 1.5}
+
+    def test_conflating_queue_used_if_conflation_key_passed_in(self):
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(
+                event=self.event,
+                handlers=[handler_function],
+                conflation_key=topic_key,
+            )
+
+        handler_config = self.phx_client._event_handler_config[self.event]
+
+        assert isinstance(handler_config.queue, ConflatingQueue)
+        assert handler_config.queue.key_function is topic_key
+
+    def test_conflation_key_raises_if_event_already_registered_without_it(self):
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(event=self.event, handlers=[handler_function])
+
+            with pytest.raises(PHXClientError):
+                self.phx_client.register_event_handler(
+                    event=self.event,
+                    handlers=[handler_function],
+                    conflation_key=topic_key,
+                )
+
+    def test_payload_schema_rejected_without_changing_streamed_event(self):
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(event=self.event, handlers=[handler_function], stream_path=('rows',))
+
+            with pytest.raises(PHXClientError, match='can have a stream_path or a payload_schema, not both'):
+                self.phx_client.register_event_handler(
+                    event=self.event,
+                    handlers=[handler_function, handler_function],
+                    payload_schema=dict[str, int],
+                )
+
+        handler_config = self.phx_client._event_handler_config[self.event]
+
+        assert handler_config.default_handlers == [handler_function]
+        assert handler_config.stream_path == ('rows',)
+        assert handler_config.payload_decoder is None
+
+    def test_message_expiry_set_per_event_and_topic_if_max_age_passed_in(self):
+        topic = Topic('topic:1')
+
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(event=self.event, handlers=[handler_function], max_age=10)
+            self.phx_client.register_event_handler(
+                event=self.event,
+                handlers=[handler_function],
+                topic=topic,
+                max_age=2,
+                timestamp_field='sent_at',
+            )
+
+        expiry = self.phx_client._event_handler_config[self.event].expiry
+
+        assert expiry.max_age == 10
+        assert expiry.topic_max_ages == {topic: 2}
+        assert expiry.timestamp_field == 'sent_at'
+
+    def test_event_queue_bounded_by_event_queue_size(self):
+        self.phx_client.event_queue_size = 5
+
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(event=self.event, handlers=[handler_function])
+
+        assert self.phx_client._event_handler_config[self.event].queue.maxsize == 5
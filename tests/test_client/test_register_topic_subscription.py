@@ -3,7 +3,7 @@ import asyncio
 import pytest
 
 from phx_events.client import PHXChannelsClient
-from phx_events.exceptions import PHXTopicTooManyRegistrationsError
+from phx_events.exceptions import PHXClientError, PHXTopicTooManyRegistrationsError
 from phx_events.phx_messages import Topic
 
 
@@ -25,3 +25,20 @@ class TestPHXChannelsClientRegisterTopicSubscription:
 
         with pytest.raises(PHXTopicTooManyRegistrationsError, match=expected_error):
             self.phx_client.register_topic_subscription(topic)
+
+    def test_unregistered_topic_not_subscribed(self):
+        topic = Topic('topic:subtopic')
+        self.phx_client.register_topic_subscription(topic)
+        self.phx_client.register_topic_subscription(Topic('topic:other'))
+
+        self.phx_client.unregister_topic_subscription(topic)
+
+        assert self.phx_client.registered_topics() == [Topic('topic:other')]
+
+    def test_unregistering_subscribed_topic_raises_exception(self):
+        topic = Topic('topic:subtopic')
+        self.phx_client.register_topic_subscription(topic)
+        self.phx_client._topic_registration_status[topic].connection_ref = '1'
+
+        with pytest.raises(PHXClientError, match='Topic topic:subtopic already subscribed'):
+            self.phx_client.unregister_topic_subscription(topic)
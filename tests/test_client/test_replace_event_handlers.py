@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+
+from phx_events.client import PHXChannelsClient
+from phx_events.handler_isolation import HandlerStats
+from phx_events.phx_messages import Event, Topic
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def old_handler(message, client):
+    return None
+
+
+def new_handler(message, client):
+    return None
+
+
+class TestPHXChannelsClientReplaceEventHandlers:
+    def setup(self):
+        self.phx_client = PHXChannelsClient('ws://url/')
+        self.event = Event('event_name')
+        self.topic = Topic('topic:subtopic')
+
+    def test_default_handlers_replaced(self):
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(self.event, handlers=[old_handler], timeout=1)
+            old_default_handlers = self.phx_client._event_handler_config[self.event].default_handlers
+
+            self.phx_client.replace_event_handlers(self.event, [new_handler], optional=True)
+
+        handler_config = self.phx_client._event_handler_config[self.event]
+        assert handler_config.default_handlers == [new_handler]
+        assert handler_config.handler_timeouts == {}
+        assert handler_config.optional_handlers == {new_handler}
+        # Messages already being handled keep the list they started with
+        assert old_default_handlers == [old_handler]
+
+    def test_topic_handlers_replaced(self):
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(self.event, handlers=[old_handler])
+            self.phx_client.register_event_handler(self.event, handlers=[old_handler], topic=self.topic)
+
+            self.phx_client.replace_event_handlers(self.event, [new_handler], topic=self.topic)
+
+        handler_config = self.phx_client._event_handler_config[self.event]
+        assert handler_config.default_handlers == [old_handler]
+        assert handler_config.topic_handlers == {self.topic: [new_handler]}
+
+    def test_removed_handler_stats_dropped(self):
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.register_event_handler(self.event, handlers=[old_handler])
+            self.phx_client.handler_stats[old_handler] = HandlerStats(timeouts=2)
+
+            self.phx_client.replace_event_handlers(self.event, [new_handler])
+
+        assert old_handler not in self.phx_client.handler_stats
+
+    def test_unregistered_event_registered(self):
+        with patch.object(self.phx_client, '_loop'):
+            self.phx_client.replace_event_handlers(self.event, [new_handler], timeout=2)
+
+        handler_config = self.phx_client._event_handler_config[self.event]
+        assert handler_config.default_handlers == [new_handler]
+        assert handler_config.handler_timeouts == {new_handler: 2}
+
+    async def test_removed_handler_lane_closed_after_pending_messages(self):
+        self.phx_client.register_event_handler(self.event, handlers=[old_handler])
+        handler_lane = Mock(join=Mock(return_value=asyncio.sleep(0)))
+        self.phx_client._handler_lanes[old_handler] = handler_lane
+
+        self.phx_client.replace_event_handlers(self.event, [new_handler])
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+
+        assert old_handler not in self.phx_client._handler_lanes
+        handler_lane.join.assert_called_once_with()
+        handler_lane.close.assert_called_once_with()
+
+        self.phx_client._event_handler_config[self.event].task.cancel()
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from phx_events import json_handler
+from phx_events.client import PHXChannelsClient
+from phx_events.inbox import DurableInbox
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+from tests.utils import async_iter
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestPHXChannelsClientReplayInbox:
+    def setup(self):
+        self.event = Event('event_name')
+        self.topic = Topic('topic:subtopic')
+
+    def make_client(self, inbox_directory, handled_messages):
+        async def event_handler(message, client):
+            handled_messages.append(message)
+
+        phx_client = PHXChannelsClient('ws://url/', inbox=DurableInbox(inbox_directory))
+        phx_client.register_event_handler(self.event, handlers=[event_handler])
+        return phx_client
+
+    async def test_does_nothing_without_inbox(self):
+        phx_client = PHXChannelsClient('ws://url/')
+
+        await phx_client._replay_inbox()
+
+        assert phx_client._inbox_sync_task is None
+
+    async def test_unacknowledged_messages_replayed(self, tmp_path):
+        message = make_message(self.event, self.topic)
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        inbox.append(json_handler.dumps(message))
+        inbox.close()
+
+        handled_messages = []
+        phx_client = self.make_client(tmp_path, handled_messages)
+        phx_client._client_start_event.set()
+
+        await phx_client._replay_inbox()
+        await asyncio.wait_for(phx_client._event_handler_config[self.event].queue.join(), timeout=1)
+        phx_client.shutdown('test')
+
+        assert handled_messages == [message]
+        assert DurableInbox(tmp_path).open() == []
+
+    async def test_received_messages_written_to_inbox(self, tmp_path, mock_websocket_connection):
+        socket_message = json_handler.dumps(make_message(self.event, self.topic))
+        mock_websocket_connection.__aiter__.side_effect = lambda: async_iter(socket_message)
+
+        phx_client = self.make_client(tmp_path, [])
+        phx_client.inbox.open()
+        await phx_client.process_websocket_messages(mock_websocket_connection)
+        phx_client.shutdown('test')
+
+        assert DurableInbox(tmp_path).open() == [(0, socket_message)]
@@ -5,6 +5,7 @@ import pytest
 
 from phx_events.client import PHXChannelsClient
 from phx_events.phx_messages import Topic
+from phx_events.transport import TransportConfig
 
 
 pytestmark = pytest.mark.asyncio
@@ -30,7 +31,21 @@ class TestPHXChannelsClientStartProcessing:
     async def test_websocket_client_called_with_url(self, mock_websocket_client):
         await self.phx_client.start_processing()
 
-        mock_websocket_client.connect.assert_called_with(self.phx_client.channel_socket_url)
+        mock_websocket_client.connect.assert_called_with(
+            self.phx_client.channel_socket_url,
+            **self.phx_client.transport_config.connect_kwargs(),
+        )
+
+    async def test_websocket_client_called_with_transport_config(self, mock_websocket_client):
+        transport_config = TransportConfig(compression=None, max_queue=1024)
+        phx_client = PHXChannelsClient('ws://url/', transport_config=transport_config)
+        phx_client.register_topic_subscription(Topic('topic:subtopic'))
+
+        await phx_client.start_processing()
+
+        _, connect_kwargs = mock_websocket_client.connect.call_args
+        assert connect_kwargs['compression'] is None
+        assert connect_kwargs['max_queue'] == 1024
 
     async def test_signal_handlers_functions_created_and_registered_correctly(
         self,
@@ -82,3 +97,35 @@ class TestPHXChannelsClientStartProcessing:
         await self.phx_client.start_processing()
 
         mock_process_websocket_messages.assert_called_with(mock_websocket_connection)
+
+    async def test_signal_handlers_drain_if_drain_timeout_set(
+        self,
+        mock_executor_pool,
+        mock_executor_contextmanager,
+        mock_websocket_connection,
+    ):
+        mock_loop = Mock()
+        self.phx_client._loop = mock_loop
+        # Prevent any processing attempts
+        self.phx_client._subscribe_to_registered_topics = AsyncMock()
+        self.phx_client.process_websocket_messages = AsyncMock()
+        undelivered_handler = Mock()
+
+        partial_patch = patch('phx_events.client.partial')
+        start_drain_patch = patch.object(self.phx_client, '_start_drain')
+
+        with start_drain_patch as mock_start_drain, partial_patch as mock_partial:
+            await self.phx_client.start_processing(
+                executor_pool=mock_executor_pool,
+                drain_timeout=5,
+                undelivered_handler=undelivered_handler,
+            )
+
+        mock_partial.assert_any_call(
+            mock_start_drain,
+            timeout=5,
+            websocket=mock_websocket_connection,
+            executor_pool=mock_executor_contextmanager,
+            undelivered_handler=undelivered_handler,
+        )
+        mock_loop.add_signal_handler.assert_any_call(signal.SIGTERM, mock_partial.return_value)
@@ -0,0 +1,78 @@
+from array import array
+import asyncio
+from decimal import Decimal
+from unittest.mock import Mock
+
+import pytest
+
+from phx_events.columnar import ColumnarSink
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestColumnarSink:
+    def setup(self):
+        self.batches = []
+        self.event = Event('tick')
+        self.topic = Topic('ticks:BTC')
+
+    def tick(self, price, volume, topic=None):
+        return make_message(self.event, topic or self.topic, payload={'price': price, 'volume': volume})
+
+    async def test_full_batches_handed_over_as_columns(self):
+        sink = ColumnarSink({'price': 'd', 'volume': 'q'}, self.batches.append, batch_size=3)
+
+        for index in range(7):
+            await sink.handle_message(self.tick(Decimal(f'100.{index}'), index), Mock())
+
+        assert [len(batch) for batch in self.batches] == [3, 3]
+        assert self.batches[0].key == self.topic
+        assert self.batches[0].columns == {
+            'price': array('d', [100.0, 100.1, 100.2]),
+            'volume': array('q', [0, 1, 2]),
+        }
+
+    async def test_rows_collected_per_key(self):
+        other_topic = Topic('ticks:ETH')
+        sink = ColumnarSink({'price': 'd'}, self.batches.append, batch_size=2)
+
+        for topic in (self.topic, other_topic, other_topic):
+            sink.add(self.tick(Decimal('1.5'), 1, topic))
+
+        assert [(batch.key, len(batch)) for batch in self.batches] == [(other_topic, 2)]
+
+    async def test_messages_missing_fields_skipped(self):
+        sink = ColumnarSink({'price': 'd', 'volume': 'q'}, self.batches.append, batch_size=2)
+
+        sink.add(make_message(self.event, self.topic, payload={'price': Decimal('1.5')}))
+        sink.add(make_message(self.event, self.topic, payload={'price': 'not a price', 'volume': 1}))
+        sink.flush_all()
+
+        assert sink.skipped == 2
+        assert self.batches == []
+
+    async def test_partial_batch_handed_over_after_window(self):
+        sink = ColumnarSink({'price': 'd'}, self.batches.append, batch_size=None, window=0.01)
+
+        for index in range(2000):
+            sink.add(self.tick(Decimal(index), index))
+        await asyncio.sleep(0.05)
+
+        assert len(self.batches) == 1
+        assert self.batches[0].columns['price'] == array('d', range(2000))
+
+    async def test_flush_hands_over_partial_batch(self):
+        sink = ColumnarSink({'price': 'd'}, self.batches.append, batch_size=10, window=60)
+
+        sink.add(self.tick(Decimal('1.5'), 1))
+        sink.flush(self.topic)
+
+        assert self.batches[0].columns == {'price': array('d', [1.5])}
+        assert self.batches[0].started_at <= self.batches[0].ended_at
+
+    async def test_batch_size_or_window_required(self):
+        with pytest.raises(ValueError, match='batch_size or window'):
+            ColumnarSink({'price': 'd'}, self.batches.append, batch_size=None)
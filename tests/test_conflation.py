@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from phx_events.conflation import ConflatingQueue
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def price_message(topic, price):
+    return make_message(Event('price'), Topic(topic), payload={'price': price, 'symbol': topic})
+
+
+class TestConflatingQueue:
+    async def test_latest_message_kept_per_topic_in_first_arrival_order(self):
+        queue = ConflatingQueue()
+
+        await queue.put(price_message('btc', 1))
+        await queue.put(price_message('eth', 2))
+        await queue.put(price_message('btc', 3))
+
+        assert queue.qsize() == 2
+        assert queue.conflated == 1
+        assert await queue.get() == price_message('btc', 3)
+        assert await queue.get() == price_message('eth', 2)
+        assert queue.empty()
+
+    async def test_custom_key_function(self):
+        queue = ConflatingQueue(key_function=lambda message: message.payload['symbol'])
+
+        await queue.put(make_message(Event('price'), Topic('prices'), payload={'symbol': 'btc', 'price': 1}))
+        await queue.put(make_message(Event('price'), Topic('prices'), payload={'symbol': 'btc', 'price': 2}))
+
+        assert queue.qsize() == 1
+        assert (await queue.get()).payload['price'] == 2
+
+    async def test_replaced_messages_passed_to_on_conflated(self):
+        conflated_messages = []
+        queue = ConflatingQueue(on_conflated=conflated_messages.append)
+
+        await queue.put(price_message('btc', 1))
+        await queue.put(price_message('eth', 2))
+        await queue.put(price_message('btc', 3))
+
+        assert conflated_messages == [price_message('btc', 1)]
+
+    async def test_full_queue_replaces_pending_message_without_waiting(self):
+        queue = ConflatingQueue(maxsize=1)
+        await queue.put(price_message('btc', 1))
+
+        await asyncio.wait_for(queue.put(price_message('btc', 2)), timeout=0.1)
+        queue.put_nowait(price_message('btc', 3))
+
+        assert queue.conflated == 2
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(queue.put(price_message('eth', 4)), timeout=0.01)
+        assert await queue.get() == price_message('btc', 3)
+        queue.task_done()
+        await asyncio.wait_for(queue.join(), timeout=1)
+
+    async def test_join_completes_when_conflated_messages_processed(self):
+        queue = ConflatingQueue()
+        await queue.put(price_message('btc', 1))
+        await queue.put(price_message('btc', 2))
+
+        await queue.get()
+        queue.task_done()
+
+        await asyncio.wait_for(queue.join(), timeout=1)
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+import time
+
+from phx_events.expiry import MessageExpiry
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+def quote_message(topic='quote:1', **payload):
+    return make_message(Event('quote'), Topic(topic), payload=payload)
+
+
+class TestMessageExpiry:
+    def test_age_measured_from_receive_time(self):
+        expiry = MessageExpiry(max_age=5)
+        message = quote_message()
+
+        expiry._received_at[id(message)] = time.time() - 10
+
+        assert expiry.check(message) is True
+        assert expiry.expired == 1
+        assert expiry._received_at == {}
+
+    def test_fresh_message_not_expired(self):
+        expiry = MessageExpiry(max_age=5)
+        message = quote_message()
+
+        expiry.mark_received(message)
+
+        assert expiry.check(message) is False
+        assert expiry.expired == 0
+
+    def test_topic_max_age_overrides_event_max_age(self):
+        expiry = MessageExpiry()
+        expiry.topic_max_ages[Topic('quote:1')] = 1
+        sent_at = Decimal(time.time() - 2)
+
+        assert expiry.check(quote_message('quote:1', sent_at=sent_at)) is False
+        expiry.timestamp_field = 'sent_at'
+        assert expiry.check(quote_message('quote:1', sent_at=sent_at)) is True
+        assert expiry.check(quote_message('quote:2', sent_at=sent_at)) is False
+
+    def test_iso_timestamp_field(self):
+        expired_messages = []
+        expiry = MessageExpiry(max_age=60, timestamp_field='sent_at', on_expired=expired_messages.append)
+        message = quote_message(sent_at=datetime(2020, 1, 1, tzinfo=timezone.utc).isoformat())
+
+        assert expiry.check(message) is True
+        assert expired_messages == [message]
+
+    def test_iso_timestamp_with_z_suffix(self):
+        expiry = MessageExpiry(max_age=60, timestamp_field='sent_at')
+
+        assert expiry.check(quote_message(sent_at='2020-01-01T00:00:00.000000Z')) is True
+        sent_at = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        assert expiry.check(quote_message(sent_at=sent_at)) is False
+
+    def test_millisecond_epoch_timestamp(self):
+        expiry = MessageExpiry(max_age=60, timestamp_field='sent_at')
+
+        assert expiry.check(quote_message(sent_at=int(time.time() * 1000))) is False
+        assert expiry.check(quote_message(sent_at=int((time.time() - 120) * 1000))) is True
+
+    def test_receive_time_used_if_timestamp_field_invalid(self):
+        expiry = MessageExpiry(max_age=60, timestamp_field='sent_at')
+
+        assert expiry.check(quote_message(sent_at='yesterday')) is False
+        assert expiry.check(quote_message(sent_at=True)) is False
+        assert expiry.check(quote_message()) is False
+        assert expiry.invalid_timestamps == 2
@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from phx_events.handler_isolation import handler_name, HandlerLane, HandlerStats
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def sync_handler(message, client):
+    return None
+
+
+class TestHandlerName:
+    def test_function_name_used(self):
+        assert handler_name(sync_handler) == 'sync_handler'
+
+    def test_repr_used_if_no_name(self):
+        handler = Mock(spec=[])
+
+        assert handler_name(handler) == repr(handler)
+
+
+class TestHandlerLane:
+    def setup(self):
+        self.message = make_message(Event('event_name'), Topic('topic:subtopic'))
+        self.logger = logging.getLogger('tests.handler_lane')
+
+    async def test_submitted_messages_run_through_handler(self, event_loop):
+        run_handler = AsyncMock()
+        lane = HandlerLane(sync_handler, run_handler, HandlerStats(), self.logger, event_loop, maxsize=10)
+
+        lane.submit(self.message)
+        await asyncio.wait_for(lane.join(), timeout=1)
+        lane.close()
+
+        run_handler.assert_awaited_once_with(self.message)
+
+    async def test_messages_dropped_and_counted_when_full(self, event_loop):
+        handler_stats = HandlerStats()
+        lane = HandlerLane(sync_handler, AsyncMock(), handler_stats, self.logger, event_loop, maxsize=1)
+
+        lane.submit(self.message)
+        lane.submit(self.message)
+        lane.close()
+
+        assert handler_stats.dropped == 1
+
+    async def test_handler_errors_logged(self, event_loop, caplog):
+        run_handler = AsyncMock(side_effect=Exception('lane_error'))
+        lane = HandlerLane(sync_handler, run_handler, HandlerStats(), self.logger, event_loop, maxsize=10)
+
+        lane.submit(self.message)
+        await asyncio.wait_for(lane.join(), timeout=1)
+        lane.close()
+
+        assert caplog.messages == ["Error executing handler - exception=Exception('lane_error')"]
+
+    async def test_close_shuts_down_executor_pool(self, event_loop):
+        executor_pool = Mock()
+        lane = HandlerLane(sync_handler, AsyncMock(), HandlerStats(), self.logger, event_loop, 10, executor_pool)
+
+        lane.close()
+
+        executor_pool.shutdown.assert_called_with(wait=False, cancel_futures=True)
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+
+from phx_events.handler_loops import HandlerLoop, HandlerLoopPool
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestHandlerLoop:
+    def setup(self):
+        self.handler_loop = HandlerLoop('test_handler_loop')
+        self.handler_loop.start()
+
+    def teardown(self):
+        self.handler_loop.stop()
+
+    async def test_coroutines_run_on_handler_loop_thread(self):
+        handler_threads = []
+
+        async def handler():
+            handler_threads.append(threading.current_thread().name)
+
+        await asyncio.wait_for(asyncio.wrap_future(self.handler_loop.submit(handler)), timeout=1)
+
+        assert handler_threads == ['test_handler_loop']
+
+    async def test_handler_exceptions_returned_to_caller(self):
+        async def handler():
+            raise ValueError('handler_error')
+
+        with pytest.raises(ValueError, match='handler_error'):
+            await asyncio.wait_for(asyncio.wrap_future(self.handler_loop.submit(handler)), timeout=1)
+
+    async def test_cancelling_future_cancels_handler(self):
+        handler_started = threading.Event()
+        handler_cancelled = threading.Event()
+
+        async def handler():
+            handler_started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                handler_cancelled.set()
+                raise
+
+        handler_future = self.handler_loop.submit(handler)
+        await asyncio.get_running_loop().run_in_executor(None, handler_started.wait, 1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.wrap_future(handler_future), timeout=0.01)
+
+        assert await asyncio.get_running_loop().run_in_executor(None, handler_cancelled.wait, 1)
+
+
+class TestHandlerLoopPool:
+    def test_same_key_uses_same_loop(self):
+        pool = HandlerLoopPool(size=4)
+
+        assert pool.loop_for('topic:1') is pool.loop_for('topic:1')
+        assert len(pool.handler_loops) == 4
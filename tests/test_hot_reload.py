@@ -0,0 +1,88 @@
+import sys
+import textwrap
+
+import pytest
+
+from phx_events.client import PHXChannelsClient
+from phx_events.conflation import ConflatingQueue
+from phx_events.hot_reload import reload_handlers
+from phx_events.phx_messages import Event, Topic
+
+
+pytestmark = pytest.mark.asyncio
+
+HANDLERS_MODULE = '''
+from phx_events.phx_messages import Event, Topic
+
+
+def {name}(message, client):
+    return None
+
+
+def register(client):
+    client.register_event_handler(Event('{event}'), handlers=[{name}], timeout={timeout})
+    client.register_topic_subscription(Topic('topic:subtopic'))
+'''
+
+NEW_EVENT_OPTIONS_MODULE = '''
+from phx_events.phx_messages import Event
+from phx_events.state_store import topic_key
+
+
+def price_handler(message, client):
+    return None
+
+
+def register(client):
+    client.register_event_handler(Event('price'), handlers=[price_handler], conflation_key=topic_key, max_age=5)
+'''
+
+
+class TestReloadHandlers:
+    @pytest.fixture(autouse=True)
+    def handlers_module(self, tmp_path, monkeypatch):
+        self.module_path = tmp_path / 'reloadable_handlers.py'
+        monkeypatch.syspath_prepend(str(tmp_path))
+        yield
+        sys.modules.pop('reloadable_handlers', None)
+
+    def write_module(self, name, event, timeout=None):
+        self.module_path.write_text(textwrap.dedent(HANDLERS_MODULE.format(name=name, event=event, timeout=timeout)))
+
+    async def test_handlers_swapped_for_reloaded_module(self):
+        phx_client = PHXChannelsClient('ws://url/')
+        self.write_module('old_handler', 'event_name')
+        reload_handlers(phx_client, 'reloadable_handlers')
+        phx_client.register_topic_subscription(Topic('topic:subtopic'))
+
+        self.write_module('new_handler', 'other_event', timeout=2)
+        reload_handlers(phx_client, 'reloadable_handlers:register')
+
+        event_config = phx_client._event_handler_config[Event('event_name')]
+        other_event_config = phx_client._event_handler_config[Event('other_event')]
+        new_handler = sys.modules['reloadable_handlers'].new_handler
+
+        assert event_config.default_handlers == []
+        assert other_event_config.default_handlers == [new_handler]
+        assert other_event_config.handler_timeouts == {new_handler: 2}
+        assert list(phx_client._topic_registration_status) == [Topic('topic:subtopic')]
+
+        for handler_config in phx_client._event_handler_config.values():
+            handler_config.task.cancel()
+
+    async def test_options_applied_to_events_added_by_reload(self):
+        phx_client = PHXChannelsClient('ws://url/')
+        self.write_module('old_handler', 'event_name')
+        reload_handlers(phx_client, 'reloadable_handlers')
+
+        self.module_path.write_text(NEW_EVENT_OPTIONS_MODULE)
+        reload_handlers(phx_client, 'reloadable_handlers')
+
+        price_config = phx_client._event_handler_config[Event('price')]
+        assert isinstance(price_config.queue, ConflatingQueue)
+        assert price_config.expiry is not None
+        assert price_config.expiry.max_age == 5
+        assert price_config.default_handlers == [sys.modules['reloadable_handlers'].price_handler]
+
+        for handler_config in phx_client._event_handler_config.values():
+            handler_config.task.cancel()
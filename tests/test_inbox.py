@@ -0,0 +1,138 @@
+import asyncio
+import threading
+
+import pytest
+
+from phx_events.inbox import DurableInbox
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+class TestDurableInbox:
+    def setup(self):
+        self.message = make_message(Event('event_name'), Topic('topic:subtopic'))
+
+    def test_unacknowledged_frames_returned_on_open(self, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        first_id = inbox.append(b'first')
+        second_id = inbox.append('second')
+        inbox.track(self.message, first_id)
+        inbox.ack(self.message)
+        inbox.close()
+
+        assert DurableInbox(tmp_path).open() == [(second_id, b'second')]
+
+    def test_entry_ids_continue_after_reopening(self, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        first_id = inbox.append(b'first')
+        inbox.close()
+
+        reopened_inbox = DurableInbox(tmp_path)
+        reopened_inbox.open()
+
+        assert reopened_inbox.append(b'second') == first_id + 1
+
+    def test_partially_written_record_ignored(self, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        entry_id = inbox.append(b'complete')
+        inbox.append(b'torn')
+        inbox.close()
+
+        segment_path = next(tmp_path.glob('*.log'))
+        segment_path.write_bytes(segment_path.read_bytes()[:-2])
+
+        assert DurableInbox(tmp_path).open() == [(entry_id, b'complete')]
+
+    def test_records_fsynced_in_batches(self, tmp_path, monkeypatch):
+        fsync_calls = []
+        monkeypatch.setattr('phx_events.inbox.os.fsync', fsync_calls.append)
+
+        inbox = DurableInbox(tmp_path, fsync_batch_size=3)
+        inbox.open()
+        for _ in range(7):
+            inbox.append(b'frame')
+
+        assert len(fsync_calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_full_batch_fsynced_in_executor_while_syncing_periodically(self, tmp_path, monkeypatch):
+        fsync_threads = []
+        monkeypatch.setattr('phx_events.inbox.os.fsync', lambda _: fsync_threads.append(threading.get_ident()))
+
+        inbox = DurableInbox(tmp_path, fsync_batch_size=3, fsync_interval=60)
+        inbox.open()
+        sync_task = asyncio.create_task(inbox.sync_periodically())
+        await asyncio.sleep(0)
+
+        for _ in range(3):
+            inbox.append(b'frame')
+        assert fsync_threads == []
+
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            if fsync_threads:
+                break
+
+        sync_task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await sync_task
+
+        assert fsync_threads and threading.get_ident() not in fsync_threads
+        assert inbox._unsynced_records == 0
+        inbox.close()
+
+    def test_fully_acknowledged_segments_compacted(self, tmp_path):
+        inbox = DurableInbox(tmp_path, segment_max_bytes=1)
+        inbox.open()
+        messages = [make_message(Event('event_name'), Topic('topic'), ref=str(index)) for index in range(3)]
+        for message in messages:
+            inbox.track(message, inbox.append(b'frame'))
+
+        assert len(list(tmp_path.glob('*.log'))) == 3
+
+        # Acknowledging a newer segment first can't remove it while an older segment has unacknowledged frames
+        inbox.ack(messages[1])
+        assert len(list(tmp_path.glob('*.log'))) == 3
+
+        inbox.ack(messages[0])
+        assert len(list(tmp_path.glob('*.log'))) == 1
+
+    def test_ack_ignores_untracked_messages(self, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+
+        inbox.ack(self.message)
+        inbox.close()
+
+        assert DurableInbox(tmp_path).open() == []
+
+    def test_held_message_acknowledged_once_every_hold_done(self, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        inbox.track(self.message, inbox.append(b'frame'))
+
+        inbox.hold(self.message)
+        inbox.hold(self.message)
+        inbox.done(self.message, succeeded=True)
+        assert self.message._inbox_entry_id in inbox._tracked_entries
+
+        inbox.done(self.message, succeeded=True)
+        inbox.close()
+        assert DurableInbox(tmp_path).open() == []
+
+    def test_failed_message_left_unacknowledged(self, tmp_path):
+        inbox = DurableInbox(tmp_path)
+        inbox.open()
+        inbox.track(self.message, inbox.append(b'frame'))
+
+        inbox.hold(self.message)
+        inbox.hold(self.message)
+        inbox.done(self.message, succeeded=False)
+        inbox.done(self.message, succeeded=True)
+        inbox.close()
+
+        assert DurableInbox(tmp_path).open() == [(0, b'frame')]
+        assert inbox._tracked_entries == set()
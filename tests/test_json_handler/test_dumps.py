@@ -2,6 +2,8 @@ from datetime import datetime
 from decimal import Decimal
 
 from phx_events import json_handler
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
 
 
 def test_dumps_returns_json_string_and_handles_decimals():
@@ -24,3 +26,9 @@ def test_dumps_returns_json_string_and_handles_decimals():
         '"datetime":"2021-08-30T15:56:39.001254",'
         '"deeper_dict":{"list":["a","b","c","2021-08-30T15:56:39.001254"],"text":"Yes!"}}'
     ).encode()
+
+
+def test_dumps_message_without_decoded_payload():
+    message = make_message(Event('event'), Topic('topic:subtopic'), ref='1', payload={'a': 1}, decoded_payload={'a': 1})
+
+    assert json_handler.dumps(message) == b'{"topic":"topic:subtopic","ref":"1","payload":{"a":1},"event":"event"}'
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from phx_events.loop_monitor import LagHistogram, LoopLagMonitor
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestLagHistogram:
+    def test_samples_counted_in_buckets(self):
+        histogram = LagHistogram(bucket_bounds=[0.01, 0.1])
+
+        histogram.record(0.005)
+        histogram.record(0.05)
+        histogram.record(0.1)
+        histogram.record(1)
+
+        assert histogram.counts == [1, 2, 1]
+        assert histogram.sample_count == 4
+        assert histogram.max_lag == 1
+        assert histogram.mean_lag == pytest.approx(1.155 / 4)
+
+
+class TestLoopLagMonitor:
+    def setup(self):
+        self.on_shed_change = Mock()
+        self.monitor = LoopLagMonitor(
+            shed_threshold=0.1,
+            recover_threshold=0.01,
+            recovery_samples=2,
+            on_shed_change=self.on_shed_change,
+        )
+
+    def test_shedding_starts_at_threshold(self):
+        self.monitor.record_lag(0.05)
+        assert not self.monitor.shedding
+
+        self.monitor.record_lag(0.1)
+
+        assert self.monitor.shedding
+        self.on_shed_change.assert_called_once_with(True)
+
+    def test_shedding_stops_after_recovery_samples(self):
+        self.monitor.record_lag(0.2)
+
+        self.monitor.record_lag(0.005)
+        # A sample between the thresholds resets nothing but doesn't count towards recovery
+        self.monitor.record_lag(0.05)
+        assert self.monitor.shedding
+
+        self.monitor.record_lag(0.005)
+
+        assert not self.monitor.shedding
+        self.on_shed_change.assert_called_with(False)
+
+    def test_lag_over_threshold_resets_recovery(self):
+        self.monitor.record_lag(0.2)
+        self.monitor.record_lag(0.005)
+        self.monitor.record_lag(0.2)
+        self.monitor.record_lag(0.005)
+
+        assert self.monitor.shedding
+
+    async def test_monitor_records_samples_until_stopped(self, event_loop):
+        monitor = LoopLagMonitor(interval=0.001)
+
+        monitor.start(event_loop, logging.getLogger('tests.loop_monitor'))
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+        assert monitor.histogram.sample_count > 0
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from phx_events.message_stream import MessageStream, OverflowPolicy
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestMessageStream:
+    def setup(self):
+        self.event = Event('event_name')
+        self.topic = Topic('topic:subtopic')
+        self.messages = [make_message(self.event, self.topic, ref=str(index)) for index in range(3)]
+
+    async def test_iterates_messages_until_closed(self):
+        message_stream = MessageStream(self.event)
+        for message in self.messages:
+            await message_stream.put(message)
+        message_stream.close()
+
+        assert [message async for message in message_stream] == self.messages
+
+    async def test_accepts_only_messages_for_topic(self):
+        message_stream = MessageStream(self.event, topic=self.topic)
+
+        assert message_stream.accepts(self.messages[0])
+        assert not message_stream.accepts(make_message(self.event, Topic('other_topic')))
+
+    async def test_drop_newest_when_full(self):
+        message_stream = MessageStream(self.event, maxsize=2, overflow=OverflowPolicy.drop_newest)
+        for message in self.messages:
+            await message_stream.put(message)
+        message_stream.close()
+
+        assert [message async for message in message_stream] == self.messages[:2]
+        assert message_stream.dropped == 1
+
+    async def test_drop_oldest_when_full(self):
+        message_stream = MessageStream(self.event, maxsize=2, overflow=OverflowPolicy.drop_oldest)
+        for message in self.messages:
+            await message_stream.put(message)
+        message_stream.close()
+
+        assert [message async for message in message_stream] == self.messages[1:]
+        assert message_stream.dropped == 1
+
+    async def test_block_waits_for_space(self):
+        message_stream = MessageStream(self.event, maxsize=1)
+        await message_stream.put(self.messages[0])
+
+        put_task = asyncio.create_task(message_stream.put(self.messages[1]))
+        await asyncio.sleep(0)
+        assert not put_task.done()
+
+        assert await message_stream.__anext__() == self.messages[0]
+        await asyncio.wait_for(put_task, timeout=1)
+        assert await message_stream.__anext__() == self.messages[1]
+
+    async def test_batches_yields_buffered_messages(self):
+        message_stream = MessageStream(self.event)
+        for message in self.messages:
+            await message_stream.put(message)
+        message_stream.close()
+
+        assert [batch async for batch in message_stream.batches(max_batch_size=2)] == [
+            self.messages[:2],
+            self.messages[2:],
+        ]
+
+    async def test_put_ignored_after_close(self):
+        message_stream = MessageStream(self.event)
+        message_stream.close()
+
+        await message_stream.put(self.messages[0])
+
+        assert [message async for message in message_stream] == []
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from phx_events.circuit_breaker import CircuitState
+from phx_events.client import PHXChannelsClient
+from phx_events.handler_isolation import HandlerStats
+from phx_events.metrics import render_metrics, start_metrics_server
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def event_handler(message, client):
+    return None
+
+
+class TestMetrics:
+    def setup(self):
+        self.phx_client = PHXChannelsClient('ws://url/')
+
+    async def test_queue_sizes_and_handler_stats_rendered(self):
+        event = Event('event_name')
+        self.phx_client.register_event_handler(event, handlers=[event_handler])
+        self.phx_client._event_handler_config[event].task.cancel()
+        await self.phx_client._event_handler_config[event].queue.put(make_message(event, Topic('topic:1')))
+        self.phx_client.handler_stats[event_handler] = HandlerStats(timeouts=2, circuit_state=CircuitState.open)
+
+        metrics = render_metrics(self.phx_client).splitlines()
+
+        assert 'phx_events_event_queue_size{event="event_name"} 1' in metrics
+        assert 'phx_events_handler_timeouts_total{handler="event_handler"} 2' in metrics
+        assert 'phx_events_handler_circuit_open{handler="event_handler"} 1' in metrics
+        assert 'phx_events_outbound_sent_total 0' in metrics
+
+    async def test_label_values_escaped(self):
+        event = Event('say "hi"\\')
+        self.phx_client.register_event_handler(event, handlers=[event_handler])
+        self.phx_client._event_handler_config[event].task.cancel()
+
+        metrics = render_metrics(self.phx_client).splitlines()
+
+        assert 'phx_events_event_queue_size{event="say \\"hi\\"\\\\"} 0' in metrics
+
+    async def test_metrics_served_over_http(self):
+        metrics_server = await start_metrics_server(self.phx_client, port=0)
+        port = metrics_server.sockets[0].getsockname()[1]
+
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = await reader.read()
+        writer.close()
+        metrics_server.close()
+
+        assert response.startswith(b'HTTP/1.1 200 OK')
+        assert response.endswith(render_metrics(self.phx_client).encode())
@@ -0,0 +1,141 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from phx_events import json_handler
+from phx_events.exceptions import PHXClientError
+from phx_events.outbound import OutboundQueue, RateLimit, TokenBucket
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestRateLimit:
+    @pytest.mark.parametrize(('rate', 'burst'), [(0, 1), (-1, 1), (1, 0)])
+    def test_invalid_limits_rejected(self, rate, burst):
+        with pytest.raises(ValueError):
+            RateLimit(rate=rate, burst=burst)
+
+
+class TestTokenBucket:
+    async def test_burst_available_immediately(self):
+        bucket = TokenBucket(RateLimit(rate=1, burst=3))
+
+        with patch('phx_events.outbound.asyncio.sleep') as mock_sleep:
+            for _ in range(3):
+                await bucket.acquire()
+
+        mock_sleep.assert_not_called()
+
+    async def test_waits_when_tokens_used(self):
+        bucket = TokenBucket(RateLimit(rate=1, burst=1))
+        await bucket.acquire()
+
+        def refill_bucket(_delay):
+            bucket._tokens = 1
+
+        with patch('phx_events.outbound.asyncio.sleep', side_effect=refill_bucket) as mock_sleep:
+            await bucket.acquire()
+
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args.args[0] == pytest.approx(1, abs=0.01)
+
+
+class TestOutboundQueue:
+    def setup(self):
+        self.topic = Topic('topic:subtopic')
+        self.messages = [make_message(Event('event_name'), self.topic, ref=str(index)) for index in range(3)]
+
+    async def test_messages_sent_in_order(self, event_loop):
+        websocket = AsyncMock()
+        outbound_queue = OutboundQueue()
+        for message in self.messages:
+            await outbound_queue.put(message)
+
+        outbound_queue.start(websocket, event_loop)
+        await asyncio.wait_for(outbound_queue.join(), timeout=1)
+        outbound_queue.close()
+
+        sent_messages = [call.args[0] for call in websocket.send.await_args_list]
+        assert sent_messages == [json_handler.dumps(message) for message in self.messages]
+        assert outbound_queue.sent == 3
+
+    async def test_take_batch_limited_to_batch_size(self):
+        outbound_queue = OutboundQueue(batch_size=2)
+        for message in self.messages[1:]:
+            await outbound_queue.put(message)
+
+        assert outbound_queue._take_batch(self.messages[0]) == self.messages[:2]
+
+    async def test_rate_limits_applied_per_topic_and_connection(self):
+        outbound_queue = OutboundQueue(
+            connection_rate_limit=RateLimit(rate=100, burst=10),
+            topic_rate_limit=RateLimit(rate=100, burst=10),
+        )
+
+        outbound_queue._add_pending(self.messages[0])
+        outbound_queue._add_pending(make_message(Event('event_name'), Topic('other_topic')))
+
+        assert outbound_queue._next_ready_topic() == (self.topic, float('inf'))
+        assert outbound_queue._topic_buckets.keys() == {self.topic, Topic('other_topic')}
+
+    async def test_throttled_topic_does_not_hold_up_other_topics(self, event_loop):
+        websocket = AsyncMock()
+        outbound_queue = OutboundQueue(topic_rate_limit=RateLimit(rate=1, burst=1))
+        other_message = make_message(Event('event_name'), Topic('other_topic'))
+        for message in [*self.messages[:2], other_message]:
+            await outbound_queue.put(message)
+
+        outbound_queue.start(websocket, event_loop)
+        await asyncio.sleep(0.05)
+        outbound_queue.close()
+
+        sent_messages = [call.args[0] for call in websocket.send.await_args_list]
+        assert sent_messages == [json_handler.dumps(self.messages[0]), json_handler.dumps(other_message)]
+
+    async def test_send_error_logged_and_raised_from_put(self, event_loop):
+        websocket = AsyncMock()
+        websocket.send.side_effect = ConnectionError('Connection lost')
+        outbound_queue = OutboundQueue()
+        await outbound_queue.put(self.messages[0])
+
+        with patch('phx_events.outbound.logger') as mock_logger:
+            sender_task = outbound_queue.start(websocket, event_loop)
+            with pytest.raises(ConnectionError):
+                await sender_task
+
+        mock_logger.error.assert_called_once()
+        with pytest.raises(PHXClientError):
+            await outbound_queue.put(self.messages[1])
+
+        # The message that failed is sent first once the sender is started again
+        websocket.send.side_effect = None
+        outbound_queue.start(websocket, event_loop)
+        await asyncio.wait_for(outbound_queue.join(), timeout=1)
+        outbound_queue.close()
+
+        assert websocket.send.await_args.args[0] == json_handler.dumps(self.messages[0])
+        assert outbound_queue.sent == 1
+
+    async def test_waiting_put_raises_when_sender_fails(self, event_loop):
+        websocket = AsyncMock()
+        websocket.send.side_effect = ConnectionError('Connection lost')
+        outbound_queue = OutboundQueue(maxsize=1)
+        await outbound_queue.put(self.messages[0])
+        waiting_put = event_loop.create_task(outbound_queue.put(self.messages[1]))
+        await asyncio.sleep(0)
+
+        with patch('phx_events.outbound.logger'):
+            outbound_queue.start(websocket, event_loop)
+            with pytest.raises(PHXClientError):
+                await asyncio.wait_for(waiting_put, timeout=1)
+
+    async def test_put_waits_when_full(self):
+        outbound_queue = OutboundQueue(maxsize=1)
+        await outbound_queue.put(self.messages[0])
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(outbound_queue.put(self.messages[1]), timeout=0.01)
@@ -0,0 +1,66 @@
+import concurrent.futures
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import inspect
+from unittest.mock import Mock
+
+import pytest
+
+from phx_events import json_handler, parallel
+from phx_events.parallel import parallel_executor, parallel_handler
+from phx_events.phx_messages import Event, Topic
+from phx_events.utils import make_message
+
+
+def record_message(message_bytes):
+    record_message.calls.append(json_handler.loads(message_bytes))
+
+
+class TestParallelExecutor:
+    def test_thread_pool_used_without_gil(self, monkeypatch):
+        monkeypatch.setattr(parallel, 'free_threaded', lambda: True)
+
+        with parallel_executor(max_workers=2) as executor:
+            assert isinstance(executor, ThreadPoolExecutor)
+
+    def test_interpreter_pool_used_when_available(self, monkeypatch):
+        interpreter_pool_executor = Mock()
+        monkeypatch.setattr(parallel, 'free_threaded', lambda: False)
+        monkeypatch.setattr(concurrent.futures, 'InterpreterPoolExecutor', interpreter_pool_executor, raising=False)
+
+        assert parallel_executor(max_workers=2) is interpreter_pool_executor.return_value
+        interpreter_pool_executor.assert_called_once_with(max_workers=2)
+
+    def test_falls_back_to_process_pool(self, monkeypatch):
+        monkeypatch.setattr(parallel, 'free_threaded', lambda: False)
+        monkeypatch.delattr(concurrent.futures, 'InterpreterPoolExecutor', raising=False)
+
+        with parallel_executor(max_workers=1) as executor:
+            assert isinstance(executor, ProcessPoolExecutor)
+
+
+@pytest.mark.asyncio
+class TestParallelHandler:
+    def setup(self):
+        record_message.calls = []
+
+    async def test_handler_given_message_bytes(self):
+        message = make_message(Event('new_price'), Topic('prices:1'), '1', {'price': 1.5})
+
+        with ThreadPoolExecutor() as executor:
+            handler = parallel_handler(record_message, executor)
+            await handler(message, Mock())
+
+        assert inspect.iscoroutinefunction(handler)
+        assert handler.__name__ == 'record_message'
+        assert record_message.calls == [
+            {'topic': 'prices:1', 'event': 'new_price', 'ref': '1', 'payload': json_handler.loads(b'{"price": 1.5}')},
+        ]
+
+    async def test_handler_runs_in_process_pool(self):
+        message = make_message(Event('new_price'), Topic('prices:1'), '1', {'price': 1.5})
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            await parallel_handler(record_message, executor)(message, Mock())
+
+        # The handler ran in the other process
+        assert record_message.calls == []
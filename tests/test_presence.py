@@ -0,0 +1,77 @@
+from unittest.mock import Mock
+
+from phx_events.phx_messages import Topic
+from phx_events.presence import Presence, PRESENCE_DIFF_EVENT, PRESENCE_STATE_EVENT
+from phx_events.utils import make_message
+
+
+def entry(*refs):
+    return {'metas': [{'phx_ref': ref} for ref in refs]}
+
+
+class TestPresence:
+    def setup(self):
+        self.topic = Topic('room:lobby')
+        self.on_join = Mock()
+        self.on_leave = Mock()
+        self.presence = Presence(on_join=self.on_join, on_leave=self.on_leave)
+
+    def test_sync_state_sets_state_and_calls_join(self):
+        self.presence.sync_state(self.topic, {'user_1': entry('1'), 'user_2': entry('2')})
+
+        assert self.presence.count(self.topic) == 2
+        assert self.presence.get(self.topic, 'user_1') == entry('1')
+        self.on_join.assert_any_call(self.topic, 'user_1', None, entry('1'))
+        self.on_leave.assert_not_called()
+
+    def test_sync_state_computes_joins_and_leaves_from_current_state(self):
+        self.presence.sync_state(self.topic, {'user_1': entry('1'), 'user_2': entry('2')})
+        self.on_join.reset_mock()
+
+        self.presence.sync_state(self.topic, {'user_1': entry('1', '3'), 'user_3': entry('4')})
+
+        assert self.presence.list(self.topic) == [entry('1', '3'), entry('4')]
+        self.on_join.assert_any_call(self.topic, 'user_1', entry('1'), entry('3'))
+        self.on_join.assert_any_call(self.topic, 'user_3', None, entry('4'))
+        self.on_leave.assert_called_once_with(self.topic, 'user_2', {'metas': []}, entry('2'))
+
+    def test_sync_diff_applies_joins_and_leaves(self):
+        self.presence.sync_state(self.topic, {'user_1': entry('1', '2')})
+
+        self.presence.sync_diff(self.topic, {'joins': {'user_2': entry('3')}, 'leaves': {'user_1': entry('1')}})
+
+        assert self.presence.get(self.topic, 'user_1') == entry('2')
+        assert self.presence.get(self.topic, 'user_2') == entry('3')
+        assert self.presence.count(self.topic) == 2
+
+    def test_key_removed_when_all_metas_leave(self):
+        self.presence.sync_state(self.topic, {'user_1': entry('1')})
+
+        self.presence.sync_diff(self.topic, {'joins': {}, 'leaves': {'user_1': entry('1')}})
+
+        assert self.presence.get(self.topic, 'user_1') is None
+        assert self.presence.count(self.topic) == 0
+
+    def test_diffs_before_state_applied_after_state(self):
+        self.presence.sync_diff(self.topic, {'joins': {'user_2': entry('2')}, 'leaves': {}})
+
+        assert self.presence.count(self.topic) == 0
+
+        self.presence.sync_state(self.topic, {'user_1': entry('1')})
+
+        assert self.presence.count(self.topic) == 2
+
+    def test_apply_message_uses_event(self):
+        self.presence.apply_message(make_message(PRESENCE_STATE_EVENT, self.topic, payload={'user_1': entry('1')}))
+        self.presence.apply_message(
+            make_message(PRESENCE_DIFF_EVENT, self.topic, payload={'joins': {'user_2': entry('2')}, 'leaves': {}}),
+        )
+
+        assert self.presence.count(self.topic) == 2
+
+    def test_clear_removes_topic_state(self):
+        self.presence.sync_state(self.topic, {'user_1': entry('1')})
+
+        self.presence.clear(self.topic)
+
+        assert self.presence.list(self.topic) == []
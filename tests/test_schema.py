@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from decimal import Decimal
+from enum import Enum
+from typing import Optional, TypedDict, Union
+
+import pytest
+
+from phx_events.exceptions import PayloadValidationError
+from phx_events.schema import compile_decoder
+
+
+class Side(Enum):
+    buy = 'buy'
+    sell = 'sell'
+
+
+@dataclass()
+class Level:
+    __slots__ = ('price', 'size')
+
+    price: Decimal
+    size: float
+
+
+@dataclass()
+class Order:
+    order_id: int
+    side: Side
+    levels: list[Level]
+    note: Optional[str] = None
+    tags: dict[str, str] = field(default_factory=dict)
+
+
+class Trade(TypedDict):
+    trade_id: Union[int, str]
+    price: Decimal
+
+
+@dataclass()
+class Node:
+    name: str
+    children: list['Node'] = field(default_factory=list)
+
+
+@dataclass
+class Quantity:
+    amount: int
+
+    def __post_init__(self):
+        if self.amount < 0:
+            raise ValueError('amount must not be negative')
+
+
+class TestCompileDecoder:
+    def test_dataclass_decoded(self):
+        decode_order = compile_decoder(Order)
+
+        order = decode_order({
+            'order_id': 1,
+            'side': 'buy',
+            'levels': [{'price': Decimal('1.10'), 'size': Decimal('2')}, {'price': '3.5', 'size': 4}],
+            'unknown': True,
+        })
+
+        assert order == Order(
+            order_id=1,
+            side=Side.buy,
+            levels=[Level(Decimal('1.10'), 2.0), Level(Decimal('3.5'), 4.0)],
+        )
+
+    def test_typed_dict_decoded(self):
+        assert compile_decoder(Trade)({'trade_id': 'abc', 'price': 1}) == {'trade_id': 'abc', 'price': Decimal(1)}
+
+    def test_self_referencing_schema_decoded(self):
+        tree = compile_decoder(Node)({'name': 'root', 'children': [{'name': 'leaf'}]})
+
+        assert tree == Node('root', [Node('leaf')])
+
+    @pytest.mark.parametrize(('payload', 'error_message'), [
+        ({'order_id': 1, 'side': 'buy'}, "payload: missing Order fields ['levels']"),
+        ({'order_id': True, 'side': 'buy', 'levels': []}, 'payload.order_id: expected int, got bool'),
+        ({'order_id': 1, 'side': 'hold', 'levels': []}, "payload.side: 'hold' is not a valid Side"),
+        (
+            {'order_id': 1, 'side': 'buy', 'levels': [{'price': 'abc', 'size': 1}]},
+            "payload.levels[0].price: expected Decimal, got str 'abc'",
+        ),
+    ])
+    def test_validation_errors_include_path(self, payload, error_message):
+        with pytest.raises(PayloadValidationError) as exception_info:
+            compile_decoder(Order)(payload)
+
+        assert str(exception_info.value) == error_message
+
+    def test_errors_building_schema_raised_as_validation_errors(self):
+        with pytest.raises(PayloadValidationError, match='payload: invalid Quantity - amount must not be negative'):
+            compile_decoder(Quantity)({'amount': -1})
+
+    def test_unsupported_schema_type_raises(self):
+        with pytest.raises(TypeError):
+            compile_decoder(set)
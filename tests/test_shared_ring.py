@@ -0,0 +1,142 @@
+import asyncio
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+import subprocess
+import sys
+
+import pytest
+
+from phx_events.phx_messages import Event, PHXEvent, Topic
+from phx_events.shared_ring import SharedRingBuffer, SharedRingPublisher
+from phx_events.utils import make_message
+
+
+ATTACH_RING_PROGRAM = """
+from multiprocessing import resource_tracker
+import sys
+
+from phx_events.shared_ring import SharedRingBuffer
+
+SharedRingBuffer(sys.argv[1], create=False).close()
+resource_tracker._resource_tracker._stop()
+"""
+
+
+def consume_ring(name, results):
+    ring = SharedRingBuffer(name, create=False)
+    try:
+        results.put([frame for batch in ring.batches(max_frames=10) for frame in batch])
+    finally:
+        ring.close()
+
+
+class TestSharedRingBuffer:
+    def setup(self):
+        self.ring = SharedRingBuffer(capacity=64)
+
+    def teardown(self):
+        self.ring.close()
+
+    def test_frames_read_in_order_in_batches(self):
+        for index in range(5):
+            assert self.ring.try_write(b'frame_%d' % index)
+
+        assert self.ring.read_batch(max_frames=3) == [b'frame_0', b'frame_1', b'frame_2']
+        assert self.ring.read_batch() == [b'frame_3', b'frame_4']
+        assert self.ring.read_batch() == []
+        assert len(self.ring) == 0
+
+    def test_frames_wrap_around_end_of_buffer(self):
+        frames = [bytes([index]) * 20 for index in range(20)]
+
+        for frame in frames:
+            assert self.ring.try_write(frame)
+            assert self.ring.read_batch() == [frame]
+
+    def test_write_refused_while_full(self):
+        assert self.ring.try_write(b'a' * 40)
+        assert not self.ring.try_write(b'b' * 20)
+
+        assert self.ring.read_batch() == [b'a' * 40]
+        assert self.ring.try_write(b'b' * 20)
+
+    def test_frames_larger_than_buffer_rejected(self):
+        with pytest.raises(ValueError, match='larger than the ring buffer'):
+            self.ring.try_write(b'a' * 64)
+
+    @pytest.mark.asyncio
+    async def test_write_waits_for_space(self):
+        await self.ring.write(b'a' * 40)
+        write_task = asyncio.create_task(self.ring.write(b'b' * 40))
+
+        await asyncio.sleep(0.01)
+        assert not write_task.done()
+
+        assert self.ring.read_batch() == [b'a' * 40]
+        await asyncio.wait_for(write_task, timeout=1)
+        assert self.ring.read_batch() == [b'b' * 40]
+
+    def test_batches_end_once_writer_closed(self):
+        self.ring.try_write(b'frame')
+        self.ring.close_writer()
+
+        assert list(self.ring.batches()) == [[b'frame']]
+
+    def test_frames_read_by_consumer_process(self):
+        results = multiprocessing.Queue()
+        consumer = multiprocessing.Process(target=consume_ring, args=(self.ring.name, results))
+        consumer.start()
+
+        frames = [b'frame_%d' % index for index in range(100)]
+        for frame in frames:
+            while not self.ring.try_write(frame):
+                pass
+        self.ring.close_writer()
+
+        assert results.get(timeout=5) == frames
+        consumer.join(timeout=5)
+
+    def test_ring_kept_after_consumer_process_exits(self):
+        # A separate program rather than a child process so it has its own resource tracker, which is stopped before
+        # the program exits so anything it would free has been freed
+        subprocess.run([sys.executable, '-c', ATTACH_RING_PROGRAM, self.ring.name], check=True, timeout=10)
+
+        attached_ring = SharedRingBuffer(self.ring.name, create=False)
+        assert attached_ring.capacity == 64
+        attached_ring.close()
+
+
+@pytest.mark.asyncio
+class TestSharedRingPublisher:
+    def setup(self):
+        self.rings = [SharedRingBuffer(capacity=4096) for _ in range(2)]
+        self.publisher = SharedRingPublisher(self.rings)
+
+    def teardown(self):
+        for ring in self.rings:
+            ring.close()
+
+    async def test_topic_frames_published_to_same_ring(self):
+        topics = [Topic(f'topic:{index}') for index in range(10)]
+        for topic in topics:
+            await self.publisher.publish(make_message(Event('event_name'), topic), topic.encode())
+
+        for ring in self.rings:
+            assert ring.read_batch() == [topic.encode() for topic in topics if self.publisher.ring_for(topic) is ring]
+
+    async def test_admin_events_not_published(self):
+        topic = Topic('topic:subtopic')
+        await self.publisher.publish(make_message(PHXEvent.reply, topic), b'reply')
+
+        assert all(ring.read_batch() == [] for ring in self.rings)
+
+    async def test_close_closes_ring_writers_and_frees_rings(self):
+        consumer_ring = SharedRingBuffer(self.rings[0].name, create=False)
+
+        self.publisher.close()
+
+        assert consumer_ring.closed
+        consumer_ring.close()
+        for ring in self.rings:
+            with pytest.raises(FileNotFoundError):
+                SharedMemory(ring.name)
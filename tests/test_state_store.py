@@ -0,0 +1,139 @@
+from unittest.mock import Mock
+
+import pytest
+
+from phx_events.phx_messages import Event, Topic
+from phx_events.state_store import MaterializedView, SecondaryIndex
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+def price_message(topic, **payload):
+    return make_message(Event('price'), Topic(topic), payload=payload)
+
+
+class TestSecondaryIndex:
+    def test_lookup_and_range(self):
+        index = SecondaryIndex('price')
+        index.add('a', {'price': 1})
+        index.add('b', {'price': 3})
+        index.add('c', {'price': 3})
+        index.add('d', {'other': 2})
+
+        assert index.lookup(3) == {'b', 'c'}
+        assert set(index.range(0, 2)) == {'a'}
+        assert set(index.range(1, 3)) == {'a', 'b', 'c'}
+
+    def test_remove_drops_empty_values(self):
+        index = SecondaryIndex('price')
+        index.add('a', {'price': 1})
+
+        index.remove('a', {'price': 1})
+
+        assert index.lookup(1) == set()
+        assert list(index.range(0, 10)) == []
+
+    def test_field_values_of_mixed_types_ranged_separately(self):
+        index = SecondaryIndex('price')
+        index.add('a', {'price': 'unknown'})
+        index.add('b', {'price': 1})
+        index.add('c', {'price': 2.5})
+
+        assert index.lookup('unknown') == {'a'}
+        assert list(index.range(0, 10)) == ['b', 'c']
+        assert list(index.range('a', 'z')) == ['a']
+        assert list(index.range(0, 'z')) == []
+
+        index.remove('a', {'price': 'unknown'})
+        assert index.lookup('unknown') == set()
+
+    def test_field_values_that_cant_be_hashed_or_ordered_not_indexed(self):
+        index = SecondaryIndex('price')
+        index.add('a', {'price': 1})
+
+        index.add('b', {'price': [1, 2]})
+        index.add('c', {'price': 1j})
+        index.add('d', {'price': 2j})
+        index.remove('b', {'price': [1, 2]})
+
+        assert index.lookup([1, 2]) == set()
+        assert index.lookup(2j) == set()
+        assert list(index.range(0, 10)) == ['a']
+
+
+class TestMaterializedView:
+    def test_latest_payload_stored_per_topic(self):
+        view = MaterializedView()
+
+        view.apply(price_message('btc', price=1))
+        view.apply(price_message('btc', price=2))
+        view.apply(price_message('eth', price=3))
+
+        assert len(view) == 2
+        assert view.get(Topic('btc')) == {'price': 2}
+
+    def test_custom_key_function_and_reducer(self):
+        view = MaterializedView(
+            key_function=lambda message: message.payload['symbol'],
+            reducer=lambda current, message: (current or 0) + message.payload['volume'],
+        )
+
+        view.apply(price_message('trades', symbol='btc', volume=1))
+        view.apply(price_message('trades', symbol='btc', volume=2))
+
+        assert view.get('btc') == 3
+
+    def test_reducer_returning_none_deletes_key(self):
+        view = MaterializedView(reducer=lambda current, message: message.payload or None)
+
+        view.apply(price_message('btc', price=1))
+        view.apply(price_message('btc'))
+
+        assert Topic('btc') not in view
+
+    def test_indexes_updated_when_values_change(self):
+        view = MaterializedView(indexes=['price'])
+
+        view.apply(price_message('btc', price=1))
+        view.apply(price_message('eth', price=2))
+        view.apply(price_message('btc', price=3))
+
+        assert view.lookup('price', 1) == []
+        assert view.lookup('price', 3) == [{'price': 3}]
+        assert view.range('price', 2, 3) == [{'price': 2}, {'price': 3}]
+
+    def test_indexes_updated_when_reducer_updates_value_in_place(self):
+        def merge_payload(current_value, message):
+            if current_value is None:
+                return dict(message.payload)
+
+            current_value.update(message.payload)
+            return current_value
+
+        view = MaterializedView(reducer=merge_payload, indexes=['status'])
+
+        view.apply(make_message(Event('order'), Topic('orders:1'), payload={'status': 'open', 'price': 1}))
+        view.apply(make_message(Event('order'), Topic('orders:1'), payload={'status': 'closed'}))
+
+        assert view.lookup('status', 'open') == []
+        assert view.lookup('status', 'closed') == [{'status': 'closed', 'price': 1}]
+        assert view.range('status', 'a', 'z') == [{'status': 'closed', 'price': 1}]
+
+    def test_change_callbacks_called(self):
+        view = MaterializedView()
+        callback = Mock()
+        view.subscribe(callback)
+
+        view.apply(price_message('btc', price=1))
+        view.apply(price_message('btc', price=2))
+
+        callback.assert_called_with(Topic('btc'), {'price': 1}, {'price': 2})
+
+    async def test_handle_message_applies_message(self):
+        view = MaterializedView()
+
+        await view.handle_message(price_message('btc', price=1), Mock())
+
+        assert view.get(Topic('btc')) == {'price': 1}
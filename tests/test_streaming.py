@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+import pytest
+
+from phx_events.streaming import defer_payload_items, PayloadItems
+
+
+class TestPayloadItems:
+    def test_list_elements_converted_when_iterated(self):
+        payload_items = PayloadItems([[1.5, 2], [2.5, 3]])
+
+        assert len(payload_items) == 2
+        assert list(payload_items) == [[Decimal('1.5'), 2], [Decimal('2.5'), 3]]
+
+    def test_dict_items_converted_when_iterated(self):
+        assert list(PayloadItems({'a': 1.5})) == [('a', Decimal('1.5'))]
+
+    @pytest.mark.asyncio
+    async def test_chunks_converted_in_executor(self):
+        payload_items = PayloadItems([0.5] * 5)
+
+        chunks = [chunk async for chunk in payload_items.chunks(chunk_size=2)]
+
+        assert chunks == [[Decimal('0.5')] * 2, [Decimal('0.5')] * 2, [Decimal('0.5')]]
+
+
+class TestDeferPayloadItems:
+    def test_value_at_path_deferred(self):
+        payload = {'book': {'bids': [[1.5, 2]], 'spread': 0.5}, 'sequence': 1}
+
+        deferred_payload = defer_payload_items(payload, ['book', 'bids'])
+
+        assert isinstance(deferred_payload['book']['bids'], PayloadItems)
+        assert deferred_payload['book']['spread'] == Decimal('0.5')
+        assert deferred_payload['sequence'] == 1
+
+    def test_list_index_in_path(self):
+        deferred_payload = defer_payload_items({'levels': [[0.5], [1.5]]}, ['levels', -1])
+
+        assert deferred_payload['levels'][0] == [Decimal('0.5')]
+        assert isinstance(deferred_payload['levels'][1], PayloadItems)
+
+    @pytest.mark.parametrize('path', [['missing'], ['levels', 5], ['levels', 0, 'price']])
+    def test_payload_converted_if_path_not_found(self, path):
+        assert defer_payload_items({'levels': [[0.5]]}, path) == {'levels': [[Decimal('0.5')]]}
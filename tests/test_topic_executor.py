@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from phx_events.topic_executor import TopicAffinityExecutor
+
+
+class TestTopicAffinityExecutor:
+    def setup(self):
+        self.executor = TopicAffinityExecutor(max_workers=4)
+
+    def teardown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def test_topic_work_runs_on_one_thread_in_order(self):
+        handled = []
+
+        def handler(index):
+            handled.append((index, threading.current_thread().name))
+
+        futures = [self.executor.submit_for_topic('topic:subtopic', handler, index) for index in range(50)]
+        for future in futures:
+            future.result(timeout=1)
+
+        worker_name = f'phx_events_topic_worker_{self.executor.worker_for("topic:subtopic")}'
+        assert handled == [(index, worker_name) for index in range(50)]
+
+    def test_results_and_exceptions_returned(self):
+        def failing_handler():
+            raise ValueError('handler_error')
+
+        assert self.executor.submit_for_topic('topic:subtopic', pow, 2, 3).result(timeout=1) == 8
+        with pytest.raises(ValueError, match='handler_error'):
+            self.executor.submit_for_topic('topic:subtopic', failing_handler).result(timeout=1)
+
+    def test_unordered_topic_work_stolen_by_idle_workers(self):
+        self.executor.shutdown()
+        self.executor = TopicAffinityExecutor(max_workers=4, unordered_topics=['topic:unordered'])
+        handler_threads = set()
+
+        def slow_handler():
+            handler_threads.add(threading.current_thread().name)
+            time.sleep(0.05)
+
+        futures = [self.executor.submit_for_topic('topic:unordered', slow_handler) for _ in range(8)]
+        for future in futures:
+            future.result(timeout=1)
+
+        assert len(handler_threads) > 1
+        assert self.executor.stolen > 0
+
+    def test_ordered_topic_work_not_stolen(self):
+        release_worker = threading.Event()
+        topic_worker = self.executor.worker_for('topic:subtopic')
+
+        blocking_future = self.executor.submit_for_topic('topic:subtopic', release_worker.wait, 1)
+        waiting_future = self.executor.submit_for_topic('topic:subtopic', threading.current_thread)
+        # Work for other topics keeps the other workers looking for work to steal
+        for _ in range(20):
+            self.executor.submit(time.sleep, 0.001).result(timeout=1)
+
+        assert not waiting_future.done()
+        release_worker.set()
+        assert blocking_future.result(timeout=1)
+        assert waiting_future.result(timeout=1).name == f'phx_events_topic_worker_{topic_worker}'
+
+    def test_shutdown_cancels_queued_work(self):
+        release_worker = threading.Event()
+
+        self.executor.submit_for_topic('topic:subtopic', release_worker.wait, 1)
+        queued_future = self.executor.submit_for_topic('topic:subtopic', time.sleep, 0)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        release_worker.set()
+
+        assert queued_future.cancelled()
+        with pytest.raises(RuntimeError):
+            self.executor.submit(time.sleep, 0)
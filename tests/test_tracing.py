@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+from phx_events import json_handler
+from phx_events.phx_messages import Event, Topic
+from phx_events.tracing import FileSpanExporter, get_current_trace, InMemorySpanExporter, MessageTrace, Tracer
+from phx_events.utils import make_message
+
+
+pytestmark = pytest.mark.asyncio
+
+
+class TestMessageTrace:
+    def setup(self):
+        self.message = make_message(Event('event_name'), Topic('topic:subtopic'))
+        self.message_trace = MessageTrace(self.message, received_at_ns=1)
+
+    def test_spans_are_children_of_root_span(self):
+        span = self.message_trace.add_span('parse', 1, 2)
+        root_span = self.message_trace.root_span(end_time_ns=3)
+
+        assert span.parent_span_id == root_span.span_id
+        assert span.trace_id == root_span.trace_id == self.message_trace.trace_id
+        assert root_span.attributes == {'phx.event': 'event_name', 'phx.topic': 'topic:subtopic'}
+
+    async def test_coroutine_handler_sees_current_trace(self):
+        seen_traces = []
+
+        async def handler(message, client):
+            seen_traces.append(get_current_trace())
+
+        await self.message_trace.run_coroutine_handler(handler, Mock())
+
+        assert seen_traces == [self.message_trace]
+        assert get_current_trace() is None
+        assert [span.name for span in self.message_trace.spans] == ['handler']
+
+    async def test_executor_handler_records_executor_wait(self):
+        seen_traces = []
+
+        def handler(message, client):
+            seen_traces.append(get_current_trace())
+
+        await asyncio.get_running_loop().run_in_executor(None, self.message_trace.executor_handler(handler, Mock()))
+
+        assert seen_traces == [self.message_trace]
+        assert [span.name for span in self.message_trace.spans] == ['executor_wait', 'handler']
+
+
+class TestTracer:
+    def setup(self):
+        self.message = make_message(Event('event_name'), Topic('topic:subtopic'))
+        self.exporter = InMemorySpanExporter()
+
+    def test_unsampled_messages_not_traced(self):
+        tracer = Tracer(self.exporter, sample_rate=0)
+
+        assert tracer.start_trace(self.message, 1, 2) is None
+
+    def test_trace_exported_with_all_stages(self):
+        tracer = Tracer(self.exporter)
+
+        message_trace = tracer.start_trace(self.message, 1, 2)
+        tracer.mark_queued(message_trace)
+        assert tracer.take_trace(self.message) is message_trace
+        tracer.finish_trace(message_trace)
+
+        assert [span.name for span in self.exporter.spans] == ['phx_message', 'parse', 'queue_wait']
+        assert tracer.take_trace(self.message) is None
+
+
+class TestFileSpanExporter:
+    def test_spans_written_as_otel_json_lines(self, tmp_path):
+        span_path = tmp_path / 'spans.jsonl'
+        exporter = FileSpanExporter(span_path, batch_size=2)
+        message_trace = MessageTrace(make_message(Event('event_name'), Topic('topic')), received_at_ns=1)
+
+        exporter.export([message_trace.add_span('parse', 1, 2)])
+        assert not span_path.exists()
+
+        exporter.export([message_trace.root_span(3)])
+        span_lines = span_path.read_bytes().splitlines()
+
+        assert len(span_lines) == 2
+        assert json_handler.loads(span_lines[0])['name'] == 'parse'
+        assert json_handler.loads(span_lines[0])['parentSpanId'] == message_trace.root_span_id